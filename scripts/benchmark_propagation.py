@@ -0,0 +1,45 @@
+""" Time unit propagation on a van der Waerden problem, by assuming each
+literal in turn and propagating it.
+"""
+from __future__ import print_function
+
+import argparse
+
+from simplesat.examples.van_der_waerden import van_der_waerden
+from simplesat.sat import MiniSATSolver
+from simplesat.utils import timed_context
+
+
+def probe_every_literal(j, k, n, repeat):
+    s = MiniSATSolver()
+    for clause in van_der_waerden(j, k, n):
+        s.add_clause(clause)
+    s._setup_assignments()
+    variables = sorted(s.assignments.keys())
+
+    with timed_context("Propagation") as timer:
+        for _ in range(repeat):
+            for variable in variables:
+                for lit in (variable, -variable):
+                    s.assume(lit)
+                    s.propagate()
+                    s.cancel_until(0)
+    return timer, s.stats
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser()
+    p.add_argument("-j", type=int, default=4)
+    p.add_argument("-k", type=int, default=4)
+    p.add_argument("-n", type=int, default=34)
+    p.add_argument("--repeat", type=int, default=10)
+
+    ns = p.parse_args(argv)
+
+    timer, stats = probe_every_literal(ns.j, ns.k, ns.n, ns.repeat)
+    print(timer.pretty("{description:20} : {elapsed:e}"))
+    print("Propagations : {}".format(stats.propagations))
+
+
+if __name__ == '__main__':
+    main()
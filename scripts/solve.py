@@ -6,7 +6,6 @@ import sys
 
 from simplesat.dependency_solver import DependencySolver
 from simplesat.pool import Pool
-from simplesat.sat.policy import InstalledFirstPolicy
 from simplesat.test_utils import Scenario
 from simplesat.errors import SatisfiabilityError
 
@@ -17,11 +16,9 @@ def solve_and_print(request, remote_repositories, installed_repository,
     pool = Pool(remote_repositories)
     pool.add_repository(installed_repository)
 
-    policy = InstalledFirstPolicy(pool, installed_repository,
-                                  prefer_installed=prefer_installed)
     solver = DependencySolver(
         pool, remote_repositories, installed_repository,
-        policy=policy, use_pruning=prune, strict=strict)
+        use_pruning=prune, strict=strict, debug=bool(debug))
 
     fmt = "ELAPSED : {description:20} : {elapsed:e}"
     try:
@@ -36,9 +33,9 @@ def solve_and_print(request, remote_repositories, installed_repository,
         print(e.unsat._find_requirement_time.pretty(fmt), file=sys.stderr)
 
     if debug:
-        counts, hist = solver._policy._log_histogram()
+        counts, hist = solver._last_policy._log_histogram()
         print(hist, file=sys.stderr)
-        report = solver._policy._log_report(with_assignments=debug > 1)
+        report = solver._last_policy._log_report(with_assignments=debug > 1)
         print(report, file=sys.stderr)
     print(solver._last_rules_time.pretty(fmt), file=sys.stderr)
     print(solver._last_solver_init_time.pretty(fmt), file=sys.stderr)
@@ -1,4 +1,5 @@
 import collections
+import functools
 import itertools
 
 import attr
@@ -8,17 +9,27 @@ from simplesat.constraints import ConstraintModifiers
 from simplesat.constraints.requirement import InstallRequirement
 from simplesat.errors import (
     NoPackageFound, SatisfiabilityError, SatisfiabilityErrorWithHint,
-    UnexpectedlySatisfiable)
+    UnexpectedlySatisfiable, UnsatisfiableAssumptions)
 from simplesat.pool import Pool
+from simplesat.portfolio import first_result
 from simplesat.repository import Repository
 from simplesat.request import JobType, Request
 from simplesat.rules_generator import RulesGenerator
-from simplesat.sat.policy import InstalledFirstPolicy
+from simplesat.sat.policy import (
+    InstalledFirstPolicy, RepositoryPriorityPolicy)
+from simplesat.sat.policy.policy_logger import LoggedPolicy
 from simplesat.sat import MiniSATSolver
+from simplesat.sat.preprocessing import Preprocessor
+from simplesat.sat.probing import Prober
+from simplesat.sat.stats import SolverStats
 from simplesat.transaction import Transaction, InstallOperation
 from simplesat.utils import timed_context, connected_nodes
 
 
+_PORTFOLIO_SETTINGS = frozenset([
+    'policy_factory', 'solver_options', 'use_preprocessing', 'use_probing'])
+
+
 def requirements_from_packages(packages):
     """
     Return a list of requirements, one to match each package in `packages`.
@@ -131,11 +142,12 @@ def requirements_are_satisfiable(packages, requirements, modifiers=None):
 
     Returns
     -------
-    bool
-        Return True if the `requirements` can be satisfied by the `packages`.
+    Result
+        Its `is_satisfiable` attribute is True if the `requirements` can be
+        satisfied by the `packages`. Otherwise, its `message` attribute
+        explains the conflict; it is only computed when read.
     """
     modifiers = modifiers or ConstraintModifiers()
-    Result = collections.namedtuple("Result", "is_satisfiable message")
 
     request = Request(modifiers=modifiers)
     for requirement in requirements:
@@ -145,11 +157,69 @@ def requirements_are_satisfiable(packages, requirements, modifiers=None):
 
     try:
         DependencySolver(pool, repositories, []).solve(request)
-        return Result(is_satisfiable=True, message="")
+        return _SatisfiabilityResult(True)
     except SatisfiabilityError as e:
-        return Result(
-            is_satisfiable=False, message=e.unsat.to_string(pool=pool)
-        )
+        return _SatisfiabilityResult(False, e.unsat, pool)
+
+
+class _SatisfiabilityResult(object):
+
+    """ The result of :func:`requirements_are_satisfiable`.
+
+    Like a ``(is_satisfiable, message)`` named tuple, except that the
+    message explaining a conflict is only computed when it is read.
+    """
+
+    _fields = ('is_satisfiable', 'message')
+
+    def __init__(self, is_satisfiable, unsat=None, pool=None):
+        self.is_satisfiable = is_satisfiable
+        self._unsat = unsat
+        self._pool = pool
+        self._message = None
+
+    @property
+    def message(self):
+        if self._message is None:
+            if self._unsat is None:
+                self._message = ""
+            else:
+                self._message = self._unsat.to_string(pool=self._pool)
+        return self._message
+
+    def _as_tuple(self):
+        return (self.is_satisfiable, self.message)
+
+    def _asdict(self):
+        return collections.OrderedDict(zip(self._fields, self._as_tuple()))
+
+    def __iter__(self):
+        return iter(self._as_tuple())
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __getitem__(self, index):
+        return self._as_tuple()[index]
+
+    def __eq__(self, other):
+        if isinstance(other, _SatisfiabilityResult):
+            other = other._as_tuple()
+        elif not isinstance(other, tuple):
+            return NotImplemented
+        return self._as_tuple() == other
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        if equal is NotImplemented:
+            return equal
+        return not equal
+
+    def __hash__(self):
+        return hash(self._as_tuple())
+
+    def __repr__(self):
+        return "Result(is_satisfiable={!r})".format(self.is_satisfiable)
 
 
 def satisfy_requirements(packages, requirements, modifiers=None):
@@ -335,6 +405,60 @@ class DependencySolver(object):
         When true, behave more harshly when dealing with broken packages. INFO
         level log messages become WARNINGs and missing dependencies become
         errors rather than causing the package to be ignored.
+    policy_factory : callable, optional
+        A callable with the signature of :class:`InstalledFirstPolicy`, used
+        to create the policy for each request. Defaults to
+        :class:`InstalledFirstPolicy`. A :class:`ReusablePolicyFactory`
+        shared by several solvers of the same pool creates the policy once.
+    solver_options : dict, optional
+        Keyword arguments given to the :class:`MiniSATSolver`, e.g.
+        ``{'restart_strategy': 'luby'}``. The special value
+        ``'installed'`` for ``initial_phases`` decides the installed packages
+        True and the other versions of their names False first.
+        The budget options, e.g. ``{'time_limit': 5.0}`` or
+        ``{'cancellation_token': token}``, bound the SAT search of each
+        call to :meth:`solve`, which then raises
+        :class:`~simplesat.errors.SearchLimitReached`.
+        ``{'explanation_max_nodes': 1000}`` or
+        ``{'explanation_time_limit': 1.0}`` bound the search for the
+        conflict paths which explain an unsatisfiable request.
+    use_at_most_one : bool, optional
+        When True, the rule that only one version of a package can be
+        installed is a single at-most-one constraint per package name,
+        instead of one clause per pair of versions.
+    use_preprocessing : bool, optional
+        When True, the clauses are simplified by a :class:`Preprocessor`
+        before solving. Packages are never eliminated, since the policy may
+        choose any of them.
+    use_probing : bool, optional
+        When True, a :class:`Prober` simplifies the problem at the root
+        level before solving.
+    portfolio : sequence of dict, optional
+        If given, the rules are generated once, then solved in parallel, in
+        one process per configuration of the portfolio, and the first
+        process to finish wins. Each configuration may override the
+        ``policy_factory``, ``use_preprocessing`` and ``use_probing`` of the
+        solver, and entries of its ``solver_options``, e.g.
+        :data:`simplesat.portfolio.DEFAULT_PORTFOLIO`. The transaction is
+        the one the winning configuration finds on its own: configurations
+        which change the policy or the phases may find another one.
+    repository_priorities : sequence of RepositoryInfo, optional
+        If given, the policy is a :class:`RepositoryPriorityPolicy`, which
+        prefers the packages of the repositories listed first among packages
+        of the same version. This cannot be combined with `policy_factory`.
+    debug : bool, optional
+        When True, the policy is wrapped in a :class:`PolicyLogger`, which
+        records each decision and the assignments changed before it, e.g.
+        for ``scripts/solve.py --debug``. The policy of the last call to
+        :meth:`solve` is kept in ``_last_policy``, unless it ran in a
+        portfolio process. Logging costs time and memory on every decision
+        and assignment, so it is off by default.
+
+    Attributes
+    ----------
+    stats : SolverStats
+        The statistics of the last call to :meth:`solve`, including the
+        number of rules of each type and the time spent in each step.
 
 
     >>> from simplesat.constraints.package_parser import \\
@@ -353,7 +477,10 @@ class DependencySolver(object):
     """
 
     def __init__(self, pool, remote_repositories, installed_repository,
-                 use_pruning=True, strict=False):
+                 use_pruning=True, strict=False, policy_factory=None,
+                 solver_options=None, use_at_most_one=False,
+                 use_preprocessing=False, use_probing=False, portfolio=None,
+                 repository_priorities=None, debug=False):
         self._pool = pool
         self._installed_repository = installed_repository
 
@@ -369,6 +496,38 @@ class DependencySolver(object):
 
         self.strict = strict
         self.use_pruning = use_pruning
+        if repository_priorities is not None:
+            if policy_factory is not None:
+                raise ValueError(
+                    "repository_priorities cannot be combined with "
+                    "policy_factory")
+            policy_factory = functools.partial(
+                RepositoryPriorityPolicy,
+                repository_priorities=tuple(repository_priorities))
+        self.policy_factory = policy_factory or InstalledFirstPolicy
+        self.solver_options = solver_options or {}
+        self.use_at_most_one = use_at_most_one
+        self.use_preprocessing = use_preprocessing
+        self.use_probing = use_probing
+        if portfolio is not None:
+            for configuration in portfolio:
+                unknown = set(configuration).difference(_PORTFOLIO_SETTINGS)
+                if unknown:
+                    raise ValueError(
+                        "Unknown portfolio settings: {}".format(
+                            ", ".join(sorted(unknown))))
+        self.portfolio = portfolio
+        self.debug = debug
+        # The policy used by the last call to solve.
+        self._last_policy = None
+        # The index of the configuration of the portfolio which won the last
+        # call to solve.
+        self._last_portfolio_winner = None
+        # The preprocessor and prober used by the last call to solve, if any.
+        self._last_preprocessor = None
+        self._last_prober = None
+        # The statistics of the last call to solve.
+        self.stats = SolverStats()
 
     def solve(self, request):
         """Given a request return a Transaction that would satisfy it.
@@ -387,6 +546,8 @@ class DependencySolver(object):
         ------
         SatisfiabilityError
             If no resolution is found.
+        SearchLimitReached
+            If the search runs out of the budget given in `solver_options`.
         """
         request = _convert_upgrade_request_if_needed(
             request, self._remote_repositories, self._installed_repository
@@ -399,17 +560,18 @@ class DependencySolver(object):
             requirement_ids, rules, policy = init_rules_and_policy(
                 request
             )
-        with self._last_solver_init_time:
-            sat_solver = MiniSATSolver.from_rules(rules, policy)
-        with self._last_solve_time:
-            solution = sat_solver.search()
-        solution_ids = _solution_to_ids(solution)
-
         installed_package_ids = set(
             self._pool.package_id(p)
             for p in self._installed_repository
         )
 
+        if self.portfolio:
+            solution_ids = self._solve_portfolio(
+                request, rules, requirement_ids, installed_package_ids)
+        else:
+            solution_ids = self._solve_rules(
+                rules, policy, requirement_ids, installed_package_ids)
+
         if self.use_pruning:
             root_ids = installed_package_ids.union(requirement_ids)
             solution_ids = _connected_packages(
@@ -418,6 +580,123 @@ class DependencySolver(object):
 
         return Transaction(self._pool, solution_ids, installed_package_ids)
 
+    def _solve_rules(self, rules, policy, requirement_ids,
+                     installed_package_ids):
+        """ Return the ids of the packages of a solution of `rules`.
+        """
+        self._last_policy = policy
+        with self._last_solver_init_time:
+            preprocessor = None
+            if self.use_preprocessing:
+                preprocessor = self._create_preprocessor(rules)
+            self._last_preprocessor = preprocessor
+            sat_solver = MiniSATSolver.from_rules(
+                rules, policy, preprocessor=preprocessor,
+                **self._get_solver_options())
+        self.stats = stats = sat_solver.stats
+        stats.rules = dict(
+            collections.Counter(rule.reason.name for rule in rules))
+        self._last_prober = None
+        try:
+            with self._last_solve_time:
+                if self.use_probing:
+                    self._last_prober = Prober()
+                    self._last_prober.probe(sat_solver)
+                solution = sat_solver.search()
+        finally:
+            stats.timings = {
+                'rules': self._last_rules_time.elapsed,
+                'solver_init': self._last_solver_init_time.elapsed,
+                'solve': self._last_solve_time.elapsed,
+            }
+        if preprocessor is not None:
+            preprocessor.extend_model(solution)
+        return _solution_to_ids(solution)
+
+    def _solve_portfolio(self, request, rules, requirement_ids,
+                         installed_package_ids):
+        """ Solve `rules` with every configuration of the portfolio in
+        parallel, and return the solution of the first one to finish.
+
+        Each configuration is deterministic, so that the solution is the one
+        the winning configuration finds on its own. Explanations of
+        unsatisfiable requests are not sent back by the processes: the
+        winning configuration finds its own again, in this process.
+        """
+        solvers = [
+            self._with_configuration(configuration)
+            for configuration in self.portfolio]
+
+        def solve_with(solver):
+            _, _, policy = solver._create_rules_generator_and_policy(request)
+            try:
+                solution_ids = solver._solve_rules(
+                    rules, policy, requirement_ids, installed_package_ids)
+            except SatisfiabilityError:
+                solution_ids = None
+            return solution_ids, solver.stats
+
+        with self._last_solve_time:
+            index, succeeded, value = first_result(
+                [functools.partial(solve_with, solver) for solver in solvers],
+                cancellation_token=self.solver_options.get(
+                    'cancellation_token'))
+        self._last_portfolio_winner = index
+        if not succeeded:
+            raise value
+        solution_ids, self.stats = value
+        self.stats.timings['rules'] = self._last_rules_time.elapsed
+
+        if solution_ids is None:
+            winner = solvers[index]
+            _, _, policy = winner._create_rules_generator_and_policy(request)
+            try:
+                solution_ids = winner._solve_rules(
+                    rules, policy, requirement_ids, installed_package_ids)
+            finally:
+                self.stats = winner.stats
+        return solution_ids
+
+    def _with_configuration(self, configuration):
+        """ Return a copy of this solver, with the settings of the portfolio
+        `configuration`.
+        """
+        solver_options = dict(self.solver_options)
+        solver_options.update(configuration.get('solver_options', {}))
+        return DependencySolver(
+            self._pool, self._remote_repositories,
+            self._installed_repository, use_pruning=self.use_pruning,
+            strict=self.strict,
+            policy_factory=configuration.get(
+                'policy_factory', self.policy_factory),
+            solver_options=solver_options,
+            use_at_most_one=self.use_at_most_one,
+            use_preprocessing=configuration.get(
+                'use_preprocessing', self.use_preprocessing),
+            use_probing=configuration.get('use_probing', self.use_probing),
+            debug=self.debug)
+
+    def _create_preprocessor(self, rules):
+        # Any package of the rules may be chosen by the policy, and its
+        # choice must not be overridden by Preprocessor.extend_model: only
+        # the clauses are simplified, and no package is eliminated.
+        frozen = set(abs(lit) for rule in rules for lit in rule.literals)
+        return Preprocessor(frozen)
+
+    def _get_solver_options(self):
+        options = dict(self.solver_options)
+        if options.get('initial_phases') == 'installed':
+            pool = self._pool
+            installed_ids = set(
+                pool.package_id(p) for p in self._installed_repository)
+            phases = {}
+            for package in self._installed_repository:
+                for candidate in pool.name_to_packages(package.name):
+                    package_id = pool.package_id(candidate)
+                    phases[package_id] = package_id in installed_ids
+            options['initial_phases'] = phases
+        return options
+
     def solve_with_hint(self, request):
         """Given a request return a Transaction that would satisfy it.
 
@@ -444,25 +723,88 @@ class DependencySolver(object):
             return self.solve(request)
         except SatisfiabilityError as exc:
             # XXX: we recompute the upgrade request here so that we get the
-            # corresponding jobs to be used by minimal_unsatisfiable_subset.
+            # corresponding jobs to be used by _conflicting_jobs.
             request = _convert_upgrade_request_if_needed(
                 request, self._remote_repositories, self._installed_repository
             )
-
-            def callback(jobs):
-                callback_request = Request(modifiers=request.modifiers)
-                for job in jobs:
-                    callback_request.jobs.append(job)
-                try:
-                    self.solve(callback_request)
-                    return True
-                except SatisfiabilityError:
-                    return False
-            conflicting_jobs = minimal_unsatisfiable_subset(
-                request.jobs, callback)
+            conflicting_jobs = self._conflicting_jobs(request)
             raise SatisfiabilityErrorWithHint(exc.unsat, conflicting_jobs)
 
+    def _conflicting_jobs(self, request):
+        """ Return a minimal subset of the jobs of `request` which cannot be
+        satisfied together.
+
+        A single SAT solver is used for every subset of jobs: the rules of
+        each job are guarded by a selector variable, and subsets are selected
+        through assumptions. The failed-assumption core of each unsatisfiable
+        subset shrinks the candidate jobs.
+        """
+        _, rules_generator, policy = \
+            self._create_rules_generator_and_policy(request)
+        rules = list(rules_generator.iter_rules())
+
+        # Selectors get the variables after the package ids.
+        first_selector = max(self._pool.package_ids + (0,)) + 1
+        selectors = [first_selector + i for i in range(len(request.jobs))]
+
+        sat_solver = MiniSATSolver(policy, **self._get_solver_options())
+        for rule in rules:
+            if rules_generator.is_job_rule(rule):
+                continue
+            if rule.is_at_most_one:
+                sat_solver.add_at_most_one(
+                    [-lit for lit in rule.literals], rule=rule)
+            else:
+                sat_solver.add_clause(rule.literals, rule=rule)
+        job_rules = rules_generator.job_rules
+        for selector, rules_of_job in zip(selectors, job_rules):
+            for rule in rules_of_job:
+                sat_solver.add_clause(rule.literals + (-selector,), rule=rule)
+        sat_solver._setup_assignments()
+
+        def unsatisfiable_core(job_indices):
+            """ Return a subset of `job_indices` which is unsatisfiable, or
+            None if `job_indices` is satisfiable.
+            """
+            selected = set(job_indices)
+            assumptions = [
+                selector if i in selected else -selector
+                for i, selector in enumerate(selectors)]
+            try:
+                sat_solver.solve(assumptions)
+                return None
+            except UnsatisfiableAssumptions as e:
+                return set(
+                    selectors.index(lit) for lit in e.core if lit > 0)
+            except SatisfiabilityError:
+                # Unsatisfiable without any job.
+                return set()
+
+        core = unsatisfiable_core(range(len(request.jobs)))
+        if core is None:
+            raise UnexpectedlySatisfiable()
+
+        # Deletion search, restricted to the last core found: a job whose
+        # removal makes the others satisfiable belongs to every conflicting
+        # subset of the candidates, and is kept. Otherwise, the core of the
+        # remaining jobs replaces the candidates, which drops the job and
+        # every job outside the core at once.
+        indices = sorted(core)
+        i = 0
+        while i < len(indices):
+            core = unsatisfiable_core(indices[:i] + indices[i + 1:])
+            if core is None:
+                i += 1
+            else:
+                indices = [index for index in indices if index in core]
+        return tuple(request.jobs[index] for index in indices)
+
     def _create_rules_and_initialize_policy(self, request):
+        requirement_ids, rules_generator, policy = \
+            self._create_rules_generator_and_policy(request)
+        return requirement_ids, list(rules_generator.iter_rules()), policy
+
+    def _create_rules_generator_and_policy(self, request):
         pool = self._pool
         installed_repository = self._installed_repository
 
@@ -498,17 +840,20 @@ class DependencySolver(object):
             package_id = pool.package_id(package)
             installed_package_ids[package_id] = package
 
+        policy_factory = self.policy_factory
+        if self.debug:
+            policy_factory = LoggedPolicy(policy_factory)
         # Prefer the installed versions of all packages
-        policy = InstalledFirstPolicy(
+        policy = policy_factory(
             pool, installed_repository,
             ignore_installed_packages=soft_update_packages)
         policy.add_requirements(all_requirement_ids)
 
         rules_generator = RulesGenerator(
             pool, request, installed_package_ids=installed_package_ids,
-            strict=self.strict)
+            strict=self.strict, use_at_most_one=self.use_at_most_one)
 
-        return all_requirement_ids, list(rules_generator.iter_rules()), policy
+        return all_requirement_ids, rules_generator, policy
 
 
 def _convert_upgrade_request_if_needed(request, remote_repositories,
@@ -42,13 +42,49 @@ class MissingConflicts(NoPackageFound):
 class SatisfiabilityError(SolverException):
     def __init__(self, unsat):
         self.unsat = unsat
-        super(SatisfiabilityError, self).__init__(self.reason)
+        super(SatisfiabilityError, self).__init__(unsat)
+
+    def __str__(self):
+        # The explanation is only computed when the message is needed.
+        return self.reason
 
     @property
     def reason(self):
         return self.unsat.to_string()
 
 
+class UnsatisfiableAssumptions(SolverException):
+    """ Raised when a problem has no solution under the given assumptions.
+
+    The `core` attribute holds a subset of the assumptions which cannot be
+    True together.
+    """
+    def __init__(self, core):
+        self.core = core
+        super(UnsatisfiableAssumptions, self).__init__(
+            "Conflicting assumptions: {}".format(core))
+
+
+class SearchLimitReached(SolverException):
+    """ Raised when a search stops before finding a solution, because it
+    used up its budget or was cancelled.
+
+    The `limit` attribute is the reason the search stopped: ``'time'``,
+    ``'conflicts'``, ``'propagations'`` or ``'cancelled'``. The `stats`
+    attribute maps the name of each resource to the amount of it the search
+    used, e.g. ``stats['conflicts']``.
+    """
+    def __init__(self, limit, stats):
+        self.limit = limit
+        self.stats = stats
+        super(SearchLimitReached, self).__init__(
+            "Search stopped ({}) after {} conflicts and {:.3f} seconds".format(
+                limit, stats['conflicts'], stats['elapsed']))
+
+    def __reduce__(self):
+        return (SearchLimitReached, (self.limit, self.stats))
+
+
 class SatisfiabilityErrorWithHint(SatisfiabilityError):
     """ A satistibiality error class with information about minimally
     unsatisfiable problem.
@@ -30,6 +30,7 @@ class Pool(object):
         self._package_to_id_ = {}
         self._id_to_package_ = {}
         self._packages_by_name_ = DefaultOrderedDict(list)
+        self._version_ranks = None
 
         self.modifiers = modifiers
 
@@ -45,6 +46,7 @@ class Pool(object):
             The repository to add
         """
         self._repositories.append(repository)
+        self._version_ranks = None
         for package in repository:
             current_id = self._id
             self._id += 1
@@ -132,3 +134,29 @@ class Pool(object):
     @property
     def package_ids(self):
         return tuple(self._id_to_package_.keys())
+
+    @property
+    def version_ranks(self):
+        """ A list of the rank of the version of each package, indexed by
+        package id.
+
+        Ranks are dense integers which compare like the versions: a greater
+        version has a greater rank, and equal versions have equal ranks. They
+        are computed once, when first needed, so that policies may compare
+        integers instead of versions.
+        """
+        if self._version_ranks is None:
+            ranks = [-1] * self._id
+            id_to_package = self._id_to_package_
+            package_ids = sorted(
+                id_to_package, key=lambda i: id_to_package[i].version)
+            rank = -1
+            previous = None
+            for package_id in package_ids:
+                version = id_to_package[package_id].version
+                if previous is None or version != previous:
+                    rank += 1
+                    previous = version
+                ranks[package_id] = rank
+            self._version_ranks = ranks
+        return self._version_ranks
@@ -0,0 +1,136 @@
+"""
+Run several configurations of a search in parallel, and keep the first one
+to finish.
+
+"""
+from __future__ import absolute_import
+
+import logging
+import multiprocessing
+import pickle
+from timeit import default_timer
+
+from six.moves import queue as _queue
+
+from simplesat.errors import SearchLimitReached, SolverException
+
+
+logger = logging.getLogger(__name__)
+
+
+#: A portfolio of :class:`DependencySolver` configurations which differ in
+#: their restart schedule, learned clause management and probing. They keep
+#: the solver's policy and phases, which choose the packages of the
+#: transaction, so that the transaction does not depend on which
+#: configuration wins. The empty first configuration is the solver's own.
+DEFAULT_PORTFOLIO = (
+    {},
+    {
+        'solver_options': {
+            'restart_strategy': 'luby', 'minimize_learned': True},
+    },
+    {
+        'solver_options': {
+            'restart_strategy': 'glucose', 'max_learned_clauses': 2000},
+    },
+    {
+        'solver_options': {'restart_strategy': 'geometric'},
+        'use_probing': True,
+    },
+)
+
+
+def first_result(functions, cancellation_token=None, poll_interval=0.05):
+    """ Call each of `functions` in its own process, and return the result
+    of the first one to return.
+
+    The other processes are terminated as soon as a result is known. A
+    function which raises does not win: the others keep running, and its
+    exception is only returned if every function raised.
+
+    The processes are forked, so that the functions and their arguments need
+    not be picklable; their results and exceptions must be. Where fork is not
+    available, only the first function is called, in this process.
+
+    Parameters
+    ----------
+    functions : sequence of callable
+        The functions to call, without arguments.
+    cancellation_token : CancellationToken, optional
+        If given, the processes are terminated as soon as the token is
+        cancelled, and SearchLimitReached is raised.
+    poll_interval : float, optional
+        The number of seconds between checks of the token and of the
+        processes.
+
+    Returns
+    -------
+    index : int
+        The index in `functions` of the function which returned first, or of
+        the first one which raised.
+    succeeded : bool
+        False if every function raised.
+    value : object
+        The value returned by the function, or the exception it raised.
+    """
+    try:
+        context = multiprocessing.get_context('fork')
+    except (AttributeError, ValueError):
+        logger.info("Fork is not available, running a single configuration")
+        return 0, True, functions[0]()
+
+    start_time = default_timer()
+    results = context.Queue()
+    processes = [
+        context.Process(target=_call, args=(index, function, results))
+        for index, function in enumerate(functions)]
+    for process in processes:
+        process.daemon = True
+        process.start()
+
+    failures = {}
+    try:
+        while len(failures) < len(processes):
+            if (cancellation_token is not None and
+                    cancellation_token.is_cancelled):
+                raise SearchLimitReached('cancelled', {
+                    'conflicts': 0, 'propagations': 0, 'decisions': 0,
+                    'restarts': 0, 'elapsed': default_timer() - start_time})
+            try:
+                index, succeeded, value = results.get(timeout=poll_interval)
+            except _queue.Empty:
+                for index, process in enumerate(processes):
+                    if (not process.is_alive() and index not in failures and
+                            process.exitcode != 0):
+                        failures[index] = SolverException(
+                            "Portfolio process {} exited with code {}".format(
+                                index, process.exitcode))
+                continue
+            if succeeded:
+                return index, True, value
+            failures[index] = value
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        for process in processes:
+            process.join()
+        results.close()
+
+    index = min(failures)
+    return index, False, failures[index]
+
+
+def _call(index, function, results):
+    try:
+        result = (index, True, function())
+    except Exception as e:
+        result = (index, False, e)
+    try:
+        pickle.dumps(result)
+    except Exception as e:
+        result = (index, False, SolverException(repr(e)))
+    results.put(result)
+    # Wait for the result to be sent before the process exits.
+    results.close()
+    results.join_thread()
@@ -37,6 +37,9 @@ class RuleType(enum.Enum):
 
 
 class PackageRule(object):
+
+    __slots__ = ('literals', '_reason', '_requirements')
+
     @classmethod
     def _from_string(cls, rule_string, pool):
         """
@@ -84,6 +87,23 @@ class PackageRule(object):
     def is_assertion(self):
         return len(self.literals) == 1
 
+    @property
+    def is_at_most_one(self):
+        """ True if at most one of the negated literals may be True.
+
+        Same-name rules of more than two packages are at-most-one
+        constraints rather than clauses.
+        """
+        return (self._reason == RuleType.package_same_name and
+                len(self.literals) > 2)
+
+    def restricted(self, literals):
+        """ Return a rule with the same reason and requirements, but on
+        `literals` only, e.g. one pair of an at-most-one rule.
+        """
+        return PackageRule(
+            literals, self._reason, requirements=self._requirements)
+
     @property
     def reason(self):
         return self._reason
@@ -153,8 +173,32 @@ class PackageRule(object):
 
 
 class RulesGenerator(object):
+    """ Generate the rules describing a request.
+
+    Parameters
+    ----------
+    pool : Pool
+        The pool of packages.
+    request : Request
+        The request to describe.
+    installed_package_ids : dict, optional
+        A mapping from id to package for the installed packages.
+    strict : bool, optional
+        If True, missing dependencies and conflicts of a job requirement are
+        errors.
+    use_at_most_one : bool, optional
+        If True, emit a single at-most-one rule for all the packages sharing
+        a name, instead of one rule for every pair of them.
+
+    Attributes
+    ----------
+    job_rules : list of list of PackageRule
+        The rules created directly from each job of the request, in the order
+        of ``request.jobs``. It is filled by :meth:`iter_rules`.
+    """
     def __init__(self, pool, request,
-                 installed_package_ids=None, strict=False):
+                 installed_package_ids=None, strict=False,
+                 use_at_most_one=False):
         self._rules_set = OrderedDict()
         self._pool = pool
 
@@ -162,12 +206,18 @@ class RulesGenerator(object):
         self.installed_package_ids = installed_package_ids or OrderedDict()
         self.added_package_ids = set()
         self.strict = strict
+        self.use_at_most_one = use_at_most_one
+        self._at_most_one_names = set()
+        self.job_rules = []
+        self._job_index = None
 
     def iter_rules(self):
         """
         Return an iterator over each created rule.
         """
         self.added_package_ids = set()
+        self._at_most_one_names = set()
+        self.job_rules = [[] for _ in self.request.jobs]
         # This attaches the job requirement to the created rule. We need
         # to run it first because duplicated rules are ignored. Otherwise,
         # we'll end up keeping the rule instance that doesn't know it should be
@@ -178,6 +228,12 @@ class RulesGenerator(object):
             self._add_package_rules(package)
         return self._rules_set
 
+    def is_job_rule(self, rule):
+        """
+        Return True if the given rule was only created from jobs.
+        """
+        return self._rules_set.get(rule) == "job"
+
     # ------------------------------
     # API to create individual rules
     # ------------------------------
@@ -242,6 +298,29 @@ class RulesGenerator(object):
         else:
             return None
 
+    def _create_at_most_one_rule(self, packages, reason, requirements=None):
+        """
+        Create a rule to install at most one of the given packages.
+
+        The rule is stored as the literals (-A | -B | -C), but it means that
+        no two of them can be installed together.
+
+        Parameters
+        ----------
+        packages: sequence
+            List of packages which exclude each other
+        reason: RuleType
+            One of PackageRule.reason
+        requirements: tuple of Requirement
+            Optional requirements explaining the rule's origin.
+
+        Returns
+        -------
+        rule: PackageRule
+        """
+        literals = [-self._pool.package_id(p) for p in packages]
+        return PackageRule(literals, reason, requirements=requirements)
+
     def _create_install_one_of_rule(self, packages, reason, requirements=None):
         """
         Creates a rule to Install one of the given packages.
@@ -302,8 +381,14 @@ class RulesGenerator(object):
         rule_type: RuleType
             Rule's type
         """
-        if rule is not None and rule not in self._rules_set:
-            self._rules_set[rule] = None
+        if rule is None:
+            return
+        if rule_type == "job":
+            self.job_rules[self._job_index].append(rule)
+            self._rules_set.setdefault(rule, rule_type)
+        else:
+            # A rule also created from a package is not only a job rule.
+            self._rules_set[rule] = rule_type
 
     def _add_install_requires_rules(self, package, work_queue, requirements):
         all_dependency_candidates = []
@@ -364,20 +449,23 @@ class RulesGenerator(object):
         """
 
         # Conflicts due to same-name
-        pkg_requirement = ConflictRequirement._from_string(package.name)
-        obsolete_providers = self._pool.what_provides(pkg_requirement)
-        # We add our new requirement to the stack of requirements we've
-        # gathered so far for these rules.
-        combined_requirements = (
-            requirements + (pkg_requirement,)
-            if requirements is not None
-            else None)
-        for provider in obsolete_providers:
-            if provider != package and provider.name == package.name:
-                reason = RuleType.package_same_name
-                rule = self._create_conflicts_rule(
-                    package, provider, reason, combined_requirements)
-                self._add_rule(rule, "package")
+        if self.use_at_most_one:
+            self._add_same_name_rule(package, requirements)
+        else:
+            pkg_requirement = ConflictRequirement._from_string(package.name)
+            obsolete_providers = self._pool.what_provides(pkg_requirement)
+            # We add our new requirement to the stack of requirements we've
+            # gathered so far for these rules.
+            combined_requirements = (
+                requirements + (pkg_requirement,)
+                if requirements is not None
+                else None)
+            for provider in obsolete_providers:
+                if provider != package and provider.name == package.name:
+                    reason = RuleType.package_same_name
+                    rule = self._create_conflicts_rule(
+                        package, provider, reason, combined_requirements)
+                    self._add_rule(rule, "package")
 
         # Explicit conflicts in package metadata
         for constraints in package.conflicts:
@@ -417,6 +505,28 @@ class RulesGenerator(object):
                     requirements=combined_requirements)
                 self._add_rule(rule, "package")
 
+    def _add_same_name_rule(self, package, requirements):
+        """
+        Create a single at-most-one rule for all the packages sharing the
+        name of `package`, the first time this name is seen.
+        """
+        if package.name in self._at_most_one_names:
+            return
+        self._at_most_one_names.add(package.name)
+
+        pkg_requirement = ConflictRequirement._from_string(package.name)
+        same_name = [
+            provider for provider in self._pool.what_provides(pkg_requirement)
+            if provider.name == package.name]
+        combined_requirements = (
+            requirements + (pkg_requirement,)
+            if requirements is not None
+            else None)
+        if len(same_name) > 1:
+            rule = self._create_at_most_one_rule(
+                same_name, RuleType.package_same_name, combined_requirements)
+            self._add_rule(rule, "package")
+
     def _add_package_rules(self, package, requirements=None):
         """
         Create all the rules required to satisfy installing the given package.
@@ -494,7 +604,8 @@ class RulesGenerator(object):
             self._add_package_rules(other)
 
     def _add_job_rules(self):
-        for job in self.request.jobs:
+        for job_index, job in enumerate(self.request.jobs):
+            self._job_index = job_index
             if job.kind in (JobType.install, JobType.soft_update):
                 self._add_install_job_rules(job)
             elif job.kind == JobType.remove:
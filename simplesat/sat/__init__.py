@@ -1,4 +1,6 @@
 from simplesat.errors import SatisfiabilityError  # noqa
+from .budget import CancellationToken  # noqa
+from .stats import SolverStats  # noqa
 from .minisat import MiniSATSolver  # noqa
 
 
@@ -1,73 +1,147 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+from array import array
+
 import six
 
 
+# States stored for each literal in the dense literal array.
+UNKNOWN = -2
+UNASSIGNED = -1
+FALSE = 0
+TRUE = 1
+
+# Map a stored state to its python value. The negative states wrap around to
+# the trailing ``None`` entries.
+_STATE_TO_VALUE = (False, True, None, None)
+
+
+def lit_code(lit):
+    """ Return the index of `lit` in a literal-indexed array.
+
+    A variable ``v`` owns two consecutive slots: ``2 * v`` for the positive
+    literal and ``2 * v + 1`` for the negative one.
+    """
+    return 2 * lit if lit > 0 else 1 - 2 * lit
+
+
 class AssignmentSet(object):
 
-    """A collection of literals and their assignments."""
+    """A collection of literals and their assignments.
+
+    The values are stored in a dense ``array('b')`` indexed by literal code
+    (see :func:`lit_code`), so that looking up the value of a literal is a
+    single array access. Both polarities of a variable are stored, which
+    avoids negating the value on every lookup.
+
+    Parameters
+    ----------
+    assignments : dict, optional
+        The initial assignments.
+    track_changes : bool, optional
+        Whether to keep the original value of each variable changed since the
+        changelog was last consumed. Without it, the changelog is always
+        empty, and assigning a variable costs no bookkeeping.
+    """
 
-    def __init__(self, assignments=None):
+    def __init__(self, assignments=None, track_changes=True):
+        # The two slots of variable 0 are never used.
+        self._data = array('b', (UNKNOWN, UNKNOWN))
+        self._track_changes = track_changes
         # Changelog is a dict of id -> (original value, new value)
-        # FIXME: Verify that we really need ordering here
-        self._data = {}
         self._orig = {}
-        self._seen = set()
         self._cached_changelog = None
         self._assigned_ids = set()
+        self._num_seen = 0
         self.new_keys = set()
+        #: If not None, a list to which the variables are appended when they
+        #: are assigned. Its owner empties it as it sees fit.
+        self.assigned_log = None
         for k, v in (assignments or {}).items():
             self[k] = v
 
+    def _grow(self, variable):
+        missing = 2 * variable + 2 - len(self._data)
+        if missing > 0:
+            self._data.extend(array('b', (UNKNOWN,)) * missing)
+
+    def _state(self, key):
+        try:
+            return self._data[lit_code(key)]
+        except IndexError:
+            return UNKNOWN
+
     def __setitem__(self, key, value):
 
         abskey = abs(key)
+        code = 2 * abskey
+        if code >= len(self._data):
+            self._grow(abskey)
+        data = self._data
+        state = data[code]
 
-        if abskey not in self._seen:
+        if state == UNKNOWN:
             self.new_keys.add(abskey)
+            self._num_seen += 1
 
         if value is None:
-            del self[key]
+            if state >= 0:
+                if self._track_changes:
+                    self._update_diff(abskey, None)
+                self._assigned_ids.discard(abskey)
+            data[code] = data[code + 1] = UNASSIGNED
         else:
-            self._update_diff(key, value)
-            self._data[key] = value
-            self._data[-key] = not value
-            self._assigned_ids.add(abs(key))
-
-        self._seen.add(abskey)
+            if key < 0:
+                value = not value
+            if self._track_changes:
+                self._update_diff(abskey, value)
+            if self.assigned_log is not None:
+                self.assigned_log.append(abskey)
+            data[code] = TRUE if value else FALSE
+            data[code + 1] = FALSE if value else TRUE
+            self._assigned_ids.add(abskey)
 
     def __delitem__(self, key):
-        self._seen.discard(abs(key))
-        if key not in self._data:
+        abskey = abs(key)
+        state = self._state(abskey)
+        if state == UNKNOWN:
             return
-        self._update_diff(key, None)
-        del self._data[key]
-        del self._data[-key]
-        self._assigned_ids.discard(abs(key))
+        if state >= 0:
+            if self._track_changes:
+                self._update_diff(abskey, None)
+            self._assigned_ids.discard(abskey)
+        self._num_seen -= 1
+        code = 2 * abskey
+        self._data[code] = self._data[code + 1] = UNKNOWN
 
     def __getitem__(self, key):
-        val = self._data.get(key)
-        if val is None and abs(key) not in self._seen:
+        state = self._state(key)
+        if state == UNKNOWN:
             raise KeyError(key)
-        return val
+        return _STATE_TO_VALUE[state]
 
     def get(self, key, default=None):
-        return self._data.get(key, default)
+        state = self._state(key)
+        if state < 0:
+            return default
+        return _STATE_TO_VALUE[state]
 
     def __len__(self):
-        return len(self._seen)
+        return self._num_seen
 
     def __iter__(self):
         return iter(self.keys())
 
     def __contains__(self, key):
-        return abs(key) in self._seen
+        return self._state(key) != UNKNOWN
 
     def items(self):
-        return sorted(
-            (k, self._data.get(k))
-            for k in self._seen)
+        data = self._data
+        return [
+            (k, _STATE_TO_VALUE[data[2 * k]])
+            for k in range(1, len(data) // 2)
+            if data[2 * k] != UNKNOWN]
 
     def iteritems(self):
         return iter(self.items())
@@ -78,13 +152,51 @@ class AssignmentSet(object):
     def values(self):
         return [v for _, v in self.items()]
 
+    def assign(self, lit):
+        """ Mark the literal `lit` as True.
+
+        This is the fast path used by the solver: the variable is expected to
+        be unassigned.
+        """
+        abskey = abs(lit)
+        code = 2 * abskey
+        if code >= len(self._data):
+            self._grow(abskey)
+        data = self._data
+        if data[code] == UNKNOWN:
+            self.new_keys.add(abskey)
+            self._num_seen += 1
+        if self._track_changes:
+            self._update_diff(abskey, lit > 0)
+        if self.assigned_log is not None:
+            self.assigned_log.append(abskey)
+        if lit > 0:
+            data[code] = TRUE
+            data[code + 1] = FALSE
+        else:
+            data[code] = FALSE
+            data[code + 1] = TRUE
+        self._assigned_ids.add(abskey)
+
+    def unassign(self, variable):
+        """ Reset the variable `variable` to the unassigned state.
+
+        This is the fast path used by the solver when backtracking: the
+        variable is expected to be assigned.
+        """
+        code = 2 * variable
+        if code >= len(self._data) or self._data[code] == UNKNOWN:
+            self[variable] = None
+            return
+        if self._track_changes:
+            self._update_diff(variable, None)
+        self._data[code] = self._data[code + 1] = UNASSIGNED
+        self._assigned_ids.discard(variable)
+
     def _update_diff(self, key, value):
-        # This must be called before _data is updated
-        if key < 0 and value is not None:
-            key = -key
-            value = not value
-        prev = self._data.get(key)
-        self._orig.setdefault(key, prev)
+        # This must be called before _data is updated. `key` is always a
+        # variable, i.e. a positive literal.
+        self._orig.setdefault(key, _STATE_TO_VALUE[self._data[2 * key]])
         # If a value changes, dump the cached changelog
         self._cached_changelog = None
 
@@ -93,7 +205,7 @@ class AssignmentSet(object):
             self._cached_changelog = {
                 key: (old, new)
                 for key, old in six.iteritems(self._orig)
-                for new in [self._data.get(key)]
+                for new in [self.get(key)]
                 if new != old
             }
         return self._cached_changelog
@@ -106,10 +218,10 @@ class AssignmentSet(object):
         return old
 
     def copy(self):
-        new = AssignmentSet()
-        new._data = self._data.copy()
+        new = AssignmentSet(track_changes=self._track_changes)
+        new._data = array('b', self._data)
         new._orig = self._orig.copy()
-        new._seen = self._seen.copy()
+        new._num_seen = self._num_seen
         new._assigned_ids = self._assigned_ids.copy()
         new.new_keys = self.new_keys.copy()
         return new
@@ -119,7 +231,22 @@ class AssignmentSet(object):
 
     def value(self, lit):
         """ Return the value of literal. """
-        return self._data.get(lit)
+        try:
+            # lit_code, inlined: this is called for every literal visited by
+            # propagate.
+            return _STATE_TO_VALUE[
+                self._data[2 * lit if lit > 0 else 1 - 2 * lit]]
+        except IndexError:
+            return None
+
+    @property
+    def literal_states(self):
+        """ The dense array of literal states, indexed by :func:`lit_code`.
+
+        Hot loops may read it directly instead of calling :meth:`value`. It
+        must not be modified.
+        """
+        return self._data
 
     @property
     def num_assigned(self):
@@ -131,4 +258,7 @@ class AssignmentSet(object):
 
     @property
     def unassigned_ids(self):
-        return self._seen.difference(self._assigned_ids)
+        data = self._data
+        return set(
+            k for k in range(1, len(data) // 2)
+            if data[2 * k] == UNASSIGNED)
@@ -0,0 +1,111 @@
+"""
+Limits on the resources a search may use.
+
+"""
+from __future__ import absolute_import
+
+import threading
+from timeit import default_timer
+
+from simplesat.errors import SearchLimitReached
+
+
+class CancellationToken(object):
+
+    """ A flag which stops a running search when it is set.
+
+    The token may be cancelled from any thread, e.g. by a request handler
+    giving up on a resolution, while the solver checks it from its own.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        """ Ask the searches using this token to stop.
+        """
+        self._event.set()
+
+    @property
+    def is_cancelled(self):
+        return self._event.is_set()
+
+
+class SearchBudget(object):
+
+    """ The resources a single search may use.
+
+    Parameters
+    ----------
+    time_limit : float, optional
+        The maximum number of seconds a search may run.
+    max_conflicts : int, optional
+        The maximum number of conflicts a search may run into.
+    max_propagations : int, optional
+        The maximum number of literals a search may propagate.
+    cancellation_token : CancellationToken, optional
+        If given, the search stops as soon as the token is cancelled.
+    """
+
+    def __init__(self, time_limit=None, max_conflicts=None,
+                 max_propagations=None, cancellation_token=None):
+        self.time_limit = time_limit
+        self.max_conflicts = max_conflicts
+        self.max_propagations = max_propagations
+        self.cancellation_token = cancellation_token
+
+        self._start_time = None
+        self._start_counts = None
+        self._conflict_limit = None
+        self._propagation_limit = None
+
+    def start(self, solver):
+        """ Start counting the resources used by `solver` from now on.
+        """
+        self._start_time = default_timer()
+        self._start_counts = _counts(solver)
+        if self.max_conflicts is not None:
+            self._conflict_limit = solver.stats.conflicts + self.max_conflicts
+        if self.max_propagations is not None:
+            self._propagation_limit = (
+                solver.stats.propagations + self.max_propagations)
+
+    def stats(self, solver):
+        """ Return the resources used by `solver` since :meth:`start`.
+        """
+        start_counts = self._start_counts
+        stats = dict(
+            (name, count - start_counts[name])
+            for name, count in _counts(solver).items())
+        stats['elapsed'] = default_timer() - self._start_time
+        return stats
+
+    def check(self, solver):
+        """ Raise SearchLimitReached if `solver` used up a resource.
+        """
+        stats = solver.stats
+        token = self.cancellation_token
+        if token is not None and token.is_cancelled:
+            limit = 'cancelled'
+        elif (self._conflict_limit is not None and
+                stats.conflicts >= self._conflict_limit):
+            limit = 'conflicts'
+        elif (self._propagation_limit is not None and
+                stats.propagations >= self._propagation_limit):
+            limit = 'propagations'
+        elif (self.time_limit is not None and
+                default_timer() - self._start_time >= self.time_limit):
+            limit = 'time'
+        else:
+            return
+        raise SearchLimitReached(limit, self.stats(solver))
+
+
+def _counts(solver):
+    stats = solver.stats
+    return {
+        'conflicts': stats.conflicts,
+        'propagations': stats.propagations,
+        'decisions': stats.decisions,
+        'restarts': stats.restarts,
+    }
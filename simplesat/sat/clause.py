@@ -4,11 +4,62 @@ from collections import OrderedDict
 
 
 class Constraint(object):
-    pass
+
+    # Problems may have hundreds of thousands of constraints: none of them
+    # gets an instance dictionary.
+    __slots__ = ()
+
+
+class AtMostOne(Constraint):
+
+    __slots__ = ('learned', 'rule', 'variables', '_pair_clauses')
+
+    def __init__(self, variables, rule=None):
+        """
+        Create a constraint stating that at most one of `variables` is True.
+
+        The constraint is propagated natively by the solver. When it forces
+        an assignment or is violated, the pair of variables involved is
+        materialized as a binary clause (-a | -b), so that conflict analysis
+        and UNSAT explanations only ever deal with clauses.
+
+        Parameters
+        ----------
+        variables : list of int
+            The (positive) variables of the constraint.
+        rule : PackageRule
+            A package rule associated with the constraint. The clause of each
+            pair gets the rule returned by ``rule.restricted``.
+        """
+        self.learned = False
+        self.rule = rule
+        self.variables = list(OrderedDict.fromkeys(variables).keys())
+        self._pair_clauses = {}
+
+    def pair_clause(self, a, b):
+        """ Return the clause (-a | -b) for the variables `a` and `b`.
+        """
+        key = (a, b) if a < b else (b, a)
+        clause = self._pair_clauses.get(key)
+        if clause is None:
+            lits = [-key[1], -key[0]]
+            rule = self.rule
+            if rule is not None:
+                rule = rule.restricted(lits)
+            clause = self._pair_clauses[key] = Clause(lits, rule=rule)
+        return clause
+
+    def __len__(self):
+        return len(self.variables)
+
+    def __repr__(self):
+        return "AtMostOne({})".format(self.variables)
 
 
 class Clause(Constraint):
 
+    __slots__ = ('learned', 'rule', 'lbd', 'activity', 'lits')
+
     def __init__(self, lits, learned=False, rule=None):
         """
         Create a new Clause.
@@ -25,8 +76,16 @@ class Clause(Constraint):
         """
         self.learned = learned
         self.rule = rule
-        # This maintains the ordering while removing duplicate values
-        self.lits = list(OrderedDict.fromkeys(lits).keys())
+        # The literal block distance, i.e. the number of distinct decision
+        # levels among the literals, computed when a clause is learned.
+        self.lbd = None
+        # How often a learned clause took part in recent conflicts.
+        self.activity = 0.0
+        lits = list(lits)
+        if len(set(lits)) < len(lits):
+            # This maintains the ordering while removing duplicate values
+            lits = list(OrderedDict.fromkeys(lits).keys())
+        self.lits = lits
 
     def rewatch(self, assignments, lit):
         """Find a new literal to watch.
@@ -54,7 +113,8 @@ class Clause(Constraint):
         if lits[0] == -lit:
             lits[0], lits[1] = lits[1], -lit
 
-        if assignments.value(lits[0]) is True:
+        value = assignments.value
+        if value(lits[0]) is True:
             # This clause has been satisfied, add it back to the watch list. No
             # unit information can be deduced.
             return None
@@ -62,7 +122,7 @@ class Clause(Constraint):
         # Look for another literal to watch, and switch it with lit[1] to keep
         # the assumption on the watched literals in place.
         for n, other in enumerate(lits[2:]):
-            if assignments.value(other) is not False:
+            if value(other) is not False:
                 # Found a new literal that could serve as a watch.
                 lits[1], lits[n + 2] = other, -lit
                 return None
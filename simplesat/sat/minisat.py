@@ -6,23 +6,46 @@ from __future__ import absolute_import
 
 from collections import defaultdict, deque, OrderedDict
 import itertools
+import logging
+from timeit import default_timer
 
+import six
 from six.moves import range
 
-from simplesat.errors import SatisfiabilityError
+from simplesat.errors import (
+    SatisfiabilityError, SearchLimitReached, UnsatisfiableAssumptions)
 from .assignment_set import AssignmentSet
-from .clause import Clause
+from .budget import SearchBudget
+from .clause import AtMostOne, Clause
 from .policy import DefaultPolicy
+from .restarts import RESTART_STRATEGIES
+from .stats import SolverStats
+from .watch_lists import WatchLists
 from simplesat.utils import timed_context
 from simplesat.utils.graph import breadth_first_search
 
 
+logger = logging.getLogger(__name__)
+
+
 class UNSAT(object):
 
-    """An unsatisfiable set of boolean clauses."""
+    """An unsatisfiable set of boolean clauses.
+
+    The explanation of the conflict is only computed when it is first
+    needed, by :meth:`to_string`, :attr:`rules` or :attr:`requirements`, so
+    that callers which only check satisfiability pay nothing for it. The
+    search for conflict paths may be bounded by `max_search_nodes` or
+    `search_time_limit`. A bounded search explains the conflict with the
+    paths found so far.
+
+    The clauses of the explanation and their trails are copied when the
+    conflict is found, so that the solver may be used again.
+    """
 
     def __init__(self, conflict_clause, learned_clause, trails,
-                 assigning_clauses):
+                 assigning_clauses, max_search_nodes=None,
+                 search_time_limit=None):
         """
         Create a new UNSAT object.
 
@@ -38,12 +61,34 @@ class UNSAT(object):
         trails : dict
             A mapping from clauses to the trail of clauses that generated them.
             Only learned clauses should have trails of non-zero length
+        assigning_clauses : list
+            The clause which forced the assignment of each variable, indexed
+            by variable.
+        max_search_nodes : int, optional
+            The maximum number of clauses visited when looking for conflict
+            paths.
+        search_time_limit : float, optional
+            The maximum number of seconds spent looking for conflict paths.
         """
-
-        self._conflict_clause = conflict_clause
-        self._learned_clause = learned_clause
-        self._clause_trails = trails
-        self._assigning_clauses = assigning_clauses
+        self.max_search_nodes = max_search_nodes
+        self.search_time_limit = search_time_limit
+
+        # We'll look at the chain of clauses that led us to assign the
+        # original value and then the chain of clauses that led us to want
+        # to assign the opposite value
+        assert len(learned_clause.lits) == 1
+        self._implicand = -learned_clause[0]
+        implicand_clause = assigning_clauses[abs(self._implicand)]
+        assert implicand_clause is not None
+
+        # The solver may go on after the conflict, which reorders the
+        # literals of its clauses and changes its trails: the explanation
+        # works on a copy of what it needs.
+        copies, self._clause_trails = _copy_trails(
+            (conflict_clause, learned_clause, implicand_clause), trails)
+        self._conflict_clause = copies[conflict_clause]
+        self._learned_clause = copies[learned_clause]
+        self._implicand_clause = copies[implicand_clause]
 
         # A flattened version of `self._clause_trails`
         self._flat_clause_trails = {}
@@ -52,28 +97,31 @@ class UNSAT(object):
         self._clause_requirements = {}
 
         # The a list of lists representing "problems". These are the clauses
-        # that we'll use to construct our paths, one per problem.
-        self._conflict_details = []
-        self._conflict_paths = []
-
-        self._find_requirement_time = None
-        with timed_context("Find Requirements") as self._find_requirement_time:
-            # We'll look at the chain of clauses that led us to assign the
-            # original value and then the chain of clauses that led us to want
-            # to assign the opposite value
-            assert len(learned_clause.lits) == 1
-            self._implicand = -learned_clause[0]
-            self._implicand_clause = assigning_clauses[abs(self._implicand)]
-            assert self._implicand_clause is not None
+        # that we'll use to construct our paths, one per problem. Both are
+        # computed on first use.
+        self._conflict_details = None
+        self._conflict_paths_cache = None
+
+        self._find_requirement_time = timed_context("Find Requirements")
 
+    @property
+    def _conflict_paths(self):
+        if self._conflict_paths_cache is None:
+            self._conflict_paths_cache = self._explain()
+        return self._conflict_paths_cache
+
+    def _explain(self):
+        with self._find_requirement_time:
             # The clauses that led us to our first assignment
             implicand_req_clauses = self.clause_requirements(
                 self._implicand_clause)
             # The clauses we used to learn that the first assignment is invalid
-            learned_req_clauses = self.clause_requirements(learned_clause)
+            learned_req_clauses = self.clause_requirements(
+                self._learned_clause)
             # The clause we were on when we discovered the conflict.
-            conflicting_req_clauses = self.clause_requirements(conflict_clause)
-            self._conflict_details.extend(
+            conflicting_req_clauses = self.clause_requirements(
+                self._conflict_clause)
+            self._conflict_details = (
                 implicand_req_clauses +
                 learned_req_clauses +
                 conflicting_req_clauses)
@@ -83,8 +131,7 @@ class UNSAT(object):
         # conflict(s).
         clauses = self._conflict_details
         end_clauses = self._end_clauses(clauses, implicand=self._implicand)
-        paths = self._find_conflict_paths(end_clauses, clauses)
-        self._conflict_paths.extend(paths)
+        return self._find_conflict_paths(end_clauses, clauses)
 
     def _key(self, clause):
         return tuple(sorted(l for l in clause.lits))  # noqa
@@ -105,9 +152,19 @@ class UNSAT(object):
                 lit_to_clauses[abs(lit)].add(c)
         lit_to_clauses = dict(lit_to_clauses)
 
+        max_nodes = self.max_search_nodes
+        deadline = None
+        if self.search_time_limit is not None:
+            deadline = default_timer() + self.search_time_limit
+        num_visited = [0]
+
         def get_neighbors(clause):
             """ Return the set of clauses which have at least one variable in
             common with this one. """
+            num_visited[0] += 1
+            if ((max_nodes is not None and num_visited[0] > max_nodes) or
+                    (deadline is not None and default_timer() > deadline)):
+                raise _PathSearchInterrupted()
             clause_sets = (lit_to_clauses[abs(lit)] for lit in clause)
             return sorted(set.union(*clause_sets), key=lambda c: c.lits)
 
@@ -128,9 +185,17 @@ class UNSAT(object):
                 yield seq[i:]
 
         # Find a shortest path between each pair of end points if there is one
-        raw_paths = list(itertools.chain.from_iterable(
-            breadth_first_search(start, get_neighbors, rest)
-            for start, rest in zip(ends, tails(ends))))
+        raw_paths = []
+        try:
+            for start, rest in zip(ends, tails(ends)):
+                for path in breadth_first_search(start, get_neighbors, rest):
+                    raw_paths.append(path)
+        except _PathSearchInterrupted:
+            logger.info(
+                "Conflict path search interrupted after %d clauses, with %d "
+                "paths found", num_visited[0], len(raw_paths))
+            if not raw_paths:
+                return (end_clauses,)
 
         # This is somewhat arbitrary, but for now we'll say that the best path
         # is the one with the most jobs in it.
@@ -262,9 +327,120 @@ class UNSAT(object):
         return '\n'.join(reason) + '\n'
 
 
+def _copy_trails(clauses, trails):
+    """ Return copies of `clauses` and of the clauses in their trails,
+    recursively, and the trails of the copies.
+
+    Returns
+    -------
+    copies : dict
+        The copy of each clause.
+    copied_trails : dict
+        The trail of each copied learned clause, made of copies.
+    """
+    copies = {}
+    stack = list(clauses)
+    while stack:
+        clause = stack.pop()
+        if clause in copies:
+            continue
+        copy = Clause(clause.lits, learned=clause.learned, rule=clause.rule)
+        copy.lbd = clause.lbd
+        copies[clause] = copy
+        if clause.learned:
+            stack.extend(trails.get(clause, ()))
+    copied_trails = dict(
+        (copies[clause], [copies[c] for c in trails[clause]])
+        for clause in copies
+        if clause.learned and clause in trails)
+    return copies, copied_trails
+
+
+class _PathSearchInterrupted(Exception):
+    """ Raised when the search for conflict paths runs out of budget.
+    """
+
+
+def _is_tautology(lits):
+    """ Return True if `lits` contains a literal and its negation.
+    """
+    lits_set = set(lits)
+    return any(-lit in lits_set for lit in lits)
+
+
 class MiniSATSolver(object):
+
+    """ A CDCL SAT solver following the Minisat approach.
+
+    Parameters
+    ----------
+    policy : IPolicy, optional
+        The policy used to pick the next variable to assign.
+    restart_strategy : IRestartStrategy or str, optional
+        If given, the search periodically cancels every decision, keeping the
+        learned clauses. Strings are looked up in
+        :data:`~simplesat.sat.restarts.RESTART_STRATEGIES` (``'luby'``,
+        ``'geometric'`` or ``'glucose'``). By default, the solver never
+        restarts.
+    max_learned_clauses : int, optional
+        If given, the budget of learned clauses. Once it is reached, about
+        half of the learned clauses are removed, worst literal block distance
+        (LBD) and lowest activity first. By default, every learned clause is
+        kept.
+    phase_saving : bool, optional
+        If True, remember the value of each variable when it is unassigned
+        by backtracking, and reuse it the next time the variable is decided.
+    initial_phases : dict, optional
+        A mapping from variable to the value it should be given when first
+        decided, e.g. True for the currently installed packages. Variables
+        without a phase are decided True.
+    minimize_learned : bool, optional
+        If True, remove from each learned clause the literals implied by the
+        other ones (recursive minimization, as in MiniSat 2). The reasons
+        used to do so are added to the trail of the learned clause.
+    simplify : bool, optional
+        If True, simplify clauses against the facts of the root level: the
+        satisfied clauses are dropped, and the False literals of the other
+        ones are removed. This is done when a clause is added, and again for
+        the whole clause database whenever new root facts are found. A
+        shortened clause is derived from the original one, which stays in its
+        trail for explanations.
+    explanation_max_nodes : int, optional
+        If given, the maximum number of clauses visited when looking for
+        the conflict paths which explain an unsatisfiable problem.
+    explanation_time_limit : float, optional
+        If given, the maximum number of seconds spent looking for these
+        conflict paths.
+    time_limit : float, optional
+        If given, the maximum number of seconds each call to :meth:`search`
+        or :meth:`solve` may run.
+    max_conflicts : int, optional
+        If given, the maximum number of conflicts each call to
+        :meth:`search` or :meth:`solve` may run into.
+    max_propagations : int, optional
+        If given, the maximum number of literals each call to :meth:`search`
+        or :meth:`solve` may propagate.
+    cancellation_token : CancellationToken, optional
+        If given, the search stops as soon as the token is cancelled, from
+        any thread.
+
+    A search which reaches one of these limits raises
+    :class:`~simplesat.errors.SearchLimitReached`. The learned clauses are
+    kept, so that a later call may resume the work.
+
+    Attributes
+    ----------
+    stats : SolverStats
+        The statistics of every search done by this solver so far.
+    """
+
+    # Activities of learned clauses decay by this factor after each conflict.
+    _CLAUSE_DECAY = 0.999
+    # Clause activities are rescaled when they grow above this limit.
+    _CLAUSE_RESCALE_LIMIT = 1e20
+
     @classmethod
-    def from_rules(cls, rules, policy=None):
+    def from_rules(cls, rules, policy=None, preprocessor=None, **kwargs):
         """
         Construct a SAT solver from a rules generator.
 
@@ -273,51 +449,144 @@ class MiniSATSolver(object):
         rules: RulesGenerator
         policy: IPolicy
             The policy to use for this SAT solver.
+        preprocessor: Preprocessor
+            If given, the clauses of the rules are simplified by this
+            preprocessor before being added. The variables of at-most-one
+            constraints are frozen.
+        **kwargs
+            Other options passed to the solver constructor.
 
         Returns
         -------
         solver: MiniSATSolver.
 
         """
-        solver = cls(policy)
+        solver = cls(policy, **kwargs)
+        clauses = []
         for rule in rules:
-            solver.add_clause(rule.literals, rule=rule)
+            if rule.is_at_most_one:
+                solver.add_at_most_one(
+                    [-lit for lit in rule.literals], rule=rule)
+            elif preprocessor is None:
+                solver.add_clause(rule.literals, rule=rule)
+            else:
+                clauses.append(Clause(rule.literals, rule=rule))
+
+        if preprocessor is not None:
+            frozen = preprocessor.frozen
+            frozen.update(
+                variable for constraint in solver.at_most_one_constraints
+                for variable in constraint.variables)
+            # Frozen variables are decided by the policy, even if they no
+            # longer appear in any clause.
+            frozen_variables = set(
+                abs(lit) for clause in clauses for lit in clause.lits
+                if abs(lit) in frozen)
+            clauses = preprocessor.preprocess(clauses)
+            solver.clause_trails.update(preprocessor.clause_trails)
+            for clause in clauses:
+                solver.add_clause(clause)
+            solver._register_variables(frozen_variables)
         solver._setup_assignments()
         return solver
 
-    def __init__(self, policy=None):
+    def __init__(self, policy=None, restart_strategy=None,
+                 max_learned_clauses=None, phase_saving=False,
+                 initial_phases=None, minimize_learned=False,
+                 simplify=False, time_limit=None, max_conflicts=None,
+                 max_propagations=None, cancellation_token=None,
+                 explanation_max_nodes=None, explanation_time_limit=None):
 
         self.clauses = []
-        self.watches = defaultdict(list)
-
-        self.assignments = AssignmentSet()
+        # Clauses of three literals or more, watched on their first two
+        # literals. Each entry is a (blocker, clause) pair: when the blocker
+        # literal is True, the clause is satisfied and need not be visited.
+        self.watches = WatchLists()
+        # Binary clauses, as implication lists: an entry (other, clause) in
+        # binary_watches[lit] means that `other` must be True when `lit` is.
+        self.binary_watches = WatchLists()
+        # At-most-one constraints, and the ones containing each variable.
+        self.at_most_one_constraints = []
+        self.at_most_one_watches = WatchLists()
+
+        # Only the policies which read the changelog, i.e. the ones which log
+        # their decisions, pay for it.
+        self.assignments = AssignmentSet(
+            track_changes=getattr(policy, 'uses_changelog', False))
 
         # The trail of clauses used to learn each new clause
         self.clause_trails = {}
 
-        # A list of literals which become successively true (because of direct
-        # assignment, or by unit propagation).
-        self.levels = defaultdict(int)
+        # The learned clauses currently in the clause database.
+        self.learned_clauses = []
+        self._clause_inc = 1.0
+
+        # The decision level of each variable, indexed by variable. It is
+        # -1 for a variable unassigned by backtracking.
+        self.levels = [0]
 
         self.prop_queue = deque()
 
         # A list of all the decisions that we've made so far.
         self.trail = []
 
-        # Keeps track of the independent assumptions so far. Each entry in
-        # trail_lim is an index pointing to an assumption in trail. TODO:
-        # Structure self.trail so that it keeps track of decisions per level.
+        # The segmentation of the trail by decision level: trail_lim[i] is
+        # the index in trail of the decision of level i + 1, and the literals
+        # of level 0 come before trail_lim[0].
         self.trail_lim = []
 
-        # For each variable assignment, a reference to the clause that forced
-        # this assignment.
-        self.assigning_clauses = {}
+        # For each variable, indexed by variable, a reference to the clause
+        # that forced its last assignment. Decisions have an empty clause.
+        self.reasons = [None]
+
+        # Variables seen by the current conflict analysis are marked with its
+        # stamp in _seen, and so are their decision levels in _level_stamps,
+        # so that no set is built for each conflict.
+        self._seen = [0]
+        self._level_stamps = [0]
+        self._stamp = 0
+        self._seen_variables = []
 
         # Whether the system is satisfiable.
         self.status = None
+        # The error raised by solve() if the problem is unsatisfiable.
+        self._root_conflict = None
 
         self._policy = policy or DefaultPolicy()
 
+        if isinstance(restart_strategy, six.string_types):
+            restart_strategy = RESTART_STRATEGIES[restart_strategy]()
+        self._restart_strategy = restart_strategy
+
+        self.stats = SolverStats()
+
+        self._budget = None
+        if (time_limit is not None or max_conflicts is not None or
+                max_propagations is not None or
+                cancellation_token is not None):
+            self._budget = SearchBudget(
+                time_limit, max_conflicts, max_propagations,
+                cancellation_token)
+
+        # The bounds of the conflict path search of each UNSAT.
+        self._explanation_limits = {
+            'max_search_nodes': explanation_max_nodes,
+            'search_time_limit': explanation_time_limit,
+        }
+
+        self._max_learned_clauses = max_learned_clauses
+        self._next_reduction = max_learned_clauses
+
+        # The value given to each variable when it is decided.
+        self.phases = dict(initial_phases or {})
+        self._phase_saving = phase_saving
+
+        self._minimize_learned = minimize_learned
+
+        self._simplify = simplify
+        # The size of the trail when the clauses were last simplified.
+        self._simplified_trail_size = 0
+
     def add_clause(self, clause, rule=None):
         """ Add a new clause to the solver.
 
@@ -329,12 +598,23 @@ class MiniSATSolver(object):
             An optional rule to associate with this clause. This is typically
             the rule from which the clause was derived.
         """
-        # TODO: Do some simplifications, and check whether clause contains p
-        # and -p at the same time.
-
         if not isinstance(clause, Clause):
             clause = Clause(clause, learned=False, rule=rule)
 
+        if _is_tautology(clause.lits):
+            # Always satisfied, nothing to add.
+            return
+
+        # Variables first seen after the assignments were set up must be
+        # decided too.
+        self._register_variables(abs(lit) for lit in clause.lits)
+
+        if (self._simplify and not clause.learned and
+                self.decision_level == 0):
+            clause = self._simplify_clause(clause)
+            if clause is None:
+                return
+
         if len(clause) == 0:
             # Clause is guaranteed to be false under the current variable
             # assignments.
@@ -345,54 +625,263 @@ class MiniSATSolver(object):
             # Unit facts are enqueued.
             if not self.enqueue(clause[0], cause=clause):
                 # Bail out if we've found a conflict
-                conflict = UNSAT(
-                    clause, clause,
-                    self.clause_trails,
-                    self.assigning_clauses)
-                raise SatisfiabilityError(conflict)
+                raise SatisfiabilityError(self._unsat(clause, clause))
         else:
-            p, q = clause[:2]
-            self.watches[-p].append(clause)
-            self.watches[-q].append(clause)
+            if self.trail and not self.prop_queue:
+                # Some facts have already been propagated.
+                self._prepare_late_clause(clause)
+            self._watch(clause)
 
         self.clauses.append(clause)
 
+    def _unsat(self, conflict_clause, learned_clause):
+        """ Return the UNSAT explaining a conflict at the root level.
+        """
+        return UNSAT(
+            conflict_clause, learned_clause, self.clause_trails,
+            self.reasons, **self._explanation_limits)
+
+    def _watch(self, clause):
+        # Any literal of the clause may be watched later on.
+        self._reserve_variable(max(abs(lit) for lit in clause.lits))
+        p, q = clause[:2]
+        if len(clause) == 2:
+            self.binary_watches[-p].append((q, clause))
+            self.binary_watches[-q].append((p, clause))
+        else:
+            self.watches[-p].append((q, clause))
+            self.watches[-q].append((p, clause))
+
+    def _simplify_clause(self, clause):
+        """ Return `clause` without its literals False at the root level, or
+        None if it is satisfied at the root level.
+
+        The shortened clause is a new learned clause, whose trail is the
+        original clause followed by the reasons of the removed literals. A
+        clause whose literals are all False is returned unchanged, so that
+        propagation reports the conflict.
+        """
+        value = self.assignments.value
+        false_lits = []
+        for lit in clause.lits:
+            status = value(lit)
+            if status is True:
+                return None
+            elif status is False:
+                false_lits.append(lit)
+        if not false_lits or len(false_lits) == len(clause):
+            return clause
+
+        simplified = Clause(
+            [lit for lit in clause.lits if value(lit) is None], learned=True)
+        simplified.lbd = clause.lbd
+        simplified.activity = clause.activity
+        self.clause_trails[simplified] = [clause] + [
+            self.reasons[abs(lit)] for lit in false_lits]
+        return simplified
+
+    def simplify(self):
+        """ Simplify the clause database against the facts of the root level.
+
+        Satisfied clauses are removed, and the False literals of the other
+        ones are stripped. This must be called at the root level, once every
+        fact has been propagated.
+        """
+        self._rewrite_clauses(self._simplify_clause)
+        self._simplified_trail_size = len(self.trail)
+
+    def _rewrite_clauses(self, rewrite):
+        """ Replace each clause of the database by ``rewrite(clause)``, and
+        rebuild the watch lists. This must be called at the root level.
+
+        `rewrite` returns the clause itself, a clause derived from it (whose
+        trail must be known), or None to remove it.
+        """
+        learned = set(self.learned_clauses)
+        clauses = []
+        learned_clauses = []
+        for clause in self.clauses:
+            rewritten = rewrite(clause)
+            if rewritten is None:
+                continue
+            clauses.append(rewritten)
+            if clause in learned:
+                learned_clauses.append(rewritten)
+
+        # A new list, so that the policy sees that clauses were removed.
+        self.clauses = clauses
+        self.learned_clauses = learned_clauses
+        self.watches = WatchLists()
+        self.binary_watches = WatchLists()
+        value = self.assignments.value
+        for clause in clauses:
+            if len(clause) >= 2:
+                # Watch non-False literals, where possible.
+                clause.lits.sort(key=lambda lit: value(lit) is False)
+                self._watch(clause)
+        self._collect_clause_trails()
+
+    def _prepare_late_clause(self, clause):
+        """ Watch non-False literals of a clause added after propagation,
+        and make sure that propagate visits it if it is unit or conflicting.
+        """
+        value = self.assignments.value
+        lits = clause.lits
+        lits.sort(key=lambda lit: value(lit) is False)
+        if value(lits[1]) is False:
+            self.prop_queue.append(-lits[1])
+
+    def add_at_most_one(self, variables, rule=None):
+        """ Add a constraint stating that at most one of `variables` is True.
+
+        Parameters
+        ----------
+        variables : list of int
+            The (positive) variables of the constraint.
+        rule : PackageRule
+            An optional rule to associate with the constraint.
+        """
+        constraint = AtMostOne(variables, rule=rule)
+        self._register_variables(constraint.variables)
+        self.at_most_one_constraints.append(constraint)
+        for variable in constraint.variables:
+            self.at_most_one_watches[variable].append(constraint)
+
+        if self.trail and not self.prop_queue:
+            # Some facts have already been propagated: propagate the True
+            # variables again, now that they have new consequences.
+            value = self.assignments.value
+            self.prop_queue.extend(
+                variable for variable in constraint.variables
+                if value(variable) is True)
+
     def _setup_assignments(self):
         """Initialize assignments table.
         """
         variables = {abs(lit) for clause in self.clauses for lit in clause}
+        variables.update(
+            variable for constraint in self.at_most_one_constraints
+            for variable in constraint.variables)
+        self._register_variables(variables)
+
+    def _register_variables(self, variables):
+        """ Add the unknown variables among `variables` to the assignments,
+        unassigned, and make room for them.
+        """
         assignments = self.assignments
+        largest = 0
         for variable in variables:
             if variable not in assignments:
                 assignments[variable] = None
+            if variable > largest:
+                largest = variable
+        if largest > 0:
+            self._reserve_variable(largest)
+
+    def _reserve_variable(self, variable):
+        """ Make room for `variable` in the watch lists, and in the arrays
+        indexed by variable.
+        """
+        self.watches.reserve(variable)
+        self.binary_watches.reserve(variable)
+        self.at_most_one_watches.reserve(variable)
+        missing = variable + 1 - len(self.reasons)
+        if missing > 0:
+            self.levels.extend([0] * missing)
+            self.reasons.extend([None] * missing)
+            self._seen.extend([0] * missing)
 
-    def propagate(self):
-        while len(self.prop_queue) > 0:
-            lit = self.prop_queue.popleft()
-            clauses = self.watches[lit]
-            self.watches[lit] = []
+    @property
+    def assigning_clauses(self):
+        """ The clause that forced the last assignment of each variable,
+        indexed by variable.
+        """
+        return self.reasons
 
-            while len(clauses) > 0:
-                clause = clauses.pop()
-                unit = clause.rewatch(self.assignments, lit)
+    def propagate(self):
+        assignments = self.assignments
+        value = assignments.value
+        # The watch lists are indexed by literal code. lit_code is inlined in
+        # the loop below.
+        watch_lists = self.watches.lists
+        binary_lists = self.binary_watches.lists
+        at_most_one_lists = self.at_most_one_watches.lists
+        num_codes = min(
+            len(watch_lists), len(binary_lists), len(at_most_one_lists))
+        prop_queue = self.prop_queue
+        stats = self.stats
+        while len(prop_queue) > 0:
+            lit = prop_queue.popleft()
+            stats.propagations += 1
+            code = 2 * lit if lit > 0 else 1 - 2 * lit
+            if code >= num_codes:
+                # A variable which was never watched.
+                self._reserve_variable(abs(lit))
+                num_codes = code + 1
+
+            # The watchers are visited from the last one. The ones still
+            # watching -lit are compacted at the back of the list.
+            watchers = watch_lists[code]
+            i = j = len(watchers)
+            while i > 0:
+                i -= 1
+                watcher = watchers[i]
+                blocker, clause = watcher
+                if value(blocker) is True:
+                    # The clause is satisfied, keep watching it.
+                    j -= 1
+                    watchers[j] = watcher
+                    continue
+
+                unit = clause.rewatch(assignments, lit)
 
                 # Re-insert in the appropriate watch list.
-                self.watches[-clause.lits[1]].append(clause)
+                lits = clause.lits
+                other = lits[1]
+                if other == -lit:
+                    j -= 1
+                    watchers[j] = (lits[0], clause)
+                else:
+                    watch_lists[
+                        -2 * other if other < 0 else 2 * other + 1
+                    ].append((lits[0], clause))
 
                 # Deal with unit clauses.
                 if unit is not None:
                     # TODO Refactor this to take into account the return value
                     # of enqueue().
-                    if self.assignments.value(unit) is False:
-                        # Conflict. Clear the queue and re-insert the remaining
-                        # unwatched clauses into the watch list.
-                        self.prop_queue.clear()
-                        for remaining in clauses:
-                            self.watches[lit].append(remaining)
+                    if value(unit) is False:
+                        # Conflict. Clear the queue and keep the remaining
+                        # unvisited clauses in the watch list.
+                        prop_queue.clear()
+                        del watchers[i:j]
                         return clause
                     else:
                         # Non-conflicting unit literal.
                         self.enqueue(unit, clause)
+            del watchers[:j]
+
+            # Binary clauses imply their other literal without being visited.
+            for other, clause in binary_lists[code]:
+                status = value(other)
+                if status is None:
+                    self.enqueue(other, clause)
+                elif status is False:
+                    prop_queue.clear()
+                    return clause
+
+            # Every other variable of an at-most-one constraint is False.
+            for constraint in at_most_one_lists[code]:
+                pair_clause = constraint.pair_clause
+                for other in constraint.variables:
+                    if other == lit:
+                        continue
+                    status = value(other)
+                    if status is None:
+                        self.enqueue(-other, pair_clause(lit, other))
+                    elif status is True:
+                        prop_queue.clear()
+                        return pair_clause(lit, other)
 
     def enqueue(self, lit, cause=None):
         """ Enqueue a new true literal. Return True if this assignment does not
@@ -406,27 +895,123 @@ class MiniSATSolver(object):
             An optional clause to associate with this assignment. This is
             typically the clause which forced the assignment via propagation.
         """
-        status = self.assignments.value(lit)
+        assignments = self.assignments
+        status = assignments.value(lit)
         if status is not None:
             return status
         else:
             # New fact, store it.
-            self.assignments[abs(lit)] = (lit > 0)
+            assignments.assign(lit)
 
+            variable = abs(lit)
+            if variable >= len(self.reasons):
+                self._reserve_variable(variable)
             self.prop_queue.append(lit)
             self.trail.append(lit)
-            self.levels[abs(lit)] = self.decision_level
-            self.assigning_clauses[abs(lit)] = cause
+            self.levels[variable] = len(self.trail_lim)
+            self.reasons[variable] = cause
             return True
 
     def search(self):
         """ Return next solution or Raise SatisfiabilityError if unsatisfiable.
+
+        Raises SearchLimitReached if the budget of the solver runs out first.
+        """
+        return self._search()
+
+    def solve(self, assumptions=()):
+        """ Return a solution in which every literal of `assumptions` is
+        True.
+
+        Unlike :meth:`search`, this may be called several times: the clauses,
+        including the learned ones, are kept from one call to the next, and
+        new clauses may be added in between with :meth:`add_clause`.
+
+        Parameters
+        ----------
+        assumptions : sequence of literals
+            Literals which must be True in the solution, for this call only.
+
+        Raises
+        ------
+        SatisfiabilityError
+            If the problem has no solution, whatever the assumptions.
+        UnsatisfiableAssumptions
+            If the problem has no solution under the assumptions. The `core`
+            of the exception is the subset of the assumptions responsible.
+        SearchLimitReached
+            If the budget of the solver runs out first.
         """
+        if self._root_conflict is not None:
+            raise self._root_conflict
+        assumptions = list(assumptions)
+        self.cancel_until(0)
+        try:
+            return self._search(assumptions)
+        except UnsatisfiableAssumptions as e:
+            core = set(e.core)
+            e.core = [lit for lit in assumptions if lit in core]
+            raise
+        except SatisfiabilityError as e:
+            self._root_conflict = e
+            raise
+        finally:
+            self.cancel_until(0)
+
+    def _search(self, assumptions=()):
+        stats = self.stats
+        start = default_timer()
+        try:
+            return self._search_loop(assumptions)
+        except SearchLimitReached:
+            # Back to the root level, so that the next search does not take
+            # the decisions made so far for facts.
+            self.cancel_until(0)
+            raise
+        finally:
+            stats.search_time += default_timer() - start
+            stats.update_peak_sizes(self)
+
+    def _search_loop(self, assumptions):
+        stats = self.stats
         root_level = self.decision_level
+        restart_strategy = self._restart_strategy
+        if restart_strategy is not None:
+            restart_strategy.reset()
+        should_restart = False
+        budget = self._budget
+        if budget is not None:
+            budget.start(self)
         while True:
             conflict_clause = self.propagate()
+            if budget is not None:
+                budget.check(self)
             if conflict_clause is None:
-                if self.number_assigned == self.number_variables:
+                if (self._simplify and self.decision_level == 0 and
+                        len(self.trail) > self._simplified_trail_size):
+                    # New facts at the root level.
+                    self.simplify()
+                if should_restart:
+                    # Start afresh from the root level, keeping everything we
+                    # have learned so far.
+                    should_restart = False
+                    self.cancel_until(root_level)
+                    stats.restarts += 1
+                    restart_strategy.on_restart()
+                    continue
+                if self.decision_level - root_level < len(assumptions):
+                    # Assumptions are the first decisions.
+                    p = assumptions[self.decision_level - root_level]
+                    status = self.assignments.value(p)
+                    if status is True:
+                        # Open an empty decision level, so that the i-th
+                        # assumption is always at level i + 1.
+                        self.trail_lim.append(len(self.trail))
+                    elif status is False:
+                        raise UnsatisfiableAssumptions(self._analyze_final(p))
+                    else:
+                        self.assume(p)
+                elif self.number_assigned == self.number_variables:
                     # Model found.
                     return self.assignments.copy()  # Do something better...
                 else:
@@ -435,20 +1020,29 @@ class MiniSATSolver(object):
                         self.assignments,
                         self.clauses,
                     )
+                    if not self.phases.get(p, True):
+                        p = -p
 
+                    stats.decisions += 1
                     self.assume(p)
             else:
                 # Conflict!
+                stats.conflicts += 1
                 learned_clause, bt_level = self.analyze(conflict_clause)
                 if root_level == self.decision_level:
-                    conflict = UNSAT(
-                        conflict_clause, learned_clause,
-                        self.clause_trails,
-                        self.assigning_clauses)
-                    raise SatisfiabilityError(conflict)
+                    raise SatisfiabilityError(
+                        self._unsat(conflict_clause, learned_clause))
 
-                self.cancel_until(max(bt_level, root_level))
+                bt_level = max(bt_level, root_level)
+                stats.backjump_distances[self.decision_level - bt_level] += 1
+                self.cancel_until(bt_level)
                 self.record(learned_clause)
+                if (self._next_reduction is not None and
+                        len(self.learned_clauses) >= self._next_reduction):
+                    self.reduce_learned()
+                if restart_strategy is not None:
+                    should_restart = restart_strategy.on_conflict(
+                        learned_clause.lbd)
 
     def validate(self, solution_map):
         """Check whether a given set of assignments solves this SAT problem.
@@ -468,51 +1062,186 @@ class MiniSATSolver(object):
         # A tally of the number of literals encountered so far in the current
         # decision level, and downstream from the UIP.
         counter = 0
-        # Variables that we've encountered during the search.
-        seen = set()
+        # Variables that we've encountered during the search are marked with
+        # this stamp in seen, and listed in seen_variables.
+        stamp = self._next_stamp()
+        seen = self._seen
+        seen_variables = self._seen_variables
+        del seen_variables[:]
+        levels = self.levels
+        reasons = self.reasons
+        trail = self.trail
+        decision_level = self.decision_level
 
         # Literals for the clause that we're learning.
         learned_lits = []
+        # Decision levels of the learned literals, except the UIP, are marked
+        # with the stamp in level_stamps.
+        level_stamps = self._reserve_levels(decision_level)
+        num_learned_levels = 0
         # Level to backtrack to.
         btlevel = 0
 
         clause_trail = [conflict]
 
         while True:
+            if conflict.learned:
+                self._bump_clause(conflict)
             reason = conflict.calculate_reason(p)
 
             # Trace reason for current p.
             for lit in reason:
                 var = abs(lit)
-                if var not in seen:
-                    seen.add(var)
-                    if self.levels[var] == self.decision_level:
+                if seen[var] != stamp:
+                    seen[var] = stamp
+                    seen_variables.append(var)
+                    level = levels[var]
+                    if level == decision_level:
                         # A new literal on the current decision level.
                         counter += 1
                     else:
                         # At this point, we don't treat level 0 as
                         # special. Maybe that's a mistake...
                         learned_lits.append(-lit)
-                        btlevel = max(btlevel, self.levels[var])
+                        if level_stamps[level] != stamp:
+                            level_stamps[level] = stamp
+                            num_learned_levels += 1
+                        if level > btlevel:
+                            btlevel = level
 
             # Select next literal to look at.
             while True:
-                p = self.trail[-1]
-                conflict = self.assigning_clauses[abs(p)]
+                p = trail[-1]
+                conflict = reasons[abs(p)]
                 clause_trail.append(conflict)
                 self.undo_one()
-                if abs(p) in seen:
+                if seen[abs(p)] == stamp:
                     break
 
             counter -= 1
             if counter == 0:
                 break
 
+        if self._minimize_learned:
+            learned_lits = self._minimize(learned_lits, clause_trail)
+            stamp = self._next_stamp()
+            num_learned_levels = 0
+            btlevel = 0
+            for lit in learned_lits:
+                level = levels[abs(lit)]
+                if level_stamps[level] != stamp:
+                    level_stamps[level] = stamp
+                    num_learned_levels += 1
+                if level > btlevel:
+                    btlevel = level
+
         learned_lits.append(-p)  # At this point p is the UIP.
+        self._policy.on_conflict(seen_variables)
+        self._clause_inc /= self._CLAUSE_DECAY
         learned = Clause(learned_lits, learned=True)
+        learned.lbd = num_learned_levels + 1
         self.clause_trails[learned] = clause_trail
         return learned, btlevel
 
+    def _next_stamp(self):
+        self._stamp += 1
+        return self._stamp
+
+    def _reserve_levels(self, level):
+        """ Make room for `level` in the level stamps, and return them.
+        """
+        level_stamps = self._level_stamps
+        missing = level + 1 - len(level_stamps)
+        if missing > 0:
+            level_stamps.extend([0] * missing)
+        return level_stamps
+
+    def _minimize(self, learned_lits, clause_trail):
+        """ Return the literals of `learned_lits` which are not implied by
+        the other ones, through the clauses which assigned them.
+
+        The decision levels of `learned_lits` must be marked with the current
+        stamp. The reasons used to remove literals are appended to
+        `clause_trail`.
+        """
+        in_clause = set(abs(lit) for lit in learned_lits)
+        # Variables known to be (or not to be) implied by the clause.
+        redundant = {}
+        kept = []
+        for lit in learned_lits:
+            if not self._is_redundant(
+                    abs(lit), in_clause, redundant, clause_trail):
+                kept.append(lit)
+        return kept
+
+    def _is_redundant(self, variable, in_clause, redundant, clause_trail):
+        levels = self.levels
+        reasons = self.reasons
+        level_stamps = self._level_stamps
+        stamp = self._stamp
+        stack = [variable]
+        # The visited variables, in order, and as a set for lookups.
+        visited = [variable]
+        visited_set = set(visited)
+        while stack:
+            reason = reasons[stack.pop()]
+            if not reason:
+                # A decision is not implied by anything.
+                return self._not_redundant(visited, redundant)
+            for lit in reason.lits:
+                var = abs(lit)
+                if (var in visited_set or var in in_clause or
+                        redundant.get(var)):
+                    continue
+                if redundant.get(var) is False:
+                    return self._not_redundant(visited, redundant)
+                level = levels[var]
+                if level < 0:
+                    # Unassigned: it cannot be implied by the clause.
+                    return self._not_redundant(visited, redundant)
+                if level != 0 and level_stamps[level] != stamp:
+                    # Only the decision of that level could imply it.
+                    return self._not_redundant(visited, redundant)
+                stack.append(var)
+                visited.append(var)
+                visited_set.add(var)
+
+        for var in visited:
+            redundant[var] = True
+            clause_trail.append(reasons[var])
+        return True
+
+    def _not_redundant(self, visited, redundant):
+        for var in visited:
+            redundant[var] = False
+        return False
+
+    def _analyze_final(self, p):
+        """ Return the assumptions which, together, make the assumption `p`
+        False. `p` itself is part of the result.
+        """
+        core = [p]
+        if self.decision_level == 0:
+            return core
+        stamp = self._next_stamp()
+        seen = self._seen
+        seen[abs(p)] = stamp
+        levels = self.levels
+        reasons = self.reasons
+        for lit in reversed(self.trail[self.trail_lim[0]:]):
+            var = abs(lit)
+            if seen[var] != stamp:
+                continue
+            reason = reasons[var]
+            if not reason:
+                # Every decision made so far is an assumption.
+                core.append(lit)
+            else:
+                for other in reason.lits:
+                    if levels[abs(other)] > 0:
+                        seen[abs(other)] = stamp
+        return core
+
     def record(self, learned_clause):  # Needs test.
         """Drive the backtracking by adding a learned clause, which is unit by
         assumption.
@@ -528,21 +1257,107 @@ class MiniSATSolver(object):
         def key(arg):
             n, level = arg
             return level
-        max_i = max(enumerate([self.levels.get(abs(lit), 0) for lit in lits]),
+        max_i = max(enumerate([self.levels[abs(lit)] for lit in lits]),
                     key=key)[0]
         if len(lits) >= 2:
             lits[1], lits[max_i] = lits[max_i], lits[1]
 
-        self.add_clause(learned_clause)
+        # Not through add_clause: the clause is already ordered for the
+        # watches, and its asserting literal is enqueued below.
+        if len(lits) >= 2:
+            self._watch(learned_clause)
+        self.clauses.append(learned_clause)
+        self.learned_clauses.append(learned_clause)
+        stats = self.stats
+        stats.learned_clause_lengths[len(lits)] += 1
+        stats.learned_clause_lbds[learned_clause.lbd] += 1
         self.enqueue(learned_clause.lits[0], learned_clause)
 
+    def _bump_clause(self, clause):
+        clause.activity += self._clause_inc
+        if clause.activity > self._CLAUSE_RESCALE_LIMIT:
+            factor = 1.0 / self._CLAUSE_RESCALE_LIMIT
+            for learned in self.learned_clauses:
+                learned.activity *= factor
+            self._clause_inc *= factor
+
+    def _is_locked(self, clause):
+        """ Return True if `clause` is the reason of a current assignment.
+        """
+        # The propagated literal of a clause is always its first one.
+        lit = clause.lits[0]
+        return (self.assignments.value(lit) is True and
+                self.reasons[abs(lit)] is clause)
+
+    def reduce_learned(self):
+        """ Remove about half of the learned clauses from the database.
+
+        Binary clauses, "glue" clauses (LBD <= 2) and clauses which are the
+        reason of a current assignment are always kept. Among the others, the
+        ones with the highest LBD, then the lowest activity, are removed.
+        """
+        self.stats.update_peak_sizes(self)
+        candidates = [
+            clause for clause in self.learned_clauses
+            if len(clause) > 2 and clause.lbd > 2
+            and not self._is_locked(clause)
+        ]
+        candidates.sort(key=lambda clause: (-clause.lbd, clause.activity))
+        removed = set(candidates[:len(candidates) // 2])
+
+        if removed:
+            self.learned_clauses = [
+                clause for clause in self.learned_clauses
+                if clause not in removed]
+            self.clauses = [
+                clause for clause in self.clauses if clause not in removed]
+            for watched in self.watches.values():
+                watched[:] = [
+                    watcher for watcher in watched
+                    if watcher[1] not in removed]
+            self._collect_clause_trails()
+
+        self.stats.reductions += 1
+        budget = self._max_learned_clauses
+        if budget is not None:
+            self._next_reduction = max(
+                budget, len(self.learned_clauses) + budget // 2)
+
+    def _collect_clause_trails(self):
+        """ Forget the trails of learned clauses that can no longer be part
+        of an explanation, i.e. which are not reachable from the trail of a
+        learned clause still in the database, or of the reason of a current
+        assignment.
+        """
+        trails = self.clause_trails
+        live = set()
+        # Simplified clauses are learned too, and the database simplification
+        # removes the reasons of the root facts.
+        stack = [clause for clause in self.clauses if clause.learned]
+        reasons = self.reasons
+        stack.extend(
+            reasons[abs(lit)] for lit in self.trail if reasons[abs(lit)])
+        while stack:
+            clause = stack.pop()
+            if clause in live:
+                continue
+            live.add(clause)
+            stack.extend(
+                c for c in trails.get(clause, ())
+                if c.learned and c not in live)
+        for clause in [c for c in trails if c not in live]:
+            del trails[clause]
+
     def undo_one(self):
         """Backtrack by one step.
         """
         p = self.trail.pop()
         v = abs(p)  # Underlying variable
-        self.assignments[v] = None
+        if self._phase_saving:
+            self.phases[v] = p > 0
+        self.assignments.unassign(v)
         self.levels[v] = -1  # FIXME Why -1?
+        self._policy.on_unassign(v)
 
     def cancel_until(self, level):
         """Cancel all decisions up a given level.
@@ -562,6 +1377,14 @@ class MiniSATSolver(object):
         self.trail_lim.append(len(self.trail))  # FIXME: This is fishy.
         return self.enqueue(lit, cause=cause)
 
+    @property
+    def num_restarts(self):
+        return self.stats.restarts
+
+    @property
+    def num_reductions(self):
+        return self.stats.reductions
+
     @property
     def number_assigned(self):
         """ Return the number of currently assigned variables.
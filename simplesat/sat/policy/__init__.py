@@ -1,14 +1,23 @@
 # -*- coding: utf-8 -*-
 
-from .policy import DefaultPolicy
+from .policy import DefaultPolicy, ReusablePolicyFactory
+from .repository_priority_policy import (
+    LoggedRepositoryPriorityPolicy, RepositoryPriorityPolicy
+)
 from .undetermined_clause_policy import (
     LoggedUndeterminedClausePolicy, UndeterminedClausePolicy
 )
+from .vsids_policy import LoggedVSIDSPolicy, VSIDSPolicy
 
-InstalledFirstPolicy = LoggedUndeterminedClausePolicy
+InstalledFirstPolicy = UndeterminedClausePolicy
 
 __all__ = [
     'DefaultPolicy',
+    'LoggedRepositoryPriorityPolicy',
+    'RepositoryPriorityPolicy',
+    'ReusablePolicyFactory',
     'LoggedUndeterminedClausePolicy',
     'UndeterminedClausePolicy',
+    'LoggedVSIDSPolicy',
+    'VSIDSPolicy',
     'InstalledFirstPolicy']
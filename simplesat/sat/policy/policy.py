@@ -9,6 +9,14 @@ def pkg_id_to_version(pool, package_id):
 
 class IPolicy(six.with_metaclass(abc.ABCMeta)):
 
+    #: Whether the policy reads the changelog of the assignments. The solver
+    #: only keeps one for the policies which do.
+    uses_changelog = False
+
+    #: Whether the policy implements :meth:`reset`, so that a
+    #: :class:`ReusablePolicyFactory` may reuse it for several requests.
+    supports_reset = False
+
     def __init__(self, *args):
         pass
 
@@ -31,6 +39,77 @@ class IPolicy(six.with_metaclass(abc.ABCMeta)):
             The collection of Clause objects to satisfy.
         """
 
+    def on_conflict(self, variables):
+        """ Called by the solver after analyzing a conflict.
+
+        Parameters
+        ----------
+        variables : iterable of int
+            The variables which took part in the conflict analysis.
+        """
+
+    def on_unassign(self, variable):
+        """ Called by the solver when `variable` is unassigned while
+        backtracking.
+        """
+
+    def reset(self, ignore_installed_packages=None):
+        """ Prepare the policy for a new request, on the same pool and
+        installed repository.
+
+        Only the policies whose :attr:`supports_reset` is True implement it.
+
+        Parameters
+        ----------
+        ignore_installed_packages : set of PackageMetadata, optional
+            Installed packages which should not be preferred for the new
+            request.
+        """
+        raise NotImplementedError(
+            "{} cannot be reused".format(type(self).__name__))
+
+
+class ReusablePolicyFactory(object):
+
+    """ A policy factory which creates a single policy per pool and
+    installed repository, and resets it for each new request.
+
+    A policy computes some state from the pool and the installed
+    repository, e.g. the installed packages ordered by version. When many
+    requests are solved against the same pool, e.g. by a service, giving
+    the same factory to each :class:`DependencySolver` computes that state
+    once. The installed repository must not change in between.
+
+    Parameters
+    ----------
+    policy_factory : callable
+        The factory of the policies, with the signature of
+        :class:`InstalledFirstPolicy`. Policies which do not support
+        :meth:`IPolicy.reset` are created anew for each request.
+    """
+
+    def __init__(self, policy_factory):
+        self._policy_factory = policy_factory
+        self._policy = None
+        self._pool = None
+        self._installed_repository = None
+
+    def __call__(self, pool, installed_repository,
+                 ignore_installed_packages=None):
+        policy = self._policy
+        if (policy is not None and policy.supports_reset and
+                pool is self._pool and
+                installed_repository is self._installed_repository):
+            policy.reset(ignore_installed_packages)
+            return policy
+        policy = self._policy_factory(
+            pool, installed_repository,
+            ignore_installed_packages=ignore_installed_packages)
+        self._policy = policy
+        self._pool = pool
+        self._installed_repository = installed_repository
+        return policy
+
 
 class DefaultPolicy(IPolicy):
 
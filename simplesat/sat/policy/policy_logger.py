@@ -7,6 +7,8 @@ from .policy import IPolicy
 
 class PolicyLogger(IPolicy):
 
+    uses_changelog = True
+
     def __init__(self, policy, args=None, kwargs=None):
         self._policy = policy
         self._log_pool = args[0]
@@ -30,6 +32,12 @@ class PolicyLogger(IPolicy):
         self._log_installed.difference_update(package_ids)
         self._policy.add_requirements(package_ids)
 
+    def on_conflict(self, variables):
+        self._policy.on_conflict(variables)
+
+    def on_unassign(self, variable):
+        self._policy.on_unassign(variable)
+
     def _log_histogram(self, pkg_ids=None):
         if pkg_ids is None:
             pkg_ids = map(abs, self._log_suggestions)
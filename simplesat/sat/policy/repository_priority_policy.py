@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from .policy_logger import LoggedPolicy
+from .undetermined_clause_policy import UndeterminedClausePolicy
+
+
+class RepositoryPriorityPolicy(UndeterminedClausePolicy):
+
+    """ An UndeterminedClausePolicy which prefers the packages of the
+    repositories with the highest priority.
+
+    Packages with the same name and version from several repositories are
+    different variables for the solver. Without priorities, which one is
+    tried first is arbitrary, and the search may flip between them. With
+    this policy, the duplicate from the repository listed first is always
+    suggested first.
+
+    The rank of each package, combining its version and the priority of its
+    repository, is computed once, so that suggesting a candidate costs
+    O(log n) integer comparisons.
+
+    Parameters
+    ----------
+    pool : Pool
+        The pool from which package ids are taken.
+    installed_repository : Repository
+        The currently installed packages.
+    ignore_installed_packages : set of PackageMetadata, optional
+        Installed packages which should not be preferred.
+    repository_priorities : sequence of RepositoryInfo, optional
+        The repositories, from the highest priority to the lowest. Packages
+        of other repositories, or without repository, come last.
+    strict_priority : bool, optional
+        If True, the priority of the repository takes precedence over the
+        version, i.e. an older version from a repository of higher priority
+        is suggested before a newer one. By default, the priority only
+        orders packages of equal versions.
+    """
+
+    def __init__(self, pool, installed_repository,
+                 ignore_installed_packages=None, repository_priorities=(),
+                 strict_priority=False):
+        self._repository_priorities = tuple(repository_priorities)
+        self._strict_priority = strict_priority
+        super(RepositoryPriorityPolicy, self).__init__(
+            pool, installed_repository,
+            ignore_installed_packages=ignore_installed_packages)
+
+    def _update_pool_state(self):
+        super(RepositoryPriorityPolicy, self)._update_pool_state()
+        self._preference_ranks = _preference_ranks(
+            self._pool, self._repository_priorities, self._strict_priority)
+
+    def _newest_first(self, package_id):
+        ranks = self._preference_ranks
+        rank = ranks[package_id] if package_id < len(ranks) else -1
+        return (-rank, -package_id)
+
+
+def _preference_ranks(pool, repository_priorities, strict_priority):
+    """ Return a list, indexed by package id, of integers which are greater
+    for the packages to suggest first.
+    """
+    priorities = dict(
+        (repository_info, len(repository_priorities) - i)
+        for i, repository_info in enumerate(repository_priorities))
+    version_ranks = pool.version_ranks
+    num_priorities = len(repository_priorities) + 1
+    num_versions = max(version_ranks) + 1
+
+    ranks = [-1] * len(version_ranks)
+    for package_id in pool.iter_package_ids():
+        package = pool.id_to_package(package_id)
+        priority = priorities.get(
+            getattr(package, 'repository_info', None), 0)
+        version_rank = version_ranks[package_id]
+        if strict_priority:
+            ranks[package_id] = priority * num_versions + version_rank
+        else:
+            ranks[package_id] = version_rank * num_priorities + priority
+    return ranks
+
+
+LoggedRepositoryPriorityPolicy = LoggedPolicy(RepositoryPriorityPolicy)
@@ -1,105 +1,359 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-import six
+from collections import defaultdict
+import heapq
 
-from .policy import IPolicy, pkg_id_to_version
+from ..assignment_set import TRUE, UNASSIGNED, lit_code
+from .policy import IPolicy
 from .policy_logger import LoggedPolicy
 
 
+class UnsatisfiedClauses(object):
+
+    """ The variables of the clauses which have no True literal.
+
+    Instead of scanning every clause, :meth:`update` only visits the clauses
+    of the literals whose value changed since the previous update, and the
+    clauses added since then. For each clause, the number of its True
+    literals is kept, and for each variable, the number of unsatisfied
+    clauses it appears in.
+
+    The variables which changed are the ones assigned since the previous
+    update, which the assignments log in their
+    :attr:`~AssignmentSet.assigned_log`, and the ones given to
+    :meth:`on_unassign`. An update costs time in proportion to their
+    number, not to the number of variables.
+
+    Parameters
+    ----------
+    assignments : AssignmentSet
+        The assignments of the solver.
+    clauses : list of Clause
+        The clause database of the solver. New clauses may be appended to
+        it; the solver replaces the list when it removes clauses.
+    """
+
+    def __init__(self, assignments, clauses):
+        self.assignments = assignments
+        self.clauses = clauses
+        #: The variables of the unsatisfied clauses.
+        self.variables = set()
+        #: The variables of all the clauses.
+        self.clause_variables = set()
+
+        self._num_clauses = 0
+        self._occurrences = defaultdict(list)
+        self._true_counts = {}
+        self._unsatisfied_counts = defaultdict(int)
+
+        # The state of each assigned variable, as of the previous update.
+        self._counted_states = None
+        self._assigned_log = None
+        # The variables which may have changed since the previous update.
+        self._changed = set()
+
+    def on_unassign(self, variable):
+        self._changed.add(variable)
+
+    def collect_changes(self):
+        """ Move the logged assignments to the changed variables, so that
+        the log does not grow with the length of the search.
+        """
+        log = self._assigned_log
+        if log:
+            self._changed.update(log)
+            del log[:]
+
+    def update(self):
+        """ Take the assignments and the clauses added since the previous
+        update into account.
+        """
+        assignments = self.assignments
+        if self._counted_states is None:
+            states = assignments.literal_states
+            self._counted_states = dict(
+                (variable, states[2 * variable])
+                for variable in assignments.assigned_ids)
+        else:
+            self.collect_changes()
+            self._update_variables(self._changed)
+        if self._assigned_log is None:
+            self._assigned_log = assignments.assigned_log = []
+        self._changed.clear()
+
+        clauses = self.clauses
+        for clause in clauses[self._num_clauses:]:
+            self._add_clause(clause)
+        self._num_clauses = len(clauses)
+
+    def _add_clause(self, clause):
+        states = self.assignments.literal_states
+        num_states = len(states)
+        occurrences = self._occurrences
+        true_count = 0
+        for lit in clause.lits:
+            code = lit_code(lit)
+            if code < num_states and states[code] == TRUE:
+                true_count += 1
+            occurrences[lit].append(clause)
+            self.clause_variables.add(abs(lit))
+        self._true_counts[clause] = true_count
+        if true_count == 0:
+            self._add_unsatisfied(clause)
+
+    def _update_variables(self, variables):
+        counted_states = self._counted_states
+        states = self.assignments.literal_states
+        num_states = len(states)
+        for variable in variables:
+            code = 2 * variable
+            old = counted_states.get(variable, UNASSIGNED)
+            new = states[code] if code < num_states else UNASSIGNED
+            if old == new or (old < 0 and new < 0):
+                continue
+            if old >= 0:
+                self._on_not_true(variable if old == TRUE else -variable)
+                del counted_states[variable]
+            if new >= 0:
+                self._on_true(variable if new == TRUE else -variable)
+                counted_states[variable] = new
+
+    def _on_true(self, lit):
+        true_counts = self._true_counts
+        for clause in self._occurrences.get(lit, ()):
+            count = true_counts[clause]
+            true_counts[clause] = count + 1
+            if count == 0:
+                self._remove_unsatisfied(clause)
+
+    def _on_not_true(self, lit):
+        true_counts = self._true_counts
+        for clause in self._occurrences.get(lit, ()):
+            count = true_counts[clause] - 1
+            true_counts[clause] = count
+            if count == 0:
+                self._add_unsatisfied(clause)
+
+    def _add_unsatisfied(self, clause):
+        counts = self._unsatisfied_counts
+        for lit in clause.lits:
+            variable = abs(lit)
+            counts[variable] += 1
+            if counts[variable] == 1:
+                self.variables.add(variable)
+
+    def _remove_unsatisfied(self, clause):
+        counts = self._unsatisfied_counts
+        for lit in clause.lits:
+            variable = abs(lit)
+            counts[variable] -= 1
+            if counts[variable] == 0:
+                self.variables.discard(variable)
+
+
+class CandidateHeap(object):
+
+    """ Package ids ordered by a key, the smallest first.
+
+    Assigned ids are only removed when they reach the top of the heap (lazy
+    deletion), so that suggesting a candidate costs O(log n). An id removed
+    this way is pushed again by :meth:`on_unassign`, unless the heap
+    `forgets_assigned` ids, in which case it stays out until :meth:`reset`.
+
+    Parameters
+    ----------
+    key : callable
+        The key of a package id.
+    forgets_assigned : bool, optional
+        Whether assigned ids are removed for good.
+    """
+
+    def __init__(self, key, forgets_assigned=False):
+        self._key = key
+        self._forgets_assigned = forgets_assigned
+        self.package_ids = set()
+        self._heap = []
+        self._in_heap = set()
+
+    def add(self, package_ids):
+        key = self._key
+        for package_id in package_ids:
+            if package_id not in self._in_heap:
+                self.package_ids.add(package_id)
+                self._in_heap.add(package_id)
+                heapq.heappush(self._heap, (key(package_id), package_id))
+
+    def reset(self, package_ids):
+        """ Replace the ids of the heap by `package_ids`.
+        """
+        key = self._key
+        self.package_ids = set(package_ids)
+        self._in_heap = set(self.package_ids)
+        self._heap = [
+            (key(package_id), package_id) for package_id in self.package_ids]
+        heapq.heapify(self._heap)
+
+    def best(self, assignments):
+        """ Return the unassigned id with the smallest key, or None.
+        """
+        heap = self._heap
+        assigned_ids = assignments.assigned_ids
+        while heap:
+            package_id = heap[0][1]
+            if package_id not in assigned_ids:
+                return package_id
+            heapq.heappop(heap)
+            self._in_heap.discard(package_id)
+            if self._forgets_assigned:
+                self.package_ids.discard(package_id)
+        return None
+
+    def on_unassign(self, variable):
+        if variable in self.package_ids and variable not in self._in_heap:
+            self._in_heap.add(variable)
+            heapq.heappush(self._heap, (self._key(variable), variable))
+
+
 class UndeterminedClausePolicy(IPolicy):
 
     """ An IPolicy that gathers all undetermined packages from clauses whose
     truth value is not yet known and suggests them in descending order by
-    package version number. """
+    package version number.
+
+    Versions are compared through the version ranks of the pool, and the
+    candidates of each source (installed packages, requirements, packages of
+    the unsatisfied clauses) are kept in a :class:`CandidateHeap`. """
+
+    supports_reset = True
 
     def __init__(self, pool, installed_repository,
                  ignore_installed_packages=None):
-        if ignore_installed_packages is None:
-            ignore_installed_packages = set()
         self._pool = pool
+        self._installed_repository = installed_repository
+        self._version_ranks = None
+        self.reset(ignore_installed_packages)
 
-        by_version = six.functools.partial(pkg_id_to_version, self._pool)
-        installed_packages = set(installed_repository)
-        prefer_installed_pkgs = installed_packages - ignore_installed_packages
-        self._prefer_installed_pkg_ids = sorted(
-            (pool.package_id(pkg) for pkg in prefer_installed_pkgs),
-            key=by_version)
+    def reset(self, ignore_installed_packages=None):
+        """ Forget the requirements and the search state of the previous
+        request.
 
-        self._decision_set = set()
-        self._requirements = set()
-        self._all_ids = set()
+        The state which only depends on the pool and the installed
+        repository, e.g. the installed packages ordered by version, is kept,
+        unless repositories were added to the pool since.
+        """
+        if self._version_ranks is not self._pool.version_ranks:
+            self._update_pool_state()
+
+        if ignore_installed_packages:
+            self._prefer_installed_pkg_ids = [
+                package_id
+                for package_id, package in self._installed_by_version
+                if package not in ignore_installed_packages]
+        else:
+            self._prefer_installed_pkg_ids = [
+                package_id for package_id, _ in self._installed_by_version]
+
+        # Installed packages are suggested oldest first, the others newest
+        # first.
+        self._installed = CandidateHeap(self._oldest_first)
+        self._installed.add(self._prefer_installed_pkg_ids)
+        self._requirements = CandidateHeap(self._newest_first)
+        self._decision_set = CandidateHeap(
+            self._newest_first, forgets_assigned=True)
+        self._unsatisfied_clauses = None
+
+    def _update_pool_state(self):
+        """ Compute the state which only depends on the pool and the
+        installed repository.
+        """
+        pool = self._pool
+        self._version_ranks = pool.version_ranks
+        installed = [
+            (pool.package_id(package), package)
+            for package in set(self._installed_repository)]
+        installed.sort(key=lambda item: self._oldest_first(item[0]))
+        self._installed_by_version = installed
 
     def add_requirements(self, package_ids):
-        self._requirements.update(package_ids)
+        self._requirements.add(package_ids)
 
     def get_next_package_id(self, assignments, clauses):
         """Get the next unassigned package.
         """
         if assignments.new_keys:
             self._refresh_decision_set(assignments, clauses)
+        elif self._unsatisfied_clauses is not None:
+            self._unsatisfied_clauses.collect_changes()
 
-        candidate_id = None
-        best = self._best_candidate
-
-        candidate_id = self._best_sorted_candidate(
-            self._prefer_installed_pkg_ids, assignments)
+        candidate_id = self._installed.best(assignments)
 
         if candidate_id is None:
-            candidate_id = best(self._requirements, assignments)
+            candidate_id = self._requirements.best(assignments)
 
         if candidate_id is None:
-            candidate_id = best(self._decision_set, assignments, update=True)
+            candidate_id = self._decision_set.best(assignments)
 
         if candidate_id is None:
             self._refresh_decision_set(assignments, clauses)
-            candidate_id = best(self._decision_set, assignments)
+            candidate_id = self._decision_set.best(assignments)
 
         if candidate_id is None:
-            candidate_id = best(self._all_ids, assignments)
+            candidate_id = self._best_candidate(
+                self._all_ids(assignments), assignments)
 
         assert assignments.get(candidate_id) is None, \
             "Trying to assign to a variable which is already assigned."
 
         return candidate_id
 
-    def _without_assigned(self, package_ids, assignments):
-        return package_ids.difference(assignments.assigned_ids)
+    def _version_rank(self, package_id):
+        ranks = self._version_ranks
+        # Variables beyond the pool, e.g. selectors, rank below every
+        # package.
+        return ranks[package_id] if package_id < len(ranks) else -1
+
+    def _oldest_first(self, package_id):
+        return (self._version_rank(package_id), package_id)
 
-    def _best_sorted_candidate(self, package_ids, assignments):
-        for p_id in package_ids:
-            if p_id not in assignments.assigned_ids:
-                return p_id
+    def _newest_first(self, package_id):
+        # Among equal versions, the package added last to the pool wins.
+        return (-self._version_rank(package_id), -package_id)
 
-    def _best_candidate(self, package_ids, assignments, update=False):
-        by_version = six.functools.partial(pkg_id_to_version, self._pool)
-        unassigned = self._without_assigned(package_ids, assignments)
-        if update:
-            package_ids.clear()
-            package_ids.update(unassigned)
+    def _best_candidate(self, package_ids, assignments):
+        unassigned = package_ids.difference(assignments.assigned_ids)
         try:
-            return max(unassigned, key=by_version)
+            return min(unassigned, key=self._newest_first)
         except ValueError:
             return None
 
-    def _refresh_decision_set(self, assignments, clauses):
-        assignments.consume_changelog()
+    def on_unassign(self, variable):
+        self._installed.on_unassign(variable)
+        self._requirements.on_unassign(variable)
+        if self._unsatisfied_clauses is not None:
+            self._unsatisfied_clauses.on_unassign(variable)
 
-        all_ids = {abs(l) for c in clauses for l in c.lits}  # noqa
+    def _all_ids(self, assignments):
+        all_ids = set(self._unsatisfied_clauses.clause_variables)
         all_ids.update(self._prefer_installed_pkg_ids)
-        self._all_ids = all_ids
-
-        unsatisfied_clauses = {
-            clause for clause in clauses
-            if not any(assignments.value(l) for l in clause.lits)  # noqa
-        }
-        self._decision_set.clear()
-        self._decision_set.update(
-            abs(lit)
-            for clause in unsatisfied_clauses
-            for lit in clause.lits
-        )
-        self._decision_set.difference_update(assignments.assigned_ids)
+        # Variables which only appear in at-most-one constraints.
+        all_ids.update(assignments.unassigned_ids)
+        return all_ids
+
+    def _refresh_decision_set(self, assignments, clauses):
+        assignments.new_keys.clear()
+
+        unsatisfied_clauses = self._unsatisfied_clauses
+        if (unsatisfied_clauses is None or
+                unsatisfied_clauses.assignments is not assignments or
+                unsatisfied_clauses.clauses is not clauses):
+            unsatisfied_clauses = UnsatisfiedClauses(assignments, clauses)
+            self._unsatisfied_clauses = unsatisfied_clauses
+        unsatisfied_clauses.update()
+
+        self._decision_set.reset(
+            unsatisfied_clauses.variables.difference(
+                assignments.assigned_ids))
 
 
 LoggedUndeterminedClausePolicy = LoggedPolicy(UndeterminedClausePolicy)
@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import heapq
+
+from .policy import IPolicy
+from .policy_logger import LoggedPolicy
+
+
+class VSIDSPolicy(IPolicy):
+
+    """ An IPolicy that suggests the unassigned package with the highest
+    activity.
+
+    The activity of a package is bumped every time it takes part in the
+    analysis of a conflict, and every activity decays geometrically after
+    each conflict (the "exponential" VSIDS scheme used by MiniSat: instead of
+    decaying every activity, the bump increment grows by ``1 / decay``).
+
+    Packages with equal activity, which is the case for every package before
+    the first conflict, are ranked as follows: installed packages first, then
+    packages directly required by a job, then by descending version, as
+    ranked by the pool across package names.
+
+    Candidates are kept in a binary heap with lazy deletion, so suggesting a
+    package costs O(log n).
+
+    Parameters
+    ----------
+    pool : Pool
+        The pool from which package ids are taken.
+    installed_repository : Repository
+        The currently installed packages.
+    ignore_installed_packages : set of PackageMetadata, optional
+        Installed packages which should not be preferred.
+    decay : float, optional
+        The activity decay factor, between 0 and 1.
+    """
+
+    # Activities are rescaled when they grow above this limit.
+    _RESCALE_LIMIT = 1e100
+
+    supports_reset = True
+
+    def __init__(self, pool, installed_repository,
+                 ignore_installed_packages=None, decay=0.95):
+        if not 0 < decay < 1:
+            raise ValueError("decay must be in ]0, 1[, got {!r}".format(decay))
+        self._pool = pool
+        self._installed_repository = installed_repository
+        self._decay = decay
+        self.reset(ignore_installed_packages)
+
+    def reset(self, ignore_installed_packages=None):
+        """ Forget the requirements, the activities and the search state of
+        the previous request.
+        """
+        if ignore_installed_packages is None:
+            ignore_installed_packages = set()
+        installed_packages = set(self._installed_repository)
+        self._installed_ids = set(
+            self._pool.package_id(pkg)
+            for pkg in installed_packages - ignore_installed_packages)
+        self._requirements = set()
+
+        self._activity = {}
+        self._var_inc = 1.0
+
+        # Rank of each variable when activities are equal. Lower is better.
+        self._tie_break = {}
+        self._heap = []
+        self._in_heap = set()
+        self._assignments = None
+
+    def add_requirements(self, package_ids):
+        self._requirements.update(package_ids)
+
+    def get_next_package_id(self, assignments, clauses):
+        """Get the unassigned package with the highest activity.
+        """
+        if (assignments is not self._assignments or
+                len(assignments) != len(self._tie_break)):
+            self._setup(assignments)
+
+        candidate_id = self._best_candidate(assignments)
+        if candidate_id is None:
+            # Every variable we knew of has been assigned: the heap got out of
+            # sync with the assignments, rebuild it.
+            self._setup(assignments)
+            candidate_id = self._best_candidate(assignments)
+
+        assert candidate_id is not None, \
+            "Trying to suggest a variable when all are assigned."
+
+        return candidate_id
+
+    def _best_candidate(self, assignments):
+        heap = self._heap
+        activity = self._activity
+        value = assignments.value
+        while heap:
+            neg_activity, _, package_id = heap[0]
+            if -neg_activity != activity[package_id]:
+                # Stale entry, a fresher one exists in the heap.
+                heapq.heappop(heap)
+            elif value(package_id) is not None:
+                heapq.heappop(heap)
+                self._in_heap.discard(package_id)
+            else:
+                return package_id
+        return None
+
+    def on_conflict(self, variables):
+        activity = self._activity
+        var_inc = self._var_inc
+        rescale = False
+        for variable in variables:
+            new_activity = activity.get(variable, 0.0) + var_inc
+            activity[variable] = new_activity
+            if variable in self._in_heap:
+                self._push(variable)
+            if new_activity > self._RESCALE_LIMIT:
+                rescale = True
+        self._var_inc = var_inc / self._decay
+        if rescale:
+            self._rescale()
+
+    def on_unassign(self, variable):
+        if variable not in self._in_heap and variable in self._tie_break:
+            self._in_heap.add(variable)
+            self._push(variable)
+
+    def _push(self, variable):
+        # `variable` must already be in self._in_heap.
+        if len(self._heap) > 4 * len(self._tie_break) + 16:
+            # Too many stale entries, start afresh.
+            self._rebuild_heap()
+        else:
+            heapq.heappush(
+                self._heap,
+                (-self._activity[variable], self._tie_break[variable],
+                 variable))
+
+    def _rescale(self):
+        factor = 1.0 / self._RESCALE_LIMIT
+        for variable in self._activity:
+            self._activity[variable] *= factor
+        self._var_inc *= factor
+        self._rebuild_heap()
+
+    def _rebuild_heap(self):
+        self._heap = [
+            (-self._activity[variable], self._tie_break[variable], variable)
+            for variable in self._in_heap]
+        heapq.heapify(self._heap)
+
+    def _setup(self, assignments):
+        """ (Re)compute the tie-break ranks and the heap from the variables
+        known to `assignments`.
+        """
+        self._assignments = assignments
+        variables = assignments.keys()
+
+        if self._pool is not None:
+            version_ranks = self._pool.version_ranks
+        else:
+            version_ranks = ()
+        num_ranks = len(version_ranks)
+
+        def key(variable):
+            # Versions are compared across package names, so that tied
+            # providers of a requirement are ranked by version too. Variables
+            # beyond the pool, e.g. selectors, rank below every package.
+            if variable < num_ranks:
+                version_rank = version_ranks[variable]
+            else:
+                version_rank = -1
+            return (
+                variable not in self._installed_ids,
+                variable not in self._requirements,
+                -version_rank,
+                variable,
+            )
+
+        self._tie_break = {
+            variable: rank
+            for rank, variable in enumerate(sorted(variables, key=key))}
+        for variable in variables:
+            self._activity.setdefault(variable, 0.0)
+        self._in_heap = set(
+            variable for variable, status in assignments.items()
+            if status is None)
+        self._rebuild_heap()
+
+
+LoggedVSIDSPolicy = LoggedPolicy(VSIDSPolicy)
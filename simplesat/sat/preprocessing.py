@@ -0,0 +1,231 @@
+"""
+Simplification of the clauses of a SAT problem, before solving it.
+
+"""
+from __future__ import absolute_import
+
+from collections import defaultdict, deque, OrderedDict
+import logging
+
+from .clause import Clause
+
+
+logger = logging.getLogger(__name__)
+
+
+class Preprocessor(object):
+
+    """ Simplify a list of clauses before giving them to the solver.
+
+    Three techniques are applied, following SatELite:
+
+    - subsumption: a clause containing every literal of another clause is
+      removed;
+    - self-subsuming resolution: if ``C = (l | A)`` and
+      ``D = (-l | A | B)``, ``-l`` is removed from ``D``;
+    - bounded variable elimination: a variable is replaced by the
+      resolvents of the clauses containing it, as long as there are no more
+      resolvents than clauses.
+
+    Clauses derived by the last two techniques are learned clauses, whose
+    trail in :attr:`clause_trails` is the clauses they come from, so that
+    explanations still lead back to the original rules. The values of the
+    eliminated variables are restored by :meth:`extend_model`.
+
+    Parameters
+    ----------
+    frozen : iterable of int, optional
+        Variables which must not be eliminated, e.g. the packages required by
+        a job, the installed packages, or the ones preferred by the policy.
+    max_occurrences : int, optional
+        Variables occurring in more clauses than this are not eliminated.
+
+    Attributes
+    ----------
+    clause_trails : dict
+        A mapping from each derived clause to the clauses it comes from.
+    num_removed_clauses : int
+        The number of clauses removed by the last call to :meth:`preprocess`.
+    num_eliminated_variables : int
+        The number of variables eliminated by the last call to
+        :meth:`preprocess`.
+    """
+
+    def __init__(self, frozen=(), max_occurrences=16):
+        self.frozen = set(frozen)
+        self.max_occurrences = max_occurrences
+
+        self.clause_trails = {}
+        self.num_removed_clauses = 0
+        self.num_eliminated_variables = 0
+
+        self._clauses = OrderedDict()
+        self._occurrences = defaultdict(OrderedDict)
+        # The eliminated variables, in order, each with the literals of the
+        # clauses it was removed from.
+        self._eliminated = []
+
+    def preprocess(self, clauses):
+        """ Return the simplified list of `clauses`.
+        """
+        self._clauses = OrderedDict()
+        self._occurrences = defaultdict(OrderedDict)
+        self._eliminated = []
+        for clause in clauses:
+            self._attach(clause)
+        num_clauses = len(self._clauses)
+
+        self._subsume_all(list(self._clauses))
+        self._eliminate_variables()
+
+        self.num_removed_clauses = num_clauses - len(self._clauses)
+        self.num_eliminated_variables = len(self._eliminated)
+        logger.info(
+            "Preprocessing removed %d clauses out of %d, and eliminated %d "
+            "variables", self.num_removed_clauses, num_clauses,
+            self.num_eliminated_variables)
+        return list(self._clauses)
+
+    def extend_model(self, assignments):
+        """ Give a value to every eliminated variable in `assignments`, a
+        solution of the preprocessed clauses.
+
+        An eliminated variable is False, unless one of its original clauses
+        requires it to be True. Variables which no longer appear in any
+        clause are False too.
+        """
+        value = assignments.value
+        for _, clauses in self._eliminated:
+            for lits in clauses:
+                for lit in lits:
+                    if value(lit) is None:
+                        assignments[abs(lit)] = False
+        for variable, clauses in reversed(self._eliminated):
+            assignments[variable] = False
+            for lits in clauses:
+                if variable in lits and not any(value(lit) for lit in lits):
+                    assignments[variable] = True
+                    break
+        return assignments
+
+    def _attach(self, clause):
+        self._clauses[clause] = None
+        occurrences = self._occurrences
+        for lit in clause.lits:
+            occurrences[lit][clause] = None
+
+    def _detach(self, clause):
+        del self._clauses[clause]
+        occurrences = self._occurrences
+        for lit in clause.lits:
+            del occurrences[lit][clause]
+
+    def _derive(self, lits, parents):
+        clause = Clause(lits, learned=True)
+        self.clause_trails[clause] = list(parents)
+        self._attach(clause)
+        return clause
+
+    def _subsume_all(self, clauses):
+        queue = deque(clauses)
+        while queue:
+            clause = queue.popleft()
+            if clause in self._clauses:
+                queue.extend(self._subsume(clause))
+
+    def _subsume(self, clause):
+        """ Remove the clauses subsumed by `clause`, and strengthen the ones
+        it can strengthen. Return the strengthened clauses.
+        """
+        occurrences = self._occurrences
+
+        def num_occurrences(lit):
+            return len(occurrences[lit]) + len(occurrences[-lit])
+
+        # Every candidate contains the pivot, or its negation.
+        pivot = min(clause.lits, key=num_occurrences)
+        candidates = list(occurrences[pivot]) + list(occurrences[-pivot])
+
+        strengthened = []
+        for other in candidates:
+            if (other is clause or len(other) < len(clause) or
+                    other not in self._clauses):
+                continue
+            other_lits = set(other.lits)
+            negated = None
+            for lit in clause.lits:
+                if lit in other_lits:
+                    continue
+                elif negated is None and -lit in other_lits:
+                    negated = -lit
+                else:
+                    break
+            else:
+                if negated is None:
+                    self._detach(other)
+                elif len(other) > 1:
+                    self._detach(other)
+                    strengthened.append(self._derive(
+                        [lit for lit in other.lits if lit != negated],
+                        (other, clause)))
+        return strengthened
+
+    def _eliminate_variables(self):
+        occurrences = self._occurrences
+
+        def key(variable):
+            num_occurrences = (
+                len(occurrences[variable]) + len(occurrences[-variable]))
+            return num_occurrences, variable
+
+        variables = set(
+            abs(lit) for clause in self._clauses for lit in clause.lits)
+        for variable in sorted(variables - self.frozen, key=key):
+            self._eliminate(variable)
+
+    def _eliminate(self, variable):
+        """ Replace the clauses containing `variable` by their resolvents,
+        if there are not more of them. Return True if `variable` was
+        eliminated.
+        """
+        positive = list(self._occurrences[variable])
+        negative = list(self._occurrences[-variable])
+        clauses = positive + negative
+        if not clauses or len(clauses) > self.max_occurrences:
+            return False
+
+        resolvents = []
+        for p in positive:
+            for n in negative:
+                lits = _resolve(p, n, variable)
+                if lits is None:
+                    continue
+                if not lits or len(resolvents) == len(clauses):
+                    # Leave an empty resolvent, i.e. a conflict, to the
+                    # solver, which knows how to explain it.
+                    return False
+                resolvents.append((lits, p, n))
+
+        for clause in clauses:
+            self._detach(clause)
+        self._eliminated.append(
+            (variable, [list(clause.lits) for clause in clauses]))
+        self._subsume_all([
+            self._derive(lits, (p, n)) for lits, p, n in resolvents])
+        return True
+
+
+def _resolve(positive, negative, variable):
+    """ Return the literals of the resolvent of the clauses `positive` and
+    `negative` on `variable`, or None if it is a tautology.
+    """
+    lits = [lit for lit in positive.lits if lit != variable]
+    seen = set(lits)
+    for lit in negative.lits:
+        if lit == -variable or lit in seen:
+            continue
+        if -lit in seen:
+            return None
+        lits.append(lit)
+        seen.add(lit)
+    return lits
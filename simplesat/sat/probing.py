@@ -0,0 +1,178 @@
+"""
+Simplification of a SAT problem at the root level, by probing literals.
+
+"""
+from __future__ import absolute_import
+
+from simplesat.errors import SatisfiabilityError
+from simplesat.utils.graph import (
+    breadth_first_search, strongly_connected_components)
+from .clause import Clause
+from .minisat import _is_tautology
+
+
+class Prober(object):
+
+    """ Simplify the problem of a solver at the root level, before the
+    policy makes any decision.
+
+    Two techniques are applied:
+
+    - failed literal probing: each candidate literal is assumed and
+      propagated. If this leads to a conflict, the clause learned from it is
+      recorded, which makes the literal False at the root level;
+    - equivalent literal substitution: the literals of a strongly connected
+      component of the binary implication graph are equivalent. In every
+      other clause, they are replaced by a single representative. The binary
+      clauses linking them are kept, so that the other literals of a class
+      still follow their representative.
+
+    Substituted clauses are learned clauses, whose trail is the original
+    clause followed by the binary clauses proving the equivalences, so that
+    explanations still lead back to the original rules.
+
+    Parameters
+    ----------
+    max_probes : int, optional
+        The maximum number of literals to assume. By default, every literal
+        with a binary implication is probed.
+
+    Attributes
+    ----------
+    failed_literals : list of int
+        The literals whose propagation led to a conflict.
+    representatives : dict
+        A mapping from each substituted literal to its representative.
+    true_variables : set of int
+        The variables True at the root level after probing, e.g. the
+        packages which must be installed.
+    false_variables : set of int
+        The variables False at the root level after probing, e.g. the
+        packages which can never be installed.
+    """
+
+    def __init__(self, max_probes=None):
+        self.max_probes = max_probes
+
+        self.failed_literals = []
+        self.representatives = {}
+        self.true_variables = set()
+        self.false_variables = set()
+
+    def probe(self, solver):
+        """ Simplify the problem of `solver`, which must be at the root
+        level.
+
+        Raises
+        ------
+        SatisfiabilityError
+            If the problem is found to be unsatisfiable.
+        """
+        self.failed_literals = []
+        self.representatives = {}
+
+        # Probing must not change the phases the search starts with.
+        phases = dict(solver.phases)
+        try:
+            _propagate(solver)
+            self._probe_failed_literals(solver)
+            self._substitute_equivalent_literals(solver)
+        finally:
+            solver.phases = phases
+
+        trail = solver.trail
+        self.true_variables = set(lit for lit in trail if lit > 0)
+        self.false_variables = set(-lit for lit in trail if lit < 0)
+
+    def _probe_failed_literals(self, solver):
+        value = solver.assignments.value
+        # A literal without binary implications rarely propagates anything.
+        candidates = _sorted_literals(
+            lit for lit, implied in solver.binary_watches.items() if implied)
+        if self.max_probes is not None:
+            candidates = candidates[:self.max_probes]
+
+        for lit in candidates:
+            if value(lit) is not None:
+                continue
+            solver.assume(lit)
+            conflict = solver.propagate()
+            if conflict is None:
+                solver.cancel_until(0)
+                continue
+            learned_clause, _ = solver.analyze(conflict)
+            solver.cancel_until(0)
+            solver.record(learned_clause)
+            self.failed_literals.append(lit)
+            _propagate(solver)
+
+    def _substitute_equivalent_literals(self, solver):
+        value = solver.assignments.value
+        binary_watches = solver.binary_watches
+
+        def implied(lit):
+            return [other for other, _ in binary_watches.get(lit, ())
+                    if value(other) is None]
+
+        literals = _sorted_literals(
+            lit for lit in list(binary_watches) if value(lit) is None)
+        representatives = self.representatives
+        for component in strongly_connected_components(literals, implied):
+            if len(component) < 2 or component[0] in representatives:
+                # A single literal, or the negation of a class seen already.
+                continue
+            representative = min(component, key=abs)
+            if -representative in component:
+                # Unsatisfiable, left to the solver to explain.
+                continue
+            for lit in component:
+                if lit != representative:
+                    representatives[lit] = representative
+                    representatives[-lit] = -representative
+        if not representatives:
+            return
+
+        proofs = {}
+
+        def proof(lit):
+            # The binary clauses of a path from `lit` to its representative.
+            if lit not in proofs:
+                path = next(breadth_first_search(
+                    lit, implied, [representatives[lit]]))
+                proofs[lit] = [
+                    next(clause for other, clause in binary_watches[a]
+                         if other == b)
+                    for a, b in zip(path, path[1:])]
+            return proofs[lit]
+
+        def substitute(clause):
+            lits = clause.lits
+            if not any(lit in representatives for lit in lits):
+                return clause
+            new_lits = [representatives.get(lit, lit) for lit in lits]
+            if _is_tautology(new_lits) or len(set(new_lits)) < 2:
+                # The links of a class, or clauses the solver will simplify
+                # on its own.
+                return clause
+            substituted = Clause(new_lits, learned=True)
+            substituted.lbd = clause.lbd
+            substituted.activity = clause.activity
+            trail = [clause]
+            for lit in lits:
+                if lit in representatives:
+                    trail.extend(proof(lit))
+            solver.clause_trails[substituted] = trail
+            return substituted
+
+        solver._rewrite_clauses(substitute)
+
+
+def _propagate(solver):
+    conflict = solver.propagate()
+    if conflict is not None:
+        learned_clause, _ = solver.analyze(conflict)
+        raise SatisfiabilityError(solver._unsat(conflict, learned_clause))
+
+
+def _sorted_literals(literals):
+    return sorted(literals, key=lambda lit: (abs(lit), lit < 0))
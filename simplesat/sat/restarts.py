@@ -0,0 +1,149 @@
+"""
+Restart strategies for the MiniSat solver.
+
+A restart cancels every decision down to the root level while keeping the
+learned clauses, so that an early bad decision does not trap the search in a
+useless subtree.
+
+"""
+from __future__ import division
+
+import abc
+from collections import deque
+
+import six
+
+
+def luby(i):
+    """ Return the `i`-th element (starting at 0) of the Luby sequence
+    1, 1, 2, 1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8, ...
+    """
+    # Find the finite subsequence that contains index `i`, and its size.
+    size, seq = 1, 0
+    while size < i + 1:
+        seq += 1
+        size = 2 * size + 1
+    while size - 1 != i:
+        size = (size - 1) >> 1
+        seq -= 1
+        i = i % size
+    return 2 ** seq
+
+
+class IRestartStrategy(six.with_metaclass(abc.ABCMeta)):
+
+    @abc.abstractmethod
+    def reset(self):
+        """ Reset the strategy at the start of a search.
+        """
+
+    @abc.abstractmethod
+    def on_conflict(self, lbd):
+        """ Record a conflict, and return True if the solver should restart.
+
+        Parameters
+        ----------
+        lbd : int
+            The literal block distance of the clause learned from the
+            conflict.
+        """
+
+    def on_restart(self):
+        """ Called by the solver after each restart.
+        """
+
+
+class LubyRestarts(IRestartStrategy):
+
+    """ Restart after ``unit * luby(i)`` conflicts for the i-th restart.
+    """
+
+    def __init__(self, unit=100):
+        self.unit = unit
+        self.reset()
+
+    def reset(self):
+        self._restarts = 0
+        self._conflicts = 0
+        self._limit = self.unit * luby(0)
+
+    def on_conflict(self, lbd):
+        self._conflicts += 1
+        return self._conflicts >= self._limit
+
+    def on_restart(self):
+        self._restarts += 1
+        self._conflicts = 0
+        self._limit = self.unit * luby(self._restarts)
+
+
+class GeometricRestarts(IRestartStrategy):
+
+    """ Restart after `first` conflicts, then grow the interval by `factor`
+    after each restart.
+    """
+
+    def __init__(self, first=100, factor=1.5):
+        if factor < 1:
+            raise ValueError("factor must be >= 1, got {!r}".format(factor))
+        self.first = first
+        self.factor = factor
+        self.reset()
+
+    def reset(self):
+        self._conflicts = 0
+        self._limit = self.first
+
+    def on_conflict(self, lbd):
+        self._conflicts += 1
+        return self._conflicts >= self._limit
+
+    def on_restart(self):
+        self._conflicts = 0
+        self._limit *= self.factor
+
+
+class GlucoseRestarts(IRestartStrategy):
+
+    """ Restart when the learned clauses get worse than usual.
+
+    As in Glucose, the solver restarts when the average LBD of the last
+    `window` learned clauses, scaled by `k`, exceeds the average LBD of every
+    clause learned so far.
+    """
+
+    def __init__(self, window=50, k=0.8):
+        self.window = window
+        self.k = k
+        self.reset()
+
+    def reset(self):
+        self._recent = deque(maxlen=self.window)
+        self._recent_sum = 0
+        self._total_sum = 0
+        self._conflicts = 0
+
+    def on_conflict(self, lbd):
+        self._conflicts += 1
+        self._total_sum += lbd
+        recent = self._recent
+        if len(recent) == self.window:
+            self._recent_sum -= recent[0]
+        recent.append(lbd)
+        self._recent_sum += lbd
+        return (
+            len(recent) == self.window and
+            self._recent_sum / self.window * self.k >
+            self._total_sum / self._conflicts
+        )
+
+    def on_restart(self):
+        self._recent.clear()
+        self._recent_sum = 0
+
+
+RESTART_STRATEGIES = {
+    'luby': LubyRestarts,
+    'geometric': GeometricRestarts,
+    'glucose': GlucoseRestarts,
+}
@@ -0,0 +1,126 @@
+"""
+Statistics about the work done by a solver.
+
+"""
+from __future__ import absolute_import
+
+from collections import Counter
+import json
+
+
+class SolverStats(object):
+
+    """ Counters describing the work done by a solver.
+
+    Every counter is updated as the search goes, at the cost of an integer
+    increment, so that the statistics may be left on in production. Peak
+    sizes are only sampled at the end of each search, and before each
+    reduction of the learned clauses, when the database is the largest.
+
+    Attributes
+    ----------
+    decisions, propagations, conflicts, restarts, reductions : int
+        The number of decisions, propagated literals, conflicts, restarts and
+        learned clause database reductions so far.
+    backjump_distances : Counter
+        The number of backjumps over each number of decision levels.
+    learned_clause_lengths, learned_clause_lbds : Counter
+        The number of learned clauses of each length, and of each literal
+        block distance (LBD).
+    max_clauses, max_learned_clauses : int
+        The largest number of clauses, and of learned clauses, in the
+        database.
+    max_watch_list_size : int
+        The length of the longest watch list.
+    search_time : float
+        The time spent searching, in seconds.
+    rules : dict
+        The number of rules of each :class:`RuleType` name, when the problem
+        comes from a :class:`DependencySolver`.
+    timings : dict
+        The time spent in each step of a :class:`DependencySolver`, in
+        seconds.
+    """
+
+    def __init__(self):
+        self.decisions = 0
+        self.propagations = 0
+        self.conflicts = 0
+        self.restarts = 0
+        self.reductions = 0
+
+        self.backjump_distances = Counter()
+        self.learned_clause_lengths = Counter()
+        self.learned_clause_lbds = Counter()
+
+        self.max_clauses = 0
+        self.max_learned_clauses = 0
+        self.max_watch_list_size = 0
+
+        self.search_time = 0.0
+
+        self.rules = {}
+        self.timings = {}
+
+    @property
+    def rates(self):
+        """ The number of decisions, propagations and conflicts per second
+        of search.
+        """
+        search_time = self.search_time
+        counts = (
+            ('decisions', self.decisions),
+            ('propagations', self.propagations),
+            ('conflicts', self.conflicts),
+        )
+        return dict(
+            (name + '_per_second',
+             count / search_time if search_time > 0 else 0.0)
+            for name, count in counts)
+
+    def update_peak_sizes(self, solver):
+        """ Take the current sizes of the clause database of `solver` into
+        account for the peak sizes.
+        """
+        self.max_clauses = max(self.max_clauses, len(solver.clauses))
+        self.max_learned_clauses = max(
+            self.max_learned_clauses, len(solver.learned_clauses))
+        watch_list_sizes = [len(watched) for watched in
+                            solver.watches.values()]
+        watch_list_sizes.extend(
+            len(implied) for implied in solver.binary_watches.values())
+        self.max_watch_list_size = max(
+            [self.max_watch_list_size] + watch_list_sizes)
+
+    def to_dict(self):
+        """ Return the statistics as a dictionary of builtin types, which
+        may be serialized to JSON.
+        """
+        def histogram(counter):
+            return dict((str(key), value)
+                        for key, value in sorted(counter.items()))
+
+        return {
+            'decisions': self.decisions,
+            'propagations': self.propagations,
+            'conflicts': self.conflicts,
+            'restarts': self.restarts,
+            'reductions': self.reductions,
+            'backjump_distances': histogram(self.backjump_distances),
+            'learned_clause_lengths': histogram(self.learned_clause_lengths),
+            'learned_clause_lbds': histogram(self.learned_clause_lbds),
+            'max_clauses': self.max_clauses,
+            'max_learned_clauses': self.max_learned_clauses,
+            'max_watch_list_size': self.max_watch_list_size,
+            'search_time': self.search_time,
+            'rates': self.rates,
+            'rules': dict(self.rules),
+            'timings': dict(self.timings),
+        }
+
+    def to_json(self, **kwargs):
+        """ Return the statistics as a JSON string. Keyword arguments are
+        given to :func:`json.dumps`.
+        """
+        kwargs.setdefault('sort_keys', True)
+        return json.dumps(self.to_dict(), **kwargs)
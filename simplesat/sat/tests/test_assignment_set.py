@@ -3,7 +3,9 @@
 
 import unittest
 
-from ..assignment_set import AssignmentSet
+from ..assignment_set import (
+    AssignmentSet, FALSE, TRUE, UNASSIGNED, UNKNOWN, lit_code
+)
 
 
 class TestAssignmentSet(unittest.TestCase):
@@ -195,3 +197,73 @@ class TestAssignmentSet(unittest.TestCase):
         del AS[1]
         expected = {}
         self.assertEqual(AS.get_changelog(), expected)
+
+    def test_untracked_changes(self):
+        AS = AssignmentSet({1: None}, track_changes=False)
+
+        AS[2] = True
+        AS.assign(-1)
+        AS.unassign(1)
+        del AS[2]
+
+        self.assertEqual(AS.get_changelog(), {})
+        self.assertEqual(AS.consume_changelog(), {})
+        self.assertEqual(AS.copy().get_changelog(), {})
+
+        AS.assign(3)
+        self.assertEqual(AS.new_keys, {3})
+        self.assertEqual(AS.copy().new_keys, {3})
+
+    def test_assigned_log(self):
+        # Given
+        AS = AssignmentSet({1: None, 2: None})
+        AS[1] = True
+
+        # When
+        AS.assigned_log = []
+        AS.assign(-2)
+        AS.unassign(2)
+        AS[1] = False
+
+        # Then
+        self.assertEqual(AS.assigned_log, [2, 1])
+        self.assertIsNone(AS.copy().assigned_log)
+
+    def test_assign_unassign(self):
+        AS = AssignmentSet({1: None, 2: None})
+
+        AS.assign(-2)
+        self.assertIs(AS[2], False)
+        self.assertIs(AS.value(-2), True)
+        self.assertEqual(AS.num_assigned, 1)
+        self.assertEqual(AS.get_changelog(), {2: (None, False)})
+
+        AS.assign(3)
+        self.assertIn(3, AS)
+        self.assertEqual(len(AS), 3)
+        self.assertEqual(AS.new_keys, {1, 2, 3})
+
+        AS.unassign(2)
+        self.assertIs(AS[2], None)
+        self.assertEqual(AS.num_assigned, 1)
+        self.assertEqual(AS.unassigned_ids, {1, 2})
+        self.assertEqual(AS.get_changelog(), {3: (None, True)})
+
+    def test_lit_code(self):
+        self.assertEqual(
+            [lit_code(lit) for lit in (1, -1, 2, -2)], [2, 3, 4, 5])
+
+    def test_literal_states(self):
+        AS = AssignmentSet({1: True, 2: None, 3: False})
+        states = AS.literal_states
+
+        self.assertEqual(states[lit_code(1)], TRUE)
+        self.assertEqual(states[lit_code(-1)], FALSE)
+        self.assertEqual(states[lit_code(2)], UNASSIGNED)
+        self.assertEqual(states[lit_code(-2)], UNASSIGNED)
+        self.assertEqual(states[lit_code(3)], FALSE)
+        self.assertEqual(states[lit_code(-3)], TRUE)
+
+        del AS[3]
+        self.assertEqual(states[lit_code(3)], UNKNOWN)
+        self.assertIs(AS.value(42), None)
@@ -6,11 +6,19 @@ import six
 from ..assignment_set import AssignmentSet
 from ..clause import Clause
 from ..minisat import MiniSATSolver
+from ..policy import LoggedUndeterminedClausePolicy, UndeterminedClausePolicy
+from simplesat.pool import Pool
 
 
 # TODO: Move all ZM01 related tests to a separate module.
 
 
+def watched_clauses(solver, lit):
+    """Return the clauses watched on `lit`, binary or not."""
+    watchers = solver.watches.get(lit, []) + solver.binary_watches.get(lit, [])
+    return [clause for _, clause in watchers]
+
+
 def zm01_solver(add_conflict=False):
     """Create a solver with a non-trivial implication graph.
 
@@ -46,6 +54,17 @@ def zm01_solver(add_conflict=False):
 
 
 class TestClause(unittest.TestCase):
+    def test_duplicate_literals(self):
+        # Given
+        lits = (3, -1, 3, 2, -1)
+
+        # When
+        c = Clause(lits)
+
+        # Then
+        self.assertEqual(c.lits, [3, -1, 2])
+        self.assertFalse(hasattr(c, '__dict__'))
+
     def test_rewatch(self):
         # Given
         c = Clause([1, -2, 5])
@@ -138,12 +157,95 @@ class TestMiniSATSolver(unittest.TestCase):
         self.assertEqual(len(s.clauses), 1)
         clause = s.clauses[0]
         self.assertEqual(len(s.watches), 2)
-        six.assertCountEqual(self, s.watches[1], [clause])
-        six.assertCountEqual(self, s.watches[-2], [clause])
+        six.assertCountEqual(self, watched_clauses(s, 1), [clause])
+        six.assertCountEqual(self, watched_clauses(s, -2), [clause])
 
         self.assertEqual(len(s.clauses), 1)
         self.assertFalse(mock_enqueue.called)
 
+    @mock.patch.object(MiniSATSolver, 'enqueue')
+    def test_add_binary_clause(self, mock_enqueue):
+        # Given
+        s = MiniSATSolver()
+
+        # When
+        s.add_clause([-1, 2])
+
+        # Then
+        clause = s.clauses[0]
+        self.assertEqual(len(s.watches), 0)
+        self.assertEqual(s.binary_watches[1], [(2, clause)])
+        self.assertEqual(s.binary_watches[-2], [(-1, clause)])
+        self.assertFalse(mock_enqueue.called)
+
+    def test_add_tautology(self):
+        # Given
+        s = MiniSATSolver()
+
+        # When
+        s.add_clause([1, -2, -1])
+
+        # Then
+        self.assertEqual(s.clauses, [])
+        self.assertEqual(len(s.watches), 0)
+
+    def test_add_clause_simplify(self):
+        # Given
+        s = MiniSATSolver(simplify=True)
+        s.add_clause([1])
+        s.add_clause([-2])
+        unit = s.clauses[1]
+
+        # When
+        satisfied = Clause([1, 3, 4])
+        s.add_clause(satisfied)
+        shortened = Clause([2, 3, 4])
+        s.add_clause(shortened)
+
+        # Then
+        self.assertEqual(len(s.clauses), 3)
+        clause = s.clauses[2]
+        self.assertEqual(clause.lits, [3, 4])
+        self.assertTrue(clause.learned)
+        self.assertEqual(s.clause_trails[clause], [shortened, unit])
+        self.assertEqual(s.binary_watches[-3], [(4, clause)])
+
+    def test_add_clause_no_simplify_by_default(self):
+        # Given
+        s = MiniSATSolver()
+        s.add_clause([1])
+
+        # When
+        s.add_clause([-1, 2, 3])
+
+        # Then
+        self.assertEqual(s.clauses[1].lits, [-1, 2, 3])
+
+    def test_simplify(self):
+        # Given
+        s = MiniSATSolver(simplify=True)
+        cl1 = Clause([-1, 2, 3, 4])
+        cl2 = Clause([1, 5, 6])
+        cl3 = Clause([2, -5])
+        for clause in (cl1, cl2, cl3):
+            s.add_clause(clause)
+        s._setup_assignments()
+        s.add_clause([-2])
+        unit = s.clauses[3]
+        s.propagate()
+
+        # When
+        s.simplify()
+
+        # Then
+        self.assertEqual([c.lits for c in s.clauses], [[-1, 3, 4], [1, 6]])
+        simplified1, simplified2 = s.clauses
+        self.assertEqual(s.clause_trails[simplified1], [cl1, unit])
+        self.assertEqual(s.clause_trails[simplified2], [cl2, cl3])
+        self.assertEqual(watched_clauses(s, 1), [simplified1])
+        self.assertEqual(watched_clauses(s, -1), [simplified2])
+        self.assertEqual(watched_clauses(s, -2), [])
+
     @mock.patch.object(MiniSATSolver, 'enqueue')
     def test_propagate_one_level(self, mock_enqueue):
         # Make one literal true, and check that the watch lists are updated
@@ -172,11 +274,11 @@ class TestMiniSATSolver(unittest.TestCase):
         self._assertWatchesNotTrue(s.watches, s.assignments)
         self.assertFalse(mock_enqueue.called)
         self.assertIsNone(conflict)
-        six.assertCountEqual(self, s.watches[-7], [cl2])
-        six.assertCountEqual(self, s.watches[-1], [cl1])
-        six.assertCountEqual(self, s.watches[2], [cl3])
-        six.assertCountEqual(self, s.watches[4], [cl2])
-        six.assertCountEqual(self, s.watches[5], [cl1, cl3])
+        six.assertCountEqual(self, watched_clauses(s, -7), [cl2])
+        six.assertCountEqual(self, watched_clauses(s, -1), [cl1])
+        six.assertCountEqual(self, watched_clauses(s, 2), [cl3])
+        six.assertCountEqual(self, watched_clauses(s, 4), [cl2])
+        six.assertCountEqual(self, watched_clauses(s, 5), [cl1, cl3])
 
     @mock.patch.object(MiniSATSolver, 'enqueue')
     def test_propagate_with_unit_info(self, mock_enqueue):
@@ -201,10 +303,10 @@ class TestMiniSATSolver(unittest.TestCase):
         self._assertWatchesNotTrue(s.watches, s.assignments)
         self.assertEqual(mock_enqueue.call_count, 1)
         self.assertIsNone(conflict)
-        six.assertCountEqual(self, s.watches[-2], [cl2])
-        six.assertCountEqual(self, s.watches[-1], [cl1])
-        six.assertCountEqual(self, s.watches[4], [cl2])
-        six.assertCountEqual(self, s.watches[5], [cl1])
+        six.assertCountEqual(self, watched_clauses(s, -2), [cl2])
+        six.assertCountEqual(self, watched_clauses(s, -1), [cl1])
+        six.assertCountEqual(self, watched_clauses(s, 4), [cl2])
+        six.assertCountEqual(self, watched_clauses(s, 5), [cl1])
 
     def test_propagate_conflict(self):
         # Make one literal true, and cause a conflict in the unit propagation.
@@ -226,9 +328,64 @@ class TestMiniSATSolver(unittest.TestCase):
         # Then
         self.assertEqual(conflict, cl1)
         # Assert that all clauses are still watched.
-        six.assertCountEqual(self, s.watches[-3], [cl2])
-        six.assertCountEqual(self, s.watches[-2], [cl1])
-        six.assertCountEqual(self, s.watches[1], [cl1, cl2])
+        six.assertCountEqual(self, watched_clauses(s, -3), [cl2])
+        six.assertCountEqual(self, watched_clauses(s, -2), [cl1])
+        six.assertCountEqual(self, watched_clauses(s, 1), [cl1, cl2])
+
+    def test_propagate_skips_satisfied_clauses(self):
+        # Given
+        s = MiniSATSolver()
+        clause = Clause([1, 2, 3])
+        s.add_clause(clause)
+        s.assignments = AssignmentSet({1: None, 2: None, 3: None})
+        s.enqueue(2)
+        s.propagate()
+
+        # When
+        with mock.patch.object(Clause, 'rewatch') as mock_rewatch:
+            s.enqueue(-1)
+            conflict = s.propagate()
+
+        # Then
+        # The blocker 2 is True, so the clause is not visited.
+        self.assertIsNone(conflict)
+        self.assertFalse(mock_rewatch.called)
+        six.assertCountEqual(self, watched_clauses(s, -1), [clause])
+
+    def test_propagate_at_most_one(self):
+        # Given
+        s = MiniSATSolver()
+        s.add_at_most_one([1, 2, 3])
+        s.add_clause([1, 4])
+        s._setup_assignments()
+
+        # When
+        s.enqueue(1)
+        conflict = s.propagate()
+
+        # Then
+        self.assertIsNone(conflict)
+        self.assertEqual(s.assignments.to_dict(),
+                         {1: True, 2: False, 3: False, 4: None})
+        reason = s.assigning_clauses[3]
+        self.assertIsInstance(reason, Clause)
+        self.assertEqual(reason.lits, [-3, -1])
+
+    def test_propagate_at_most_one_conflict(self):
+        # Given
+        s = MiniSATSolver()
+        s.add_at_most_one([1, 2, 3])
+        s._setup_assignments()
+
+        # When
+        s.enqueue(1)
+        s.enqueue(3)
+        conflict = s.propagate()
+
+        # Then
+        self.assertEqual(conflict.lits, [-3, -1])
+        self.assertIs(
+            conflict, s.at_most_one_constraints[0].pair_clause(1, 3))
 
     def test_setup_does_not_overwrite_assignments(self):
         # Given
@@ -243,6 +400,21 @@ class TestMiniSATSolver(unittest.TestCase):
         # Then
         self.assertEqual(s.assignments.items(), expected_assignments)
 
+    def test_changelog_only_for_logged_policies(self):
+        # Given
+        pool = Pool()
+
+        # When
+        s = MiniSATSolver(UndeterminedClausePolicy(pool, []))
+        logged = MiniSATSolver(LoggedUndeterminedClausePolicy(pool, []))
+        s.enqueue(1)
+        logged.enqueue(1)
+
+        # Then
+        self.assertEqual(s.assignments.get_changelog(), {})
+        self.assertEqual(
+            logged.assignments.get_changelog(), {1: (None, True)})
+
     def _assertWatchesNotTrue(self, watches, assignments):
         for watch, clauses in watches.items():
             if len(clauses) > 0:
@@ -281,9 +453,9 @@ class TestMiniSATSolver(unittest.TestCase):
         self.assertEqual(s.assignments.to_dict(),
                          {1: True, 2: False, 3: None, 4: None})
         self.assertEqual(s.trail, [-2, 1])
-        six.assertCountEqual(self, s.watches[-1], [cl1, cl2])
-        six.assertCountEqual(self, s.watches[-2], [cl1])
-        six.assertCountEqual(self, s.watches[-3], [cl2])
+        six.assertCountEqual(self, watched_clauses(s, -1), [cl1, cl2])
+        six.assertCountEqual(self, watched_clauses(s, -2), [cl1])
+        six.assertCountEqual(self, watched_clauses(s, -3), [cl2])
 
     def test_propagation_with_queue_multiple_implications(self):
         # Given
@@ -328,11 +500,11 @@ class TestMiniSATSolver(unittest.TestCase):
         # Then
         self.assertIsNotNone(conflict)
         self.assertEqual(s.trail, [-1, -2, 3])
-        six.assertCountEqual(self, s.watches[-3], [cl3])
-        six.assertCountEqual(self, s.watches[-2], [cl2, cl3])
-        six.assertCountEqual(self, s.watches[-1], [cl1])
-        six.assertCountEqual(self, s.watches[2], [cl1])
-        six.assertCountEqual(self, s.watches[3], [cl2])
+        six.assertCountEqual(self, watched_clauses(s, -3), [cl3])
+        six.assertCountEqual(self, watched_clauses(s, -2), [cl2, cl3])
+        six.assertCountEqual(self, watched_clauses(s, -1), [cl1])
+        six.assertCountEqual(self, watched_clauses(s, 2), [cl1])
+        six.assertCountEqual(self, watched_clauses(s, 3), [cl2])
 
     def test_propagate_zm01(self):
         # Test that the solver can replicate the implication graph of ZM01. For
@@ -372,6 +544,7 @@ class TestMiniSATSolver(unittest.TestCase):
         s = MiniSATSolver()
         s.trail = [1, 2, -3]
         s.assignments = AssignmentSet({1: None, 2: None, 3: True})
+        s._reserve_variable(3)
 
         # When
         s.undo_one()
@@ -385,6 +558,7 @@ class TestMiniSATSolver(unittest.TestCase):
         s = MiniSATSolver()
         s.trail = [1, 2, -3, 4, 5, 6, -9, 10, 13]
         s.trail_lim = [0, 2, 4, 6]
+        s._reserve_variable(13)
 
         # When
         s.cancel()
@@ -399,6 +573,7 @@ class TestMiniSATSolver(unittest.TestCase):
         s = MiniSATSolver()
         s.trail = [1, 2, -3, 4, 5, 6, -9, 10, 13]
         s.trail_lim = [0, 2, 4, 6]
+        s._reserve_variable(13)
 
         # When
         s.cancel_until(1)
@@ -427,6 +602,44 @@ class TestMiniSATSolver(unittest.TestCase):
         self.assertEqual(s.trail, [])
         self.assertEqual(s.trail_lim, [])
 
+    def test_phase_saving(self):
+        # Given
+        s = MiniSATSolver(phase_saving=True)
+        s.assignments = AssignmentSet({1: None, 2: None})
+
+        # When
+        s.assume(-1)
+        s.enqueue(2)
+        s.cancel()
+
+        # Then
+        self.assertEqual(s.phases, {1: False, 2: True})
+
+    def test_no_phase_saving_by_default(self):
+        # Given
+        s = MiniSATSolver()
+        s.assignments = AssignmentSet({1: None})
+
+        # When
+        s.assume(-1)
+        s.cancel()
+
+        # Then
+        self.assertEqual(s.phases, {})
+
+    def test_decisions_follow_phases(self):
+        # Given
+        s = MiniSATSolver(initial_phases={1: False, 2: True})
+        s.add_clause([1, 2, 3])
+        s.add_clause([-1, -3])
+        s._setup_assignments()
+
+        # When
+        solution = s.search()
+
+        # Then
+        self.assertEqual(solution.to_dict(), {1: False, 2: True, 3: True})
+
     def test_cancel_zm01(self):
         # Check that we can resolve a conflict on the implication graph of
         # ZM01, and that the watch lists are left in a consistent state
@@ -499,10 +712,77 @@ class TestMiniSATSolver(unittest.TestCase):
         six.assertCountEqual(self, learned_clause.lits, [-8, 10, 17, -19])
         self.assertEqual(bt_level, 3)
 
+    def test_analyze_minimize(self):
+        # Given
+        implication = Clause([-1, 2])
+        s = MiniSATSolver(minimize_learned=True)
+        s.add_clause(implication)
+        s.add_clause(Clause([-3, -1, 4]))
+        s.add_clause(Clause([-3, -2, -4]))
+        s._setup_assignments()
+        s.assume(1)
+        s.propagate()
+        s.assume(3)
+        conflict = s.propagate()
+
+        # When
+        learned_clause, bt_level = s.analyze(conflict)
+
+        # Then
+        # -2 is implied by -1 through the first clause.
+        six.assertCountEqual(self, learned_clause.lits, [-1, -3])
+        self.assertEqual(bt_level, 1)
+        self.assertEqual(learned_clause.lbd, 2)
+        self.assertIn(implication, s.clause_trails[learned_clause])
+
+    def test_is_redundant_unassigned(self):
+        # Given
+        s = MiniSATSolver(minimize_learned=True)
+        s.add_clause(Clause([-1, 2]))
+        s.add_clause(Clause([2, 3]))
+        s._setup_assignments()
+        s.assume(1)
+        s.propagate()
+        # Mark every level, including the last one, which is what a level of
+        # -1 would index.
+        level_stamps = s._reserve_levels(s.decision_level)
+        stamp = s._next_stamp()
+        level_stamps[:] = [stamp] * len(level_stamps)
+        # A reason with a literal unassigned by backtracking.
+        s.reasons[2] = Clause([2, 3])
+        s.levels[3] = -1
+        redundant = {}
+
+        # When
+        result = s._is_redundant(2, set([1]), redundant, [])
+
+        # Then
+        self.assertFalse(result)
+        self.assertEqual(redundant, {2: False})
+
+    def test_analyze_no_minimize_by_default(self):
+        # Given
+        s = MiniSATSolver()
+        s.add_clause(Clause([-1, 2]))
+        s.add_clause(Clause([-3, -1, 4]))
+        s.add_clause(Clause([-3, -2, -4]))
+        s._setup_assignments()
+        s.assume(1)
+        s.propagate()
+        s.assume(3)
+        conflict = s.propagate()
+
+        # When
+        learned_clause, bt_level = s.analyze(conflict)
+
+        # Then
+        six.assertCountEqual(self, learned_clause.lits, [-1, -2, -3])
+
     def test_record_learned_clause(self):
         # Given
         s = MiniSATSolver()
-        s.levels = {1: 0, 2: 0, 3: 5, 4: 25}
+        # Levels are indexed by variable.
+        s.levels = [0, 0, 0, 5, 25, -1]
         clause = Clause([2, 3, -4, 5])
 
         # When
@@ -512,6 +792,27 @@ class TestMiniSATSolver(unittest.TestCase):
         self.assertEqual(clause.lits, [5, -4, 3, 2])
         six.assertCountEqual(self, s.prop_queue, [5])
 
+    def test_record_after_backjump(self):
+        # Given
+        s = MiniSATSolver()
+        s.add_clause(Clause([1, 2, 3]))
+        s._setup_assignments()
+        s.assume(-1)
+        s.propagate()
+        s.assume(-2)
+        s.propagate()
+        s.cancel_until(1)
+        clause = Clause([2, 1])
+
+        # When
+        s.record(clause)
+
+        # Then
+        # Only the asserting literal is propagated.
+        self.assertEqual(list(s.prop_queue), [2])
+        self.assertEqual(clause.lits, [2, 1])
+        self.assertIn((2, clause), s.binary_watches[-1])
+
     def test_validation(self):
         # Given
         s = MiniSATSolver()
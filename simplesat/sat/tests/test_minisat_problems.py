@@ -1,7 +1,11 @@
 import unittest
 
 from simplesat.examples.van_der_waerden import van_der_waerden
-from simplesat.errors import SatisfiabilityError
+from simplesat.errors import (
+    SatisfiabilityError, SearchLimitReached, SolverException,
+    UnsatisfiableAssumptions
+)
+from ..budget import CancellationToken
 from ..clause import Clause
 from ..minisat import MiniSATSolver
 
@@ -108,3 +112,438 @@ class TestMinisatVanDerWaerden(unittest.TestCase):
         # Then
         with self.assertRaises(SatisfiabilityError):
             s.search()
+
+
+class TestMinisatPropagation(unittest.TestCase):
+    """ Unit propagation on a van der Waerden problem large enough for the
+    watch lists to matter. scripts/benchmark_propagation.py times it.
+    """
+
+    def test_probe_every_literal(self):
+        # Given
+        s = MiniSATSolver()
+        clauses = van_der_waerden(4, 4, 34)
+        for clause in clauses:
+            s.add_clause(clause)
+        s._setup_assignments()
+        variables = sorted(s.assignments.keys())
+
+        # When
+        conflicts = []
+        for variable in variables:
+            for lit in (variable, -variable):
+                s.assume(lit)
+                conflicts.append(s.propagate())
+                s.cancel_until(0)
+
+        # Then
+        self.assertEqual(conflicts, [None] * 2 * len(variables))
+        self.assertEqual(s.stats.propagations, 2 * len(variables))
+        self.assertEqual(s.number_assigned, 0)
+
+        # When
+        solution = s.search()
+
+        # Then
+        self.assertTrue(check_solution(s.clauses, solution))
+        # The watch lists are left consistent.
+        solution = s.search()
+        self.assertTrue(check_solution(s.clauses, solution))
+
+    def test_van_der_waerden_not_solvable(self):
+        # Given
+        s = MiniSATSolver()
+        for clause in van_der_waerden(4, 4, 35):
+            s.add_clause(clause)
+        s._setup_assignments()
+
+        # When
+        with self.assertRaises(SatisfiabilityError):
+            s.search()
+
+        # Then
+        rates = s.stats.rates
+        self.assertGreater(rates['propagations_per_second'], 0)
+        self.assertGreater(rates['conflicts_per_second'], 0)
+
+
+class TestLearnedClauseReduction(unittest.TestCase):
+
+    def _solver(self, n, **kwargs):
+        s = MiniSATSolver(**kwargs)
+        for clause in van_der_waerden(3, 3, n):
+            s.add_clause(clause)
+        s._setup_assignments()
+        return s
+
+    def test_reduction_keeps_solutions(self):
+        # Given
+        s = self._solver(8, max_learned_clauses=4)
+
+        # When
+        solution = s.search()
+
+        # Then
+        self.assertTrue(check_solution(s.clauses, solution))
+        self.assertLessEqual(len(s.learned_clauses), len(s.clauses))
+
+    def test_reduction_keeps_unsatisfiability(self):
+        # Given
+        s = self._solver(9, max_learned_clauses=4)
+
+        # Then
+        with self.assertRaises(SatisfiabilityError):
+            s.search()
+        self.assertGreater(s.num_reductions, 0)
+
+    def test_reduce_learned(self):
+        # Given
+        s = self._solver(9)
+        with self.assertRaises(SatisfiabilityError):
+            s.search()
+        learned = list(s.learned_clauses)
+        locked = set(c for c in learned if s._is_locked(c))
+
+        # When
+        s.reduce_learned()
+
+        # Then
+        kept = set(s.learned_clauses)
+        self.assertLess(len(kept), len(learned))
+        self.assertEqual(s.num_reductions, 1)
+        self.assertTrue(locked.issubset(kept))
+        for clause in learned:
+            if clause not in kept:
+                self.assertGreater(clause.lbd, 2)
+                self.assertNotIn(clause, s.clauses)
+                for watched in s.watches.values():
+                    self.assertNotIn(clause, watched)
+
+    def test_no_reduction_by_default(self):
+        # Given
+        s = self._solver(9)
+
+        # When
+        with self.assertRaises(SatisfiabilityError):
+            s.search()
+
+        # Then
+        self.assertEqual(s.num_reductions, 0)
+        self.assertEqual(
+            set(s.learned_clauses), set(c for c in s.clauses if c.learned))
+
+
+class TestLearnedClauseMinimization(unittest.TestCase):
+
+    def _solver(self, n):
+        s = MiniSATSolver(minimize_learned=True)
+        for clause in van_der_waerden(3, 3, n):
+            s.add_clause(clause)
+        s._setup_assignments()
+        return s
+
+    def test_minimization_keeps_solutions(self):
+        # Given
+        s = self._solver(8)
+
+        # When
+        solution = s.search()
+
+        # Then
+        self.assertTrue(check_solution(s.clauses, solution))
+
+    def test_minimization_keeps_unsatisfiability(self):
+        # Given
+        s = self._solver(9)
+
+        # Then
+        with self.assertRaises(SatisfiabilityError):
+            s.search()
+
+
+class TestMinisatBudget(unittest.TestCase):
+
+    def _solver(self, n, **kwargs):
+        s = MiniSATSolver(**kwargs)
+        for clause in van_der_waerden(3, 3, n):
+            s.add_clause(clause)
+        s._setup_assignments()
+        return s
+
+    def test_max_conflicts(self):
+        # Given
+        s = self._solver(9, max_conflicts=2)
+
+        # When
+        with self.assertRaises(SearchLimitReached) as ctx:
+            s.search()
+
+        # Then
+        e = ctx.exception
+        self.assertEqual(e.limit, 'conflicts')
+        self.assertEqual(e.stats['conflicts'], 2)
+        self.assertEqual(e.stats['conflicts'], s.stats.conflicts)
+        self.assertGreater(e.stats['decisions'], 0)
+        self.assertGreater(e.stats['propagations'], 0)
+
+    def test_max_propagations(self):
+        # Given
+        s = self._solver(9, max_propagations=10)
+
+        # When
+        with self.assertRaises(SearchLimitReached) as ctx:
+            s.search()
+
+        # Then
+        self.assertEqual(ctx.exception.limit, 'propagations')
+        self.assertGreaterEqual(ctx.exception.stats['propagations'], 10)
+
+    def test_time_limit(self):
+        # Given
+        s = self._solver(9, time_limit=0)
+
+        # When
+        with self.assertRaises(SearchLimitReached) as ctx:
+            s.search()
+
+        # Then
+        self.assertEqual(ctx.exception.limit, 'time')
+
+    def test_cancellation(self):
+        # Given
+        token = CancellationToken()
+        s = self._solver(9, cancellation_token=token)
+        token.cancel()
+
+        # When
+        with self.assertRaises(SearchLimitReached) as ctx:
+            s.search()
+
+        # Then
+        self.assertEqual(ctx.exception.limit, 'cancelled')
+        self.assertEqual(ctx.exception.stats['decisions'], 0)
+
+    def test_solve_after_limit(self):
+        # Given
+        s = self._solver(9, max_conflicts=2)
+        with self.assertRaises(SearchLimitReached):
+            s.solve()
+
+        # Then
+        self.assertEqual(s.decision_level, 0)
+        num_learned = len(s.learned_clauses)
+        self.assertGreater(num_learned, 0)
+        with self.assertRaises(SearchLimitReached):
+            s.solve()
+        self.assertGreater(len(s.learned_clauses), num_learned)
+
+    def test_explanation_after_reuse(self):
+        # Given
+        def explanation_error():
+            s = self._solver(9)
+            with self.assertRaises(SatisfiabilityError) as ctx:
+                s.solve()
+            return s, ctx.exception
+
+        _, error = explanation_error()
+        r_message = error.unsat.to_string()
+        s, error = explanation_error()
+
+        # When
+        # The solver changes after the conflict, before the explanation is
+        # computed.
+        for clause in s.clauses:
+            clause.lits.reverse()
+        s.clause_trails.clear()
+
+        # Then
+        self.assertMultiLineEqual(error.unsat.to_string(), r_message)
+
+    def test_search_after_limit(self):
+        # Given
+        # van_der_waerden(3, 3, 8) is satisfiable.
+        s = self._solver(8, max_conflicts=1)
+
+        # When
+        # Each search gets a budget of one conflict, and resumes the work of
+        # the previous ones.
+        for _ in range(100):
+            try:
+                solution = s.search()
+                break
+            except SearchLimitReached:
+                self.assertEqual(s.decision_level, 0)
+        else:
+            self.fail("No solution after 100 searches")
+
+        # Then
+        self.assertTrue(s.validate(solution.to_dict()))
+
+
+class TestMinisatAtMostOne(unittest.TestCase):
+
+    def test_pigeon_hole(self):
+        # Three pigeons, two holes: pigeon i is in hole j iff 2 * i + j + 1.
+        # Given
+        s = MiniSATSolver()
+        for pigeon in range(3):
+            s.add_clause([2 * pigeon + 1, 2 * pigeon + 2])
+        for hole in range(2):
+            s.add_at_most_one([2 * pigeon + hole + 1 for pigeon in range(3)])
+        s._setup_assignments()
+
+        # Then
+        with self.assertRaises(SatisfiabilityError):
+            s.search()
+
+    def test_solution(self):
+        # Given
+        s = MiniSATSolver()
+        s.add_clause([1, 2, 3])
+        s.add_clause([-1, 4])
+        s.add_at_most_one([1, 2, 3, 4])
+        s._setup_assignments()
+
+        # When
+        solution = s.search()
+
+        # Then
+        values = solution.to_dict()
+        self.assertTrue(check_solution(s.clauses, solution))
+        self.assertEqual(sum(values[v] for v in (1, 2, 3, 4)), 1)
+
+
+class TestMinisatIncremental(unittest.TestCase):
+
+    def _solver(self, n):
+        s = MiniSATSolver()
+        for clause in van_der_waerden(3, 3, n):
+            s.add_clause(clause)
+        s._setup_assignments()
+        return s
+
+    def test_solve_with_assumptions(self):
+        # Given
+        s = self._solver(8)
+
+        # When
+        solution = s.solve()
+
+        # Then
+        self.assertTrue(check_solution(s.clauses, solution))
+        self.assertEqual(s.decision_level, 0)
+
+        # Given
+        assumptions = [-lit for lit in range(1, 9) if solution.value(lit)]
+
+        # When
+        other_solution = s.solve(assumptions)
+
+        # Then
+        self.assertTrue(check_solution(s.clauses, other_solution))
+        for lit in assumptions:
+            self.assertTrue(other_solution.value(lit))
+
+    def test_failed_assumptions_core(self):
+        # Given
+        s = MiniSATSolver()
+        s.add_clause([-1, 2])
+        s.add_clause([-2, -3])
+        s.add_clause([4, 5])
+        s._setup_assignments()
+
+        # When
+        with self.assertRaises(UnsatisfiableAssumptions) as ctx:
+            s.solve([4, 1, 5, 3])
+
+        # Then
+        self.assertEqual(ctx.exception.core, [1, 3])
+
+        # When
+        solution = s.solve([4, 1, 5])
+
+        # Then
+        self.assertEqual(
+            solution.to_dict(), {1: True, 2: True, 3: False, 4: True, 5: True})
+
+    def test_learned_clauses_are_kept(self):
+        # Given
+        s = self._solver(9)
+        assumptions = [1, -2, 3]
+
+        # When
+        with self.assertRaises(SolverException):
+            s.solve(assumptions)
+        learned_clauses = list(s.learned_clauses)
+
+        # Then
+        self.assertGreater(len(learned_clauses), 0)
+        with self.assertRaises(SatisfiabilityError):
+            s.solve()
+        self.assertEqual(
+            s.learned_clauses[:len(learned_clauses)], learned_clauses)
+
+    def test_add_clauses_between_calls(self):
+        # Given
+        s = MiniSATSolver()
+        s.add_clause([1, 2, 3])
+        s.add_clause([-1])
+        s._setup_assignments()
+        s.solve()
+
+        # When
+        s.add_clause([-2, -3])
+        s.add_clause([1, -2, 4])
+        s.add_clause([-4, 1])
+
+        # Then
+        solution = s.solve()
+        self.assertEqual(
+            solution.to_dict(), {1: False, 2: False, 3: True, 4: False})
+
+        # When
+        s.add_clause([1, -3])
+
+        # Then
+        with self.assertRaises(SatisfiabilityError):
+            s.solve()
+
+    def test_new_variables_between_calls(self):
+        # Given
+        s = MiniSATSolver()
+        s.add_clause([1])
+        s.add_clause([2])
+        s._setup_assignments()
+        s.solve()
+
+        # When
+        s.add_clause([3, 4, 5])
+        solution = s.solve()
+
+        # Then
+        self.assertEqual(set(solution.keys()), {1, 2, 3, 4, 5})
+        self.assertTrue(check_solution(s.clauses, solution))
+
+        # When
+        s.add_at_most_one([5, 6])
+        solution = s.solve()
+
+        # Then
+        self.assertEqual(set(solution.keys()), {1, 2, 3, 4, 5, 6})
+        self.assertTrue(check_solution(s.clauses, solution))
+        self.assertFalse(solution[5] and solution[6])
+
+    def test_add_at_most_one_between_calls(self):
+        # Given
+        s = MiniSATSolver()
+        s.add_clause([1])
+        s.add_clause([2, 3])
+        s._setup_assignments()
+        s.solve()
+
+        # When
+        s.add_at_most_one([1, 2])
+        solution = s.solve()
+
+        # Then
+        self.assertEqual(solution.to_dict(), {1: True, 2: False, 3: True})
@@ -0,0 +1,128 @@
+import unittest
+
+from simplesat.examples.van_der_waerden import van_der_waerden
+from simplesat.errors import SatisfiabilityError
+from simplesat.rules_generator import PackageRule, RuleType
+from ..assignment_set import AssignmentSet
+from ..clause import Clause
+from ..minisat import MiniSATSolver
+from ..preprocessing import Preprocessor
+
+
+def _satisfies(assignments, clauses):
+    return all(
+        any(assignments.value(lit) for lit in lits) for lits in clauses)
+
+
+def _rule(literals):
+    return PackageRule(literals, RuleType.internal)
+
+
+class TestPreprocessor(unittest.TestCase):
+
+    def test_subsumption(self):
+        # Given
+        cl1 = Clause([-1, 2])
+        cl2 = Clause([-1, 2, 3])
+        cl3 = Clause([-3, 4])
+        preprocessor = Preprocessor(frozen=[1, 2, 3, 4])
+
+        # When
+        clauses = preprocessor.preprocess([cl2, cl1, cl3])
+
+        # Then
+        self.assertEqual(clauses, [cl1, cl3])
+        self.assertEqual(preprocessor.num_removed_clauses, 1)
+        self.assertEqual(preprocessor.num_eliminated_variables, 0)
+
+    def test_self_subsuming_resolution(self):
+        # Given
+        cl1 = Clause([1, 2])
+        cl2 = Clause([-1, 2, 3])
+        preprocessor = Preprocessor(frozen=[1, 2, 3])
+
+        # When
+        clauses = preprocessor.preprocess([cl1, cl2])
+
+        # Then
+        self.assertEqual([clause.lits for clause in clauses], [[1, 2], [2, 3]])
+        strengthened = clauses[1]
+        self.assertTrue(strengthened.learned)
+        self.assertEqual(
+            preprocessor.clause_trails[strengthened], [cl2, cl1])
+
+    def test_variable_elimination(self):
+        # Given
+        # 1 -> 2 -> 3, 2 is only an implication step.
+        cl1 = Clause([-1, 2])
+        cl2 = Clause([-2, 3])
+        preprocessor = Preprocessor(frozen=[1, 3])
+
+        # When
+        clauses = preprocessor.preprocess([cl1, cl2])
+
+        # Then
+        self.assertEqual(preprocessor.num_eliminated_variables, 1)
+        resolvent, = clauses
+        self.assertEqual(resolvent.lits, [-1, 3])
+        self.assertEqual(preprocessor.clause_trails[resolvent], [cl1, cl2])
+
+        # When
+        assignments = AssignmentSet({1: True, 3: True})
+        preprocessor.extend_model(assignments)
+
+        # Then
+        self.assertEqual(assignments.to_dict(), {1: True, 2: True, 3: True})
+
+    def test_frozen_variables(self):
+        # Given
+        clauses = [Clause([-1, 2]), Clause([-2, 3])]
+        preprocessor = Preprocessor(frozen=[1, 2, 3])
+
+        # When
+        result = preprocessor.preprocess(clauses)
+
+        # Then
+        self.assertEqual(result, clauses)
+        self.assertEqual(preprocessor.num_eliminated_variables, 0)
+
+    def test_extend_model_prefers_false(self):
+        # Given
+        clauses = [Clause([-1, 2, 3]), Clause([-2, 4])]
+        preprocessor = Preprocessor(frozen=[1, 3])
+        preprocessor.preprocess(clauses)
+
+        # When
+        assignments = AssignmentSet({1: True, 3: True})
+        preprocessor.extend_model(assignments)
+
+        # Then
+        self.assertFalse(assignments[2])
+        self.assertFalse(assignments[4])
+        self.assertTrue(_satisfies(assignments, [[-1, 2, 3], [-2, 4]]))
+
+
+class TestMinisatPreprocessing(unittest.TestCase):
+
+    def test_sat(self):
+        # Given
+        clauses = van_der_waerden(3, 3, 8)
+        preprocessor = Preprocessor()
+        rules = [_rule(clause) for clause in clauses]
+        s = MiniSATSolver.from_rules(rules, preprocessor=preprocessor)
+
+        # When
+        solution = preprocessor.extend_model(s.search())
+
+        # Then
+        self.assertGreater(preprocessor.num_removed_clauses, 0)
+        self.assertTrue(_satisfies(solution, clauses))
+
+    def test_unsat(self):
+        # Given
+        rules = [_rule(clause) for clause in van_der_waerden(3, 3, 9)]
+        s = MiniSATSolver.from_rules(rules, preprocessor=Preprocessor())
+
+        # When/Then
+        with self.assertRaises(SatisfiabilityError):
+            s.search()
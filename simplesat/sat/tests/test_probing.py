@@ -0,0 +1,102 @@
+import unittest
+
+from simplesat.examples.van_der_waerden import van_der_waerden
+from simplesat.errors import SatisfiabilityError
+from ..clause import Clause
+from ..minisat import MiniSATSolver
+from ..probing import Prober
+
+
+def _solver(clauses):
+    s = MiniSATSolver()
+    for clause in clauses:
+        s.add_clause(clause)
+    s._setup_assignments()
+    return s
+
+
+class TestProber(unittest.TestCase):
+
+    def test_failed_literal(self):
+        # Given
+        # 1 implies both 2 and -2.
+        s = _solver([[-1, 2], [-1, 3], [-2, -3], [1, 4, 5]])
+        prober = Prober()
+
+        # When
+        prober.probe(s)
+
+        # Then
+        self.assertEqual(prober.failed_literals, [1])
+        self.assertEqual(s.decision_level, 0)
+        self.assertIs(s.assignments.value(1), False)
+        self.assertEqual(prober.false_variables, set([1]))
+        self.assertEqual(prober.true_variables, set())
+
+    def test_equivalent_literals(self):
+        # Given
+        # 1 -> 2 -> 3 -> 1
+        cl1 = Clause([-1, 2])
+        cl2 = Clause([-2, 3])
+        cl3 = Clause([-3, 1])
+        cl4 = Clause([-3, 4, 5])
+        cl5 = Clause([2, -4, 6])
+        s = _solver([cl1, cl2, cl3, cl4, cl5])
+        prober = Prober()
+
+        # When
+        prober.probe(s)
+
+        # Then
+        self.assertEqual(
+            prober.representatives,
+            {2: 1, -2: -1, 3: 1, -3: -1})
+        self.assertEqual(s.clauses[:3], [cl1, cl2, cl3])
+        substituted4, substituted5 = s.clauses[3:]
+        self.assertEqual(sorted(substituted4.lits), [-1, 4, 5])
+        self.assertEqual(sorted(substituted5.lits), [-4, 1, 6])
+        self.assertEqual(s.clause_trails[substituted4], [cl4, cl2, cl1])
+        self.assertEqual(s.clause_trails[substituted5], [cl5, cl2, cl3])
+
+        # When
+        solution = s.search()
+
+        # Then
+        self.assertEqual(solution[1], solution[2])
+        self.assertEqual(solution[1], solution[3])
+
+    def test_root_conflict(self):
+        # Given
+        s = _solver([[-1, 2], [1, 2], [-2, 3], [-2, -3]])
+
+        # When/Then
+        with self.assertRaises(SatisfiabilityError):
+            Prober().probe(s)
+
+    def test_max_probes(self):
+        # Given
+        s = _solver([[-1, 2], [-1, 3], [-2, -3], [1, 4, 5]])
+        prober = Prober(max_probes=0)
+
+        # When
+        prober.probe(s)
+
+        # Then
+        self.assertEqual(prober.failed_literals, [])
+        self.assertIsNone(s.assignments.value(1))
+
+    def test_van_der_waerden(self):
+        # Given
+        clauses = van_der_waerden(3, 3, 8)
+        s = _solver(clauses)
+
+        # When
+        Prober().probe(s)
+        solution = s.search()
+
+        # Then
+        solution_literals = set(
+            variable if status else -variable
+            for variable, status in solution.items())
+        self.assertTrue(all(
+            not solution_literals.isdisjoint(clause) for clause in clauses))
@@ -0,0 +1,88 @@
+import unittest
+
+from simplesat.package import RepositoryInfo, RepositoryPackageMetadata
+from simplesat.pool import Pool
+from simplesat.repository import Repository
+from ..assignment_set import AssignmentSet
+from ..policy import RepositoryPriorityPolicy
+
+
+def _repository(repository_info, packages):
+    return Repository([
+        RepositoryPackageMetadata._from_pretty_string(
+            package, repository_info)
+        for package in packages])
+
+
+class TestRepositoryPriorityPolicy(unittest.TestCase):
+
+    def setUp(self):
+        self.mirror = RepositoryInfo(u"mirror")
+        self.public = RepositoryInfo(u"public")
+        mirror_repository = _repository(
+            self.mirror, [u"numpy 1.8.1-1", u"numpy 1.9.2-1"])
+        public_repository = _repository(
+            self.public, [u"numpy 1.9.2-1", u"numpy 1.10.0-1"])
+        self.pool = Pool([mirror_repository, public_repository])
+        self.ids = dict(
+            ((package.repository_info.name, str(package.version)),
+             self.pool.package_id(package))
+            for repository in (mirror_repository, public_repository)
+            for package in repository)
+
+    def _suggestions(self, policy):
+        assignments = AssignmentSet(dict.fromkeys(self.ids.values()))
+        policy.add_requirements(self.ids.values())
+        suggestions = []
+        for _ in self.ids:
+            package_id = policy.get_next_package_id(assignments, [])
+            suggestions.append(package_id)
+            assignments[package_id] = False
+        return suggestions
+
+    def test_priority_orders_duplicates(self):
+        # Given
+        policy = RepositoryPriorityPolicy(
+            self.pool, [], repository_priorities=[self.mirror, self.public])
+
+        # When
+        suggestions = self._suggestions(policy)
+
+        # Then
+        self.assertEqual(suggestions, [
+            self.ids[u"public", u"1.10.0-1"],
+            self.ids[u"mirror", u"1.9.2-1"],
+            self.ids[u"public", u"1.9.2-1"],
+            self.ids[u"mirror", u"1.8.1-1"],
+        ])
+
+    def test_reversed_priorities(self):
+        # Given
+        policy = RepositoryPriorityPolicy(
+            self.pool, [], repository_priorities=[self.public, self.mirror])
+
+        # When
+        suggestions = self._suggestions(policy)
+
+        # Then
+        self.assertEqual(suggestions[1:3], [
+            self.ids[u"public", u"1.9.2-1"],
+            self.ids[u"mirror", u"1.9.2-1"],
+        ])
+
+    def test_strict_priority(self):
+        # Given
+        policy = RepositoryPriorityPolicy(
+            self.pool, [], repository_priorities=[self.mirror],
+            strict_priority=True)
+
+        # When
+        suggestions = self._suggestions(policy)
+
+        # Then
+        self.assertEqual(suggestions, [
+            self.ids[u"mirror", u"1.9.2-1"],
+            self.ids[u"mirror", u"1.8.1-1"],
+            self.ids[u"public", u"1.10.0-1"],
+            self.ids[u"public", u"1.9.2-1"],
+        ])
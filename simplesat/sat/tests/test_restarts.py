@@ -0,0 +1,108 @@
+import unittest
+
+from simplesat.examples.van_der_waerden import van_der_waerden
+from simplesat.errors import SatisfiabilityError
+from ..minisat import MiniSATSolver
+from ..restarts import (
+    GeometricRestarts, GlucoseRestarts, LubyRestarts, luby
+)
+
+
+def _conflicts_until_restart(strategy, lbd=2):
+    n = 1
+    while not strategy.on_conflict(lbd):
+        n += 1
+    strategy.on_restart()
+    return n
+
+
+class TestRestartStrategies(unittest.TestCase):
+
+    def test_luby_sequence(self):
+        expected = [1, 1, 2, 1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8, 1]
+        self.assertEqual([luby(i) for i in range(16)], expected)
+
+    def test_luby_restarts(self):
+        # Given
+        strategy = LubyRestarts(unit=10)
+
+        # When
+        intervals = [_conflicts_until_restart(strategy) for _ in range(7)]
+
+        # Then
+        self.assertEqual(intervals, [10, 10, 20, 10, 10, 20, 40])
+
+        # When
+        strategy.reset()
+
+        # Then
+        self.assertEqual(_conflicts_until_restart(strategy), 10)
+
+    def test_geometric_restarts(self):
+        # Given
+        strategy = GeometricRestarts(first=4, factor=2)
+
+        # When
+        intervals = [_conflicts_until_restart(strategy) for _ in range(3)]
+
+        # Then
+        self.assertEqual(intervals, [4, 8, 16])
+
+    def test_glucose_restarts(self):
+        # Given
+        strategy = GlucoseRestarts(window=3, k=0.8)
+
+        # When/Then
+        # Good clauses do not trigger a restart ...
+        for _ in range(10):
+            self.assertFalse(strategy.on_conflict(2))
+        # ... but a bad one does.
+        self.assertTrue(strategy.on_conflict(10))
+
+        # When
+        strategy.on_restart()
+
+        # Then
+        # The window must fill up again first.
+        self.assertFalse(strategy.on_conflict(10))
+        self.assertFalse(strategy.on_conflict(10))
+        self.assertTrue(strategy.on_conflict(10))
+
+
+class TestSolverRestarts(unittest.TestCase):
+
+    def _solver(self, n, restart_strategy):
+        s = MiniSATSolver(restart_strategy=restart_strategy)
+        for clause in van_der_waerden(3, 3, n):
+            s.add_clause(clause)
+        s._setup_assignments()
+        return s
+
+    def test_restarts_keep_solutions(self):
+        for strategy in ('luby', 'geometric', 'glucose', LubyRestarts(1)):
+            # Given
+            s = self._solver(8, strategy)
+
+            # When
+            solution = s.search()
+
+            # Then
+            self.assertTrue(s.validate(solution.to_dict()))
+
+    def test_restarts_keep_unsatisfiability(self):
+        # Given
+        s = self._solver(9, LubyRestarts(unit=1))
+
+        # When/Then
+        with self.assertRaises(SatisfiabilityError):
+            s.search()
+        self.assertGreater(s.num_restarts, 0)
+
+    def test_no_restarts_by_default(self):
+        # Given
+        s = self._solver(9, None)
+
+        # When/Then
+        with self.assertRaises(SatisfiabilityError):
+            s.search()
+        self.assertEqual(s.num_restarts, 0)
@@ -0,0 +1,84 @@
+import json
+import unittest
+
+from simplesat.examples.van_der_waerden import van_der_waerden
+from simplesat.errors import SatisfiabilityError
+from ..minisat import MiniSATSolver
+from ..stats import SolverStats
+
+
+def _solver(n, **kwargs):
+    s = MiniSATSolver(**kwargs)
+    for clause in van_der_waerden(3, 3, n):
+        s.add_clause(clause)
+    s._setup_assignments()
+    return s
+
+
+class TestSolverStats(unittest.TestCase):
+
+    def test_empty(self):
+        # Given
+        stats = SolverStats()
+
+        # When
+        data = stats.to_dict()
+
+        # Then
+        self.assertEqual(data['conflicts'], 0)
+        self.assertEqual(data['backjump_distances'], {})
+        self.assertEqual(data['rates']['conflicts_per_second'], 0.0)
+
+    def test_search(self):
+        # Given
+        s = _solver(9, restart_strategy='luby', max_learned_clauses=4)
+
+        # When
+        with self.assertRaises(SatisfiabilityError):
+            s.search()
+
+        # Then
+        stats = s.stats
+        self.assertGreater(stats.conflicts, 0)
+        self.assertGreater(stats.decisions, 0)
+        self.assertGreater(stats.propagations, stats.decisions)
+        self.assertEqual(stats.restarts, s.num_restarts)
+        self.assertEqual(stats.reductions, s.num_reductions)
+        self.assertGreater(stats.search_time, 0)
+
+        # Every conflict but the last one leads to a backjump and a learned
+        # clause.
+        num_learned = stats.conflicts - 1
+        self.assertEqual(
+            sum(stats.backjump_distances.values()), num_learned)
+        self.assertEqual(
+            sum(stats.learned_clause_lengths.values()), num_learned)
+        self.assertEqual(
+            sum(stats.learned_clause_lbds.values()), num_learned)
+        self.assertTrue(all(distance > 0
+                            for distance in stats.backjump_distances))
+
+        self.assertGreaterEqual(stats.max_clauses, len(s.clauses))
+        self.assertGreaterEqual(
+            stats.max_learned_clauses, len(s.learned_clauses))
+        self.assertGreaterEqual(stats.max_learned_clauses, 4)
+        self.assertGreater(stats.max_watch_list_size, 0)
+
+    def test_to_json(self):
+        # Given
+        s = _solver(8)
+        s.search()
+
+        # When
+        data = json.loads(s.stats.to_json())
+
+        # Then
+        self.assertEqual(data['decisions'], s.stats.decisions)
+        self.assertEqual(
+            data['learned_clause_lengths'],
+            dict((str(length), count) for length, count
+                 in s.stats.learned_clause_lengths.items()))
+        self.assertEqual(
+            set(data['rates']),
+            set(['decisions_per_second', 'propagations_per_second',
+                 'conflicts_per_second']))
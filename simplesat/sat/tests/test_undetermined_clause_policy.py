@@ -0,0 +1,230 @@
+import unittest
+
+from simplesat.errors import SatisfiabilityError
+from simplesat.examples.van_der_waerden import van_der_waerden
+from simplesat.repository import Repository
+from simplesat.test_utils import (
+    packages_from_definition, pool_and_repository_from_packages)
+from ..assignment_set import AssignmentSet
+from ..clause import Clause
+from ..minisat import MiniSATSolver
+from ..policy.undetermined_clause_policy import (
+    CandidateHeap, UndeterminedClausePolicy, UnsatisfiedClauses)
+
+
+def _unsatisfied_variables(assignments, clauses):
+    return set(
+        abs(lit) for clause in clauses
+        if not any(assignments.value(lit) for lit in clause.lits)
+        for lit in clause.lits)
+
+
+class TestUnsatisfiedClauses(unittest.TestCase):
+
+    def setUp(self):
+        self.assignments = AssignmentSet({1: None, 2: None, 3: None, 4: None})
+        self.clauses = [Clause([1, 2]), Clause([-2, 3]), Clause([3, 4])]
+        self.unsatisfied = UnsatisfiedClauses(self.assignments, self.clauses)
+        self.unsatisfied.update()
+
+    def test_all_unsatisfied(self):
+        # Then
+        self.assertEqual(self.unsatisfied.variables, set([1, 2, 3, 4]))
+        self.assertEqual(self.unsatisfied.clause_variables, set([1, 2, 3, 4]))
+
+    def test_assign(self):
+        # When
+        self.assignments[3] = True
+        self.unsatisfied.update()
+
+        # Then
+        self.assertEqual(self.unsatisfied.variables, set([1, 2]))
+
+    def test_unassign(self):
+        # Given
+        self.assignments[3] = True
+        self.unsatisfied.update()
+
+        # When
+        self.assignments[3] = None
+        self.unsatisfied.on_unassign(3)
+        self.unsatisfied.update()
+
+        # Then
+        self.assertEqual(self.unsatisfied.variables, set([1, 2, 3, 4]))
+
+    def test_flip(self):
+        # Given
+        self.assignments[2] = True
+        self.unsatisfied.update()
+        self.assertEqual(self.unsatisfied.variables, set([2, 3, 4]))
+
+        # When
+        # Unassigned then assigned again between two updates.
+        self.assignments[2] = None
+        self.unsatisfied.on_unassign(2)
+        self.assignments[2] = False
+        self.unsatisfied.update()
+
+        # Then
+        self.assertEqual(self.unsatisfied.variables, set([1, 2, 3, 4]))
+
+    def test_added_clause(self):
+        # Given
+        self.assignments[1] = True
+
+        # When
+        self.clauses.append(Clause([-1, 5]))
+        self.unsatisfied.update()
+
+        # Then
+        self.assertEqual(self.unsatisfied.variables, set([1, 2, 3, 4, 5]))
+        self.assertIn(5, self.unsatisfied.clause_variables)
+
+    def test_only_changed_variables_are_visited(self):
+        # Given
+        visited = []
+        update_variables = self.unsatisfied._update_variables
+
+        def logged_update_variables(variables):
+            visited.append(set(variables))
+            return update_variables(variables)
+
+        self.unsatisfied._update_variables = logged_update_variables
+        self.assignments[4] = False
+        self.unsatisfied.collect_changes()
+        self.assignments[3] = True
+
+        # When
+        self.unsatisfied.update()
+
+        # Then
+        self.assertEqual(visited, [set([3, 4])])
+        self.assertEqual(self.assignments.assigned_log, [])
+        self.assertEqual(self.unsatisfied.variables, set([1, 2]))
+
+
+class TestUndeterminedClausePolicy(unittest.TestCase):
+
+    def test_decision_set_follows_search(self):
+        # Given
+        clauses = van_der_waerden(3, 3, 9)
+        # The variables are not packages: rank them by id.
+        policy = UndeterminedClausePolicy(_IdPool(9), [])
+        decision_sets = []
+        get_next_package_id = policy.get_next_package_id
+
+        def checked_get_next_package_id(assignments, clauses):
+            # Refresh before every decision, instead of when the decision
+            # set runs dry.
+            policy._refresh_decision_set(assignments, clauses)
+            decision_sets.append((
+                set(policy._decision_set.package_ids),
+                _unsatisfied_variables(assignments, clauses)
+                - assignments.assigned_ids))
+            return get_next_package_id(assignments, clauses)
+
+        policy.get_next_package_id = checked_get_next_package_id
+        s = MiniSATSolver(policy)
+        for clause in clauses:
+            s.add_clause(clause)
+        s._setup_assignments()
+
+        # When
+        with self.assertRaises(SatisfiabilityError):
+            s.search()
+
+        # Then
+        self.assertGreater(len(decision_sets), 1)
+        for incremental, scanned in decision_sets:
+            self.assertEqual(incremental, scanned)
+
+    def test_reset(self):
+        # Given
+        pool, repository = pool_and_repository_from_packages(u"""
+            MKL 10.2-1
+            MKL 10.3-1
+            numpy 1.8.1-1; depends (MKL)
+        """)
+        ids = dict(
+            ("{} {}".format(p.name, p.version), pool.package_id(p))
+            for p in repository)
+        mkl = pool.id_to_package(ids["MKL 10.2-1"])
+        policy = UndeterminedClausePolicy(pool, [mkl])
+        policy.add_requirements([ids["numpy 1.8.1-1"]])
+        assignments = AssignmentSet(dict((i, None) for i in ids.values()))
+
+        # Then
+        self.assertEqual(
+            policy.get_next_package_id(assignments, []), ids["MKL 10.2-1"])
+
+        # When
+        policy.reset(ignore_installed_packages=set([mkl]))
+
+        # Then
+        self.assertEqual(policy._requirements.package_ids, set())
+        self.assertEqual(
+            policy.get_next_package_id(assignments, []), ids["MKL 10.3-1"])
+
+    def test_reset_after_pool_update(self):
+        # Given
+        pool, _ = pool_and_repository_from_packages(u"MKL 10.3-1")
+        policy = UndeterminedClausePolicy(pool, [])
+        new_repository = Repository(packages_from_definition(u"MKL 11.0-1"))
+        pool.add_repository(new_repository)
+        mkl_11, = new_repository
+        mkl_11_id = pool.package_id(mkl_11)
+
+        # When
+        policy.reset()
+        policy.add_requirements([mkl_11_id])
+
+        # Then
+        self.assertIs(policy._version_ranks, pool.version_ranks)
+        self.assertEqual(
+            policy._newest_first(mkl_11_id)[0], -pool.version_ranks[mkl_11_id])
+
+
+class _IdPool(object):
+
+    def __init__(self, num_variables):
+        self.version_ranks = list(range(num_variables + 1))
+
+
+class TestCandidateHeap(unittest.TestCase):
+
+    def test_lazy_deletion(self):
+        # Given
+        heap = CandidateHeap(lambda package_id: -package_id)
+        heap.add([1, 2, 3])
+        assignments = AssignmentSet({1: None, 2: None, 3: None})
+
+        # When
+        assignments[3] = True
+
+        # Then
+        self.assertEqual(heap.best(assignments), 2)
+
+        # When
+        assignments[3] = None
+        heap.on_unassign(3)
+
+        # Then
+        self.assertEqual(heap.best(assignments), 3)
+
+    def test_forgets_assigned(self):
+        # Given
+        heap = CandidateHeap(lambda package_id: -package_id,
+                             forgets_assigned=True)
+        heap.reset([1, 2, 3])
+        assignments = AssignmentSet({1: None, 2: None, 3: None})
+        assignments[3] = True
+        heap.best(assignments)
+
+        # When
+        assignments[3] = None
+        heap.on_unassign(3)
+
+        # Then
+        self.assertEqual(heap.best(assignments), 2)
+        self.assertEqual(heap.package_ids, set([1, 2]))
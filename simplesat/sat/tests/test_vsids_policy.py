@@ -0,0 +1,137 @@
+import unittest
+
+from simplesat.test_utils import pool_and_repository_from_packages
+from ..assignment_set import AssignmentSet
+from ..clause import Clause
+from ..minisat import MiniSATSolver
+from ..policy import VSIDSPolicy
+
+
+PACKAGES = u"""
+    MKL 10.2-1
+    MKL 10.3-1
+    numpy 1.7.1-1; depends (MKL == 10.3-1)
+    numpy 1.8.1-1; depends (MKL == 10.3-1)
+"""
+
+
+class TestVSIDSPolicy(unittest.TestCase):
+
+    def setUp(self):
+        self.pool, self.repository = pool_and_repository_from_packages(
+            PACKAGES)
+        self.ids = {
+            "{} {}".format(p.name, p.version): self.pool.package_id(p)
+            for p in self.repository}
+
+    def test_ties_prefer_newest_version(self):
+        # Given
+        policy = VSIDSPolicy(self.pool, [])
+        assignments = AssignmentSet({i: None for i in self.ids.values()})
+
+        # When
+        suggestions = []
+        for _ in self.ids:
+            candidate = policy.get_next_package_id(assignments, [])
+            assignments[candidate] = True
+            suggestions.append(candidate)
+
+        # Then
+        self.assertLess(
+            suggestions.index(self.ids["MKL 10.3-1"]),
+            suggestions.index(self.ids["MKL 10.2-1"]))
+        self.assertLess(
+            suggestions.index(self.ids["numpy 1.8.1-1"]),
+            suggestions.index(self.ids["numpy 1.7.1-1"]))
+
+    def test_ties_prefer_newest_version_across_names(self):
+        # Given
+        pool, repository = pool_and_repository_from_packages(u"""
+            pil 1.0-1; provides (imaging)
+            pilfer 3.0-1; provides (imaging)
+        """)
+        pil, pilfer = [pool.package_id(p) for p in repository]
+        policy = VSIDSPolicy(pool, [])
+        policy.add_requirements([pil, pilfer])
+        assignments = AssignmentSet({pil: None, pilfer: None})
+
+        # When
+        candidate = policy.get_next_package_id(assignments, [])
+
+        # Then
+        self.assertEqual(candidate, pilfer)
+
+    def test_ties_prefer_installed(self):
+        # Given
+        mkl = self.pool.id_to_package(self.ids["MKL 10.2-1"])
+        policy = VSIDSPolicy(self.pool, [mkl])
+        assignments = AssignmentSet({i: None for i in self.ids.values()})
+
+        # When
+        candidate = policy.get_next_package_id(assignments, [])
+
+        # Then
+        self.assertEqual(candidate, self.ids["MKL 10.2-1"])
+
+    def test_conflict_bumps_activity(self):
+        # Given
+        policy = VSIDSPolicy(self.pool, [])
+        assignments = AssignmentSet({i: None for i in self.ids.values()})
+        policy.get_next_package_id(assignments, [])
+        numpy_171 = self.ids["numpy 1.7.1-1"]
+
+        # When
+        policy.on_conflict([numpy_171])
+
+        # Then
+        self.assertEqual(
+            policy.get_next_package_id(assignments, []), numpy_171)
+
+    def test_unassigned_variables_are_suggested_again(self):
+        # Given
+        policy = VSIDSPolicy(self.pool, [])
+        assignments = AssignmentSet({i: None for i in self.ids.values()})
+        candidate = policy.get_next_package_id(assignments, [])
+        assignments[candidate] = True
+        policy.get_next_package_id(assignments, [])
+
+        # When
+        assignments[candidate] = None
+        policy.on_unassign(candidate)
+
+        # Then
+        self.assertEqual(
+            policy.get_next_package_id(assignments, []), candidate)
+
+    def test_reset(self):
+        # Given
+        mkl = self.pool.id_to_package(self.ids["MKL 10.2-1"])
+        policy = VSIDSPolicy(self.pool, [mkl])
+        assignments = AssignmentSet({i: None for i in self.ids.values()})
+        policy.get_next_package_id(assignments, [])
+        policy.on_conflict([self.ids["numpy 1.7.1-1"]])
+
+        # When
+        policy.reset(ignore_installed_packages=set([mkl]))
+
+        # Then
+        newest = {self.ids["MKL 10.3-1"], self.ids["numpy 1.8.1-1"]}
+        self.assertIn(policy.get_next_package_id(assignments, []), newest)
+
+    def test_invalid_decay(self):
+        with self.assertRaises(ValueError):
+            VSIDSPolicy(self.pool, [], decay=1.5)
+
+    def test_solver_without_pool(self):
+        # Given
+        s = MiniSATSolver(VSIDSPolicy(None, []))
+        s.add_clause(Clause([1, 2]))
+        s.add_clause(Clause([-1, 2]))
+        s.add_clause(Clause([1, -2, 3]))
+        s._setup_assignments()
+
+        # When
+        solution = s.search()
+
+        # Then
+        self.assertTrue(s.validate(solution.to_dict()))
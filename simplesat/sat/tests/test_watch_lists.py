@@ -0,0 +1,37 @@
+import unittest
+
+from ..assignment_set import lit_code
+from ..watch_lists import WatchLists
+
+
+class TestWatchLists(unittest.TestCase):
+
+    def test_mapping(self):
+        # Given
+        watches = WatchLists()
+
+        # When
+        watches[-3].append('a')
+        watches[2].append('b')
+
+        # Then
+        self.assertEqual(watches.lists[lit_code(-3)], ['a'])
+        self.assertEqual(watches.items(), [(2, ['b']), (-3, ['a'])])
+        self.assertEqual(sorted(watches), [-3, 2])
+        self.assertEqual(len(watches), 2)
+        self.assertEqual(watches.get(-3), ['a'])
+        self.assertEqual(watches.get(1), [])
+        self.assertIsNone(watches.get(10))
+
+    def test_reserve_in_place(self):
+        # Given
+        watches = WatchLists()
+        lists = watches.lists
+
+        # When
+        watches.reserve(5)
+
+        # Then
+        self.assertIs(watches.lists, lists)
+        self.assertEqual(len(lists), 12)
+        self.assertEqual(len(watches), 0)
@@ -0,0 +1,63 @@
+"""
+Per-literal lists, stored by literal code instead of in a dictionary.
+
+"""
+from __future__ import absolute_import
+
+from six.moves import range
+
+from .assignment_set import lit_code
+
+
+class WatchLists(object):
+
+    """ A list of watchers for each literal.
+
+    The lists are stored in :attr:`lists`, at the code of their literal
+    (see :func:`~simplesat.sat.assignment_set.lit_code`), so that the
+    solver finds them by indexing instead of hashing the literal. Seen as a
+    mapping, this behaves like a ``defaultdict(list)`` keyed by literal,
+    whose keys are the literals with at least one watcher.
+    """
+
+    def __init__(self):
+        self.lists = [[], []]
+
+    def reserve(self, variable):
+        """ Make room for the lists of `variable` and of its negation.
+
+        The lists are extended in place, so that references to
+        :attr:`lists` stay valid.
+        """
+        lists = self.lists
+        missing = 2 * variable + 2 - len(lists)
+        if missing > 0:
+            lists.extend([] for _ in range(missing))
+
+    def get(self, lit, default=None):
+        code = lit_code(lit)
+        lists = self.lists
+        if code < len(lists):
+            return lists[code]
+        return default
+
+    def items(self):
+        """ Return the (literal, watchers) pairs of the literals with
+        watchers.
+        """
+        return [
+            (code // 2 if code % 2 == 0 else -(code // 2), watchers)
+            for code, watchers in enumerate(self.lists) if watchers]
+
+    def values(self):
+        return [watchers for watchers in self.lists if watchers]
+
+    def __getitem__(self, lit):
+        self.reserve(abs(lit))
+        return self.lists[lit_code(lit)]
+
+    def __iter__(self):
+        return iter([lit for lit, _ in self.items()])
+
+    def __len__(self):
+        return len(self.values())
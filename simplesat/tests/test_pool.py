@@ -200,3 +200,35 @@ class TestPool(unittest.TestCase):
         # Then
         package_ids = set(pool.iter_package_ids())
         self.assertEqual(package_ids, set(pool._id_to_package_.keys()))
+
+    def test_version_ranks(self):
+        # Given
+        numpy_packages = self.packages_from_definition(NUMPY_PACKAGES)
+        pool = Pool([Repository(numpy_packages)])
+
+        # When
+        ranks = pool.version_ranks
+
+        # Then
+        self.assertEqual(len(ranks), len(numpy_packages) + 1)
+        for left in numpy_packages:
+            for right in numpy_packages:
+                left_rank = ranks[pool.package_id(left)]
+                right_rank = ranks[pool.package_id(right)]
+                self.assertEqual(
+                    left_rank < right_rank, left.version < right.version)
+                self.assertEqual(
+                    left_rank == right_rank, left.version == right.version)
+
+    def test_version_ranks_after_add_repository(self):
+        # Given
+        numpy_packages = self.packages_from_definition(NUMPY_PACKAGES)
+        pool = Pool([Repository(numpy_packages[:3])])
+        ranks = pool.version_ranks
+
+        # When
+        pool.add_repository(Repository(numpy_packages[3:]))
+
+        # Then
+        self.assertIsNot(pool.version_ranks, ranks)
+        self.assertEqual(len(pool.version_ranks), len(numpy_packages) + 1)
@@ -0,0 +1,59 @@
+import os
+import unittest
+
+from simplesat.errors import SearchLimitReached
+from simplesat.portfolio import first_result
+from simplesat.sat import CancellationToken
+
+
+def _raise(exception):
+    def function():
+        raise exception
+    return function
+
+
+class TestFirstResult(unittest.TestCase):
+
+    def test_first_success(self):
+        # Given
+        functions = [_raise(ValueError("broken")), os.getpid]
+
+        # When
+        index, succeeded, value = first_result(functions)
+
+        # Then
+        self.assertEqual(index, 1)
+        self.assertTrue(succeeded)
+        # The function ran in another process.
+        self.assertNotEqual(value, os.getpid())
+
+    def test_all_failed(self):
+        # Given
+        functions = [
+            _raise(SearchLimitReached('conflicts', {
+                'conflicts': 3, 'elapsed': 0.5})),
+            _raise(ValueError("broken"))]
+
+        # When
+        index, succeeded, value = first_result(functions)
+
+        # Then
+        self.assertEqual(index, 0)
+        self.assertFalse(succeeded)
+        self.assertIsInstance(value, SearchLimitReached)
+        self.assertEqual(value.limit, 'conflicts')
+        self.assertEqual(value.stats['conflicts'], 3)
+
+    def test_cancellation(self):
+        # Given
+        token = CancellationToken()
+        token.cancel()
+
+        def forever():
+            while True:
+                pass
+
+        # When/Then
+        with self.assertRaises(SearchLimitReached) as ctx:
+            first_result([forever], cancellation_token=token)
+        self.assertEqual(ctx.exception.limit, 'cancelled')
@@ -144,6 +144,91 @@ class TestRulesGenerator(unittest.TestCase):
         self.assertEqual(conflict.reason, RuleType.package_conflicts)
         self.assertEqual(conflict.literals, r_literals)
 
+    def test_same_name(self):
+        # Given
+        yaml = u"""
+            packages:
+              - quark 1.0.0-1
+              - quark 1.0.1-1
+              - quark 1.0.2-1
+
+            request:
+              - operation: "install"
+                requirement: "quark"
+        """
+        scenario = Scenario.from_yaml(io.StringIO(yaml))
+        pool = Pool(list(scenario.remote_repositories))
+
+        # When
+        rules = list(RulesGenerator(pool, scenario.request).iter_rules())
+
+        # Then
+        same_name = [rule for rule in rules
+                     if rule.reason == RuleType.package_same_name]
+        self.assertEqual(
+            [rule.literals for rule in same_name],
+            [(-2, -1), (-3, -1), (-3, -2)])
+        self.assertFalse(any(rule.is_at_most_one for rule in same_name))
+
+        # When
+        rules_generator = RulesGenerator(
+            pool, scenario.request, use_at_most_one=True)
+        rules = list(rules_generator.iter_rules())
+
+        # Then
+        same_name = [rule for rule in rules
+                     if rule.reason == RuleType.package_same_name]
+        self.assertEqual(len(same_name), 1)
+        at_most_one = same_name[0]
+        self.assertTrue(at_most_one.is_at_most_one)
+        self.assertEqual(at_most_one.literals, (-3, -2, -1))
+
+        # When
+        pair = at_most_one.restricted((-3, -1))
+
+        # Then
+        self.assertEqual(pair.reason, RuleType.package_same_name)
+        self.assertEqual(pair.literals, (-3, -1))
+        self.assertFalse(pair.is_at_most_one)
+        self.assertEqual(
+            pair.to_string(pool),
+            "Requirements: 'quark' <- 'quark'\n"
+            "    Can only install one of: "
+            "(+quark-1.0.2-1 | +quark-1.0.0-1)")
+
+    def test_job_rules(self):
+        # Given
+        yaml = u"""
+            packages:
+              - quark 1.0.0-1
+              - quark 1.0.1-1
+
+            request:
+              - operation: "install"
+                requirement: "quark"
+              - operation: "install"
+                requirement: "quark"
+              - operation: "remove"
+                requirement: "quark == 1.0.0-1"
+        """
+        scenario = Scenario.from_yaml(io.StringIO(yaml))
+        pool = Pool(list(scenario.remote_repositories))
+        rules_generator = RulesGenerator(pool, scenario.request)
+
+        # When
+        rules = list(rules_generator.iter_rules())
+
+        # Then
+        self.assertEqual(
+            [[rule.literals for rule in job_rules]
+             for job_rules in rules_generator.job_rules],
+            [[(1, 2)], [(1, 2)], [(-1,)]])
+        self.assertEqual(len(rules), 3)
+        self.assertEqual(
+            [rule.literals for rule in rules
+             if rules_generator.is_job_rule(rule)],
+            [(1, 2), (-1,)])
+
     def test_missing_direct_dependencies_package(self):
         # Given
         yaml = u"""
@@ -1,3 +1,4 @@
+import glob
 import os.path
 from unittest import TestCase
 
@@ -6,6 +7,7 @@ import six
 from simplesat.errors import NoPackageFound, SatisfiabilityError
 from simplesat.dependency_solver import DependencySolver
 from simplesat.pool import Pool
+from simplesat.portfolio import DEFAULT_PORTFOLIO
 from simplesat.test_utils import Scenario
 from simplesat.transaction import (
     InstallOperation, RemoveOperation, UpdateOperation
@@ -264,3 +266,50 @@ class TestInstallSet(ScenarioTestAssistant, TestCase):
 
     def test_constraint_modifiers(self):
         self._check_solution('constraint_modifiers.yaml')
+
+
+class TestSolverConfigurations(TestCase):
+    """ Options which only change how the solver searches must not change
+    the transactions of the scenarios.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        # The scenarios and their transactions with the default options.
+        cls.scenarios = []
+        pattern = os.path.join(os.path.dirname(__file__), '*.yaml')
+        for path in sorted(glob.glob(pattern)):
+            try:
+                scenario = Scenario.from_yaml(path)
+                expected = cls._solve(scenario)
+            except (ValueError, NoPackageFound):
+                # Scenarios the solver does not handle at all.
+                continue
+            cls.scenarios.append(
+                (os.path.basename(path), scenario, expected))
+
+    @staticmethod
+    def _solve(scenario, **solver_kwargs):
+        pool = Pool(scenario.remote_repositories)
+        pool.add_repository(scenario.installed_repository)
+        solver = DependencySolver(
+            pool, scenario.remote_repositories, scenario.installed_repository,
+            **solver_kwargs)
+        try:
+            transaction = solver.solve(scenario.request)
+        except SatisfiabilityError as failure:
+            return ['Unsatisfiable'] + [
+                str(r) for r in failure.unsat.requirements]
+        return [_pretty_operation(op) for op in transaction.operations]
+
+    def assertSameTransactions(self, **solver_kwargs):
+        for filename, scenario, expected in self.scenarios:
+            result = self._solve(scenario, **solver_kwargs)
+            self.assertEqual(result, expected, filename)
+
+    def test_preprocessing(self):
+        self.assertSameTransactions(use_preprocessing=True)
+
+    def test_default_portfolio(self):
+        for configuration in DEFAULT_PORTFOLIO:
+            self.assertSameTransactions(**configuration)
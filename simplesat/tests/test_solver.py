@@ -1,7 +1,9 @@
 import io
+import json
 import textwrap
 import unittest
 
+import mock
 from okonomiyaki.versions import EnpkgVersion
 
 from simplesat.constraints import (
@@ -14,11 +16,19 @@ from simplesat.dependency_solver import (
     satisfy_requirements, simplify_requirements,
 )
 from simplesat.errors import (
-    MissingInstallRequires, SatisfiabilityError, SatisfiabilityErrorWithHint
+    MissingInstallRequires, SatisfiabilityError, SatisfiabilityErrorWithHint,
+    SearchLimitReached
 )
+from simplesat.package import RepositoryInfo, RepositoryPackageMetadata
 from simplesat.pool import Pool
+from simplesat.portfolio import DEFAULT_PORTFOLIO
 from simplesat.repository import Repository
 from simplesat.request import Request
+from simplesat.sat import CancellationToken, MiniSATSolver
+from simplesat.sat.policy import (
+    DefaultPolicy, InstalledFirstPolicy, ReusablePolicyFactory, VSIDSPolicy
+)
+from simplesat.sat.policy.policy_logger import PolicyLogger
 from simplesat.test_utils import Scenario
 from simplesat.transaction import (
     InstallOperation, RemoveOperation, UpdateOperation
@@ -129,6 +139,189 @@ class TestSolver(SolverHelpersMixin, unittest.TestCase):
         # Then
         self.assertEqualOperations(transaction.operations, r_operations)
 
+    def test_policy_factory(self):
+        # Given
+        mkl = self.package_factory(u"mkl 10.3-1")
+        numpy = self.package_factory(u"numpy 1.9.2-1; depends (mkl == 10.3-1)")
+        self.repository.add_package(mkl)
+        self.repository.add_package(numpy)
+
+        r_operations = [InstallOperation(mkl), InstallOperation(numpy)]
+
+        request = Request()
+        request.install(R("numpy"))
+
+        pool = Pool([self.repository, self.installed_repository])
+        solver = DependencySolver(
+            pool, [self.repository], self.installed_repository,
+            policy_factory=VSIDSPolicy)
+
+        # When
+        transaction = solver.solve(request)
+
+        # Then
+        self.assertEqualOperations(transaction.operations, r_operations)
+
+    def test_installed_initial_phases(self):
+        # Given
+        mkl1 = self.package_factory(u"mkl 10.3-1")
+        mkl2 = self.package_factory(u"mkl 10.3-2")
+        numpy = self.package_factory(u"numpy 1.9.2-1; depends (mkl)")
+        self.repository.update([mkl2, mkl1, numpy])
+        self.installed_repository.add_package(mkl1)
+
+        request = Request()
+        request.install(R("numpy"))
+
+        pool = Pool([self.repository, self.installed_repository])
+
+        def policy_factory(*args, **kwargs):
+            # Decides the first undecided package, i.e. the newest mkl.
+            return DefaultPolicy()
+
+        def solve(solver_options):
+            solver = DependencySolver(
+                pool, [self.repository], self.installed_repository,
+                policy_factory=policy_factory,
+                solver_options=solver_options)
+            return solver, solver.solve(request)
+
+        # When
+        _, default_transaction = solve({})
+        solver, transaction = solve({'initial_phases': 'installed'})
+
+        # Then
+        self.assertEqualOperations(
+            default_transaction.operations,
+            [RemoveOperation(mkl1), InstallOperation(mkl2),
+             InstallOperation(numpy)])
+        self.assertEqual(
+            solver._get_solver_options()['initial_phases'],
+            {pool.package_id(mkl1): True, pool.package_id(mkl2): False})
+        self.assertEqualOperations(
+            transaction.operations, [InstallOperation(numpy)])
+
+    def test_cancellation(self):
+        # Given
+        mkl = self.package_factory(u"mkl 10.3-1")
+        numpy = self.package_factory(u"numpy 1.9.2-1; depends (mkl)")
+        self.repository.update([mkl, numpy])
+
+        request = Request()
+        request.install(R("numpy"))
+
+        token = CancellationToken()
+        pool = Pool([self.repository, self.installed_repository])
+        solver = DependencySolver(
+            pool, [self.repository], self.installed_repository,
+            solver_options={'cancellation_token': token})
+
+        # When
+        token.cancel()
+
+        # Then
+        with self.assertRaises(SearchLimitReached) as ctx:
+            solver.solve(request)
+        self.assertEqual(ctx.exception.limit, 'cancelled')
+
+    def test_stats(self):
+        # Given
+        mkl = self.package_factory(u"mkl 10.3-1")
+        numpy = self.package_factory(u"numpy 1.9.2-1; depends (mkl)")
+        self.repository.update([mkl, numpy])
+
+        request = Request()
+        request.install(R("numpy"))
+
+        pool = Pool([self.repository, self.installed_repository])
+        solver = DependencySolver(
+            pool, [self.repository], self.installed_repository)
+
+        # When
+        solver.solve(request)
+
+        # Then
+        stats = solver.stats.to_dict()
+        self.assertEqual(
+            stats['rules'], {'job_install': 1, 'package_requires': 1})
+        self.assertGreater(stats['propagations'], 0)
+        self.assertEqual(
+            set(stats['timings']), set(['rules', 'solver_init', 'solve']))
+        self.assertEqual(json.loads(json.dumps(stats)), stats)
+
+    def test_preprocessing(self):
+        # Given
+        mkl_10_2 = self.package_factory(u"mkl 10.2-1")
+        mkl_10_3 = self.package_factory(u"mkl 10.3-1")
+        numpy_1_8 = self.package_factory(
+            u"numpy 1.8.0-1; depends (mkl == 10.2-1)")
+        numpy_1_9 = self.package_factory(
+            u"numpy 1.9.2-1; depends (mkl == 10.3-1)")
+        scipy = self.package_factory(u"scipy 0.14.0-1; depends (numpy)")
+        self.repository.update([mkl_10_2, mkl_10_3, numpy_1_8, numpy_1_9,
+                                scipy])
+
+        r_operations = [
+            InstallOperation(mkl_10_3),
+            InstallOperation(numpy_1_9),
+            InstallOperation(scipy),
+        ]
+
+        request = Request()
+        request.install(R("scipy"))
+        request.install(R("numpy"))
+
+        pool = Pool([self.repository, self.installed_repository])
+        solver = DependencySolver(
+            pool, [self.repository], self.installed_repository,
+            use_preprocessing=True)
+
+        # When
+        transaction = solver.solve(request)
+
+        # Then
+        self.assertEqualOperations(transaction.operations, r_operations)
+        preprocessor = solver._last_preprocessor
+        # Packages may be chosen by the policy, and are never eliminated.
+        self.assertEqual(preprocessor.num_eliminated_variables, 0)
+        self.assertGreater(preprocessor.num_removed_clauses, 0)
+
+    def test_probing(self):
+        # Given
+        mkl_10_2 = self.package_factory(u"mkl 10.2-1")
+        mkl_10_3 = self.package_factory(u"mkl 10.3-1")
+        libfoo = self.package_factory(u"libfoo 1.0-1; depends (mkl == 10.2-1)")
+        numpy_1_8 = self.package_factory(
+            u"numpy 1.8.0-1; depends (mkl == 10.2-1)")
+        numpy_1_9 = self.package_factory(
+            u"numpy 1.9.2-1; depends (mkl == 10.3-1, libfoo)")
+        self.repository.update(
+            [mkl_10_2, mkl_10_3, libfoo, numpy_1_8, numpy_1_9])
+
+        r_operations = [
+            InstallOperation(mkl_10_2),
+            InstallOperation(numpy_1_8),
+        ]
+
+        request = Request()
+        request.install(R("numpy"))
+
+        pool = Pool([self.repository, self.installed_repository])
+        solver = DependencySolver(
+            pool, [self.repository], self.installed_repository,
+            use_probing=True)
+
+        # When
+        transaction = solver.solve(request)
+
+        # Then
+        self.assertEqualOperations(transaction.operations, r_operations)
+        # numpy 1.9.2 requires both versions of mkl.
+        prober = solver._last_prober
+        self.assertNotEqual(prober.failed_literals, [])
+        self.assertIn(pool.package_id(numpy_1_9), prober.false_variables)
+        self.assertIn(pool.package_id(numpy_1_8), prober.true_variables)
+
     def test_already_installed(self):
         # Given
         mkl1 = self.package_factory(u"mkl 10.3-1")
@@ -192,6 +385,13 @@ class TestSolver(SolverHelpersMixin, unittest.TestCase):
         # Then
         self.assertTrue(result.is_satisfiable)
         self.assertEqual(result.message, "")
+        # The result still behaves like an (is_satisfiable, message) tuple.
+        self.assertEqual(result, (True, ""))
+        self.assertEqual(len(result), 2)
+        self.assertTrue(result[0])
+        self.assertEqual(result[-1], "")
+        self.assertEqual(
+            result._asdict(), {'is_satisfiable': True, 'message': ""})
 
     def test_requirements_are_not_satisfiable(self):
         # Given
@@ -225,7 +425,343 @@ class TestSolver(SolverHelpersMixin, unittest.TestCase):
 
         # Then
         self.assertFalse(result.is_satisfiable)
+        # The explanation is only computed when the message is read.
+        self.assertIsNone(result._unsat._conflict_paths_cache)
         self.assertMultiLineEqual(result.message, r_msg)
+        self.assertEqual(tuple(result), (False, r_msg))
+        self.assertEqual(result, (False, r_msg))
+        self.assertNotEqual(result, (True, ""))
+        self.assertEqual(result[1], r_msg)
+
+    def test_at_most_one_explanation(self):
+        # Given
+        scenario = Scenario.from_yaml(io.StringIO(u"""
+            packages:
+                - MKL 10.1-1
+                - MKL 10.2-1
+                - MKL 10.3-1
+                - numpy 1.8.1-1; depends (MKL == 10.3-1)
+
+            request:
+                - operation: "install"
+                  requirement: "numpy"
+                - operation: "install"
+                  requirement: "MKL < 10.3"
+        """))
+        r_msg = textwrap.dedent("""\
+        Conflicting requirements:
+        Requirements: 'numpy' <- 'MKL == 10.3-1'
+            numpy-1.8.1-1 requires (+MKL-10.3-1)
+        Requirements: 'numpy' <- 'MKL == 10.3-1' <- 'MKL'
+            Can only install one of: (+MKL-10.3-1 | +MKL-10.2-1)
+        Requirements: 'MKL < 10.3-0'
+            Install command rule (+MKL-10.1-1 | +MKL-10.2-1)
+        """)
+        pool = Pool(scenario.remote_repositories)
+        solver = DependencySolver(
+            pool, scenario.remote_repositories,
+            scenario.installed_repository, use_at_most_one=True)
+
+        # When
+        with self.assertRaises(SatisfiabilityError) as ctx:
+            solver.solve(scenario.request)
+
+        # Then
+        self.assertMultiLineEqual(
+            ctx.exception.unsat.to_string(pool=pool), r_msg)
+
+    def test_lazy_explanation(self):
+        # Given
+        scenario = Scenario.from_yaml(io.StringIO(u"""
+            packages:
+                - MKL 10.2-1
+                - MKL 10.3-1
+                - numpy 1.8.1-1; depends (MKL == 10.3-1)
+
+            request:
+                - operation: "install"
+                  requirement: "numpy"
+                - operation: "install"
+                  requirement: "MKL < 10.3"
+        """))
+        pool = Pool(scenario.remote_repositories)
+        solver = DependencySolver(
+            pool, scenario.remote_repositories,
+            scenario.installed_repository)
+        with self.assertRaises(SatisfiabilityError) as ctx:
+            solver.solve(scenario.request)
+        unsat = ctx.exception.unsat
+
+        # Then
+        self.assertIsNone(unsat._conflict_paths_cache)
+
+        # When
+        message = unsat.to_string(pool=pool)
+
+        # Then
+        self.assertIsNotNone(unsat._conflict_paths_cache)
+        self.assertEqual(str(ctx.exception), unsat.to_string())
+        self.assertIn("numpy-1.8.1-1 requires (+MKL-10.3-1)", message)
+
+    def test_bounded_explanation(self):
+        # Given
+        scenario = Scenario.from_yaml(io.StringIO(u"""
+            packages:
+                - MKL 10.2-1
+                - MKL 10.3-1
+                - numpy 1.8.1-1; depends (MKL == 10.3-1)
+
+            request:
+                - operation: "install"
+                  requirement: "numpy"
+                - operation: "install"
+                  requirement: "MKL < 10.3"
+        """))
+        pool = Pool(scenario.remote_repositories)
+        solver = DependencySolver(
+            pool, scenario.remote_repositories,
+            scenario.installed_repository,
+            solver_options={'explanation_max_nodes': 0})
+        with self.assertRaises(SatisfiabilityError) as ctx:
+            solver.solve(scenario.request)
+        unsat = ctx.exception.unsat
+
+        # When
+        message = unsat.to_string(pool=pool)
+
+        # Then
+        # Only the end points of the conflict are left.
+        self.assertTrue(message.startswith("Conflicting requirements:"))
+        self.assertNotIn("numpy-1.8.1-1 requires", message)
+        self.assertGreater(len(unsat.rules), 0)
+
+    def test_debug(self):
+        # Given
+        mkl_10_2 = self.package_factory(u"mkl 10.2-1")
+        mkl_10_3 = self.package_factory(u"mkl 10.3-1")
+        numpy = self.package_factory(u"numpy 1.9.2-1; depends (mkl)")
+        self.repository.update([mkl_10_2, mkl_10_3, numpy])
+
+        request = Request()
+        request.install(R("numpy"))
+
+        pool = Pool([self.repository, self.installed_repository])
+
+        # When
+        solver = DependencySolver(
+            pool, [self.repository], self.installed_repository)
+        solver.solve(request)
+
+        # Then
+        self.assertNotIsInstance(solver._last_policy, PolicyLogger)
+
+        # When
+        solver = DependencySolver(
+            pool, [self.repository], self.installed_repository, debug=True)
+        solver.solve(request)
+
+        # Then
+        policy = solver._last_policy
+        self.assertIsInstance(policy, PolicyLogger)
+        self.assertEqual(policy._log_required, [pool.package_id(numpy)])
+        self.assertEqual(
+            policy._log_suggestions, [pool.package_id(mkl_10_3)])
+        self.assertIn(u"numpy 1.9.2-1", policy._log_report())
+
+    def test_reusable_policy_factory(self):
+        # Given
+        mkl_10_2 = self.package_factory(u"mkl 10.2-1")
+        mkl_10_3 = self.package_factory(u"mkl 10.3-1")
+        numpy = self.package_factory(u"numpy 1.9.2-1; depends (mkl)")
+        scipy = self.package_factory(
+            u"scipy 0.14.0-1; depends (numpy, mkl ^= 10.3)")
+        self.repository.update([mkl_10_2, mkl_10_3, numpy, scipy])
+        self.installed_repository.add_package(
+            self.package_factory(u"mkl 10.2-1"))
+
+        requests = [Request() for _ in range(3)]
+        requests[0].install(R("numpy"))
+        requests[1].install(R("scipy"))
+        requests[2].soft_update(R("mkl"))
+
+        pool = Pool([self.repository, self.installed_repository])
+        policy_factory = ReusablePolicyFactory(InstalledFirstPolicy)
+        policies = []
+
+        for request in requests:
+            solver = DependencySolver(
+                pool, [self.repository], self.installed_repository)
+            reusing_solver = DependencySolver(
+                pool, [self.repository], self.installed_repository,
+                policy_factory=policy_factory)
+
+            # When
+            transaction = reusing_solver.solve(request)
+
+            # Then
+            self.assertEqual(
+                transaction.operations, solver.solve(request).operations)
+            policies.append(reusing_solver._last_policy)
+
+        self.assertEqual(len(set(map(id, policies))), 1)
+
+        # When
+        other_pool = Pool([self.repository, self.installed_repository])
+        solver = DependencySolver(
+            other_pool, [self.repository], self.installed_repository,
+            policy_factory=policy_factory)
+        solver.solve(requests[0])
+
+        # Then
+        self.assertIs(policy_factory._pool, other_pool)
+        self.assertIs(solver._last_policy, policy_factory._policy)
+
+    def test_reusable_policy_factory_without_reset(self):
+        # Given
+        pool = Pool([self.repository, self.installed_repository])
+
+        def create_policy(pool, installed_repository,
+                          ignore_installed_packages=None):
+            return DefaultPolicy()
+
+        policy_factory = ReusablePolicyFactory(create_policy)
+
+        # When
+        policies = [
+            policy_factory(pool, self.installed_repository)
+            for _ in range(2)]
+
+        # Then
+        self.assertFalse(DefaultPolicy.supports_reset)
+        self.assertTrue(InstalledFirstPolicy.supports_reset)
+        self.assertTrue(VSIDSPolicy.supports_reset)
+        self.assertIsNot(policies[0], policies[1])
+
+    def test_repository_priorities(self):
+        # Given
+        mirror = RepositoryInfo(u"mirror")
+        public = RepositoryInfo(u"public")
+        mirror_repository = Repository([
+            RepositoryPackageMetadata._from_pretty_string(
+                u"numpy 1.9.2-1", mirror)])
+        public_repository = Repository([
+            RepositoryPackageMetadata._from_pretty_string(
+                u"numpy 1.9.2-1", public)])
+        remote_repositories = [mirror_repository, public_repository]
+        pool = Pool(remote_repositories)
+
+        request = Request()
+        request.install(R("numpy"))
+
+        for priorities in ([mirror, public], [public, mirror]):
+            solver = DependencySolver(
+                pool, remote_repositories, self.installed_repository,
+                repository_priorities=priorities)
+
+            # When
+            transaction = solver.solve(request)
+
+            # Then
+            operation, = transaction.operations
+            self.assertEqual(
+                operation.package.repository_info, priorities[0])
+
+    def test_repository_priorities_and_policy_factory(self):
+        # Given
+        pool = Pool([self.repository])
+
+        # When/Then
+        with self.assertRaises(ValueError):
+            DependencySolver(
+                pool, [self.repository], self.installed_repository,
+                policy_factory=VSIDSPolicy,
+                repository_priorities=[RepositoryInfo(u"remote")])
+
+    def test_portfolio(self):
+        # Given
+        scenario = Scenario.from_yaml(io.StringIO(u"""
+            packages:
+                - MKL 10.2-1
+                - MKL 10.3-1
+                - numpy 1.7.1-1; depends (MKL == 10.2-1)
+                - numpy 1.8.1-1; depends (MKL == 10.2-1)
+                - numpy 1.9.1-1; depends (MKL == 10.3-1)
+
+            request:
+                - operation: "soft_update"
+                  requirement: "numpy"
+                - operation: "install"
+                  requirement: "MKL"
+
+            installed:
+                - MKL 10.2-1
+                - numpy 1.7.1-1
+        """))
+        pool = Pool(scenario.remote_repositories)
+        pool.add_repository(scenario.installed_repository)
+        solver = DependencySolver(
+            pool, scenario.remote_repositories,
+            scenario.installed_repository, portfolio=DEFAULT_PORTFOLIO)
+
+        # When
+        transaction = solver.solve(scenario.request)
+
+        # Then
+        winner = solver._with_configuration(
+            DEFAULT_PORTFOLIO[solver._last_portfolio_winner])
+        self.assertIsNot(winner, solver)
+        self.assertEqual(
+            transaction.operations,
+            winner.solve(scenario.request).operations)
+        self.assertGreater(solver.stats.propagations, 0)
+        sequential_solver = DependencySolver(
+            pool, scenario.remote_repositories,
+            scenario.installed_repository)
+        self.assertEqual(
+            transaction.operations,
+            sequential_solver.solve(scenario.request).operations)
+
+    def test_portfolio_unsat(self):
+        # Given
+        scenario = Scenario.from_yaml(io.StringIO(u"""
+            packages:
+                - MKL 10.2-1
+                - MKL 10.3-1
+                - numpy 1.8.1-1; depends (MKL == 10.3-1)
+
+            request:
+                - operation: "install"
+                  requirement: "numpy"
+                - operation: "install"
+                  requirement: "MKL < 10.3"
+        """))
+        pool = Pool(scenario.remote_repositories)
+        solver = DependencySolver(
+            pool, scenario.remote_repositories,
+            scenario.installed_repository, portfolio=DEFAULT_PORTFOLIO)
+
+        # When
+        with self.assertRaises(SatisfiabilityError) as ctx:
+            solver.solve(scenario.request)
+
+        # Then
+        winner = solver._with_configuration(
+            DEFAULT_PORTFOLIO[solver._last_portfolio_winner])
+        with self.assertRaises(SatisfiabilityError) as winner_ctx:
+            winner.solve(scenario.request)
+        self.assertMultiLineEqual(
+            ctx.exception.unsat.to_string(pool=pool),
+            winner_ctx.exception.unsat.to_string(pool=pool))
+
+    def test_portfolio_unknown_setting(self):
+        # Given
+        pool = Pool([self.repository])
+
+        # When/Then
+        with self.assertRaises(ValueError):
+            DependencySolver(
+                pool, [self.repository], self.installed_repository,
+                portfolio=[{'use_pruning': False}])
 
     def test_requirements_are_complete(self):
         # Given
@@ -555,6 +1091,32 @@ class TestSolver(SolverHelpersMixin, unittest.TestCase):
         # Then
         self.assertEqualOperations(transaction.operations, r_operations)
 
+    def test_conflict_with_remove_job(self):
+        # Given
+        mkl_2017_0_1_1 = P(u"mkl 2017.0.1-1")
+        numpy_1_11_3 = P(u"numpy 1.11.3-1; depends (mkl ^= 2017.0.1)")
+        pandas_0_19_2 = P(u"pandas 0.19.2-1")
+
+        self.repository.update([mkl_2017_0_1_1, numpy_1_11_3, pandas_0_19_2])
+
+        request = Request()
+        request.install(R(u"pandas"))
+        request.install(R(u"numpy"))
+        request.install(R(u"pandas >= 0.19"))
+        request.remove(R(u"mkl"))
+
+        r_hint_pretty_string = textwrap.dedent(u"""\
+            The following jobs are conflicting:
+                install numpy
+                remove mkl""")
+
+        # When/Then
+        with self.assertRaises(SatisfiabilityErrorWithHint) as ctx:
+            self.resolve_with_hint(request)
+
+        self.assertMultiLineEqual(
+            ctx.exception.hint_pretty_string, r_hint_pretty_string)
+
     def test_upgrade_fail(self):
         # Given
         mkl_11_3_1 = P(u"mkl 11.3.1-1")
@@ -689,7 +1251,7 @@ class TestSolverWithHint(SolverHelpersMixin, unittest.TestCase):
 
         r_hint_pretty_string = textwrap.dedent(u"""\
             The following jobs are conflicting:
-                install numpy >= 1.10.0-0
+                install scipy >= 0.18.0-0
                 install mkl < 12-0""")
 
         # When/Then
@@ -699,6 +1261,36 @@ class TestSolverWithHint(SolverHelpersMixin, unittest.TestCase):
         self.assertMultiLineEqual(
             ctx.exception.hint_pretty_string, r_hint_pretty_string)
 
+    def test_conflicting_jobs_shrink_by_core(self):
+        # Given
+        mkl = P(u"mkl 2017.0.1-1")
+        numpy = P(u"numpy 1.11.3-1; depends (mkl ^= 2017.0.1)")
+        others = [P(u"{} 1.0.0-1".format(name)) for name in u"abcdef"]
+        self.repository.update([mkl, numpy] + others)
+
+        # The conflicting jobs are the first and the last ones.
+        request = Request()
+        request.install(R(u"numpy"))
+        for package in others:
+            request.install(R(package.name))
+        request.remove(R(u"mkl"))
+
+        pool = Pool([self.repository, self.installed_repository])
+        solver = DependencySolver(
+            pool, [self.repository], self.installed_repository)
+
+        # When
+        with mock.patch.object(
+                MiniSATSolver, 'solve', autospec=True,
+                side_effect=MiniSATSolver.solve) as solve:
+            jobs = solver._conflicting_jobs(request)
+
+        # Then
+        self.assertEqual(jobs, (request.jobs[0], request.jobs[-1]))
+        # One call for every job, then one per job of the conflict.
+        self.assertLess(solve.call_count, len(request.jobs))
+        self.assertEqual(solve.call_count, 1 + len(jobs))
+
     def test_upgrade_fail(self):
         # Given
         mkl_11_3_1 = P(u"mkl 11.3.1-1")
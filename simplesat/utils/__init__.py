@@ -8,7 +8,9 @@ import shutil
 import tempfile
 
 from .timed_context import timed_context
-from .graph import connected_nodes, toposort, transitive_neighbors
+from .graph import (
+    connected_nodes, strongly_connected_components, toposort,
+    transitive_neighbors)
 from ._collections import DefaultOrderedDict
 
 
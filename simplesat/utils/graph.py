@@ -176,6 +176,61 @@ def connected_nodes(node, neighbor_func, visited=None):
     return visited
 
 
+def strongly_connected_components(nodes, neighbor_func):
+    """ Return the strongly connected components of the graph reachable
+    from `nodes`, following neighbors as given by `neighbor_func(node)`.
+
+    This is Tarjan's algorithm, without recursion. The components are
+    lists of nodes, yielded in reverse topological order: no component has
+    an edge towards a component returned after it.
+
+    >>> def neighbor_func(node):
+    ...     return {1: [2], 2: [1, 3], 3: []}[node]
+    >>> strongly_connected_components([1], neighbor_func)
+    [[3], [2, 1]]
+    """
+    index = {}
+    lowlink = {}
+    stack = []
+    on_stack = set()
+    components = []
+
+    def visit(node):
+        index[node] = lowlink[node] = len(index)
+        stack.append(node)
+        on_stack.add(node)
+        work.append((node, iter(neighbor_func(node))))
+
+    for root in nodes:
+        if root in index:
+            continue
+        work = []
+        visit(root)
+        while work:
+            node, neighbors = work[-1]
+            for neighbor in neighbors:
+                if neighbor not in index:
+                    visit(neighbor)
+                    break
+                elif neighbor in on_stack:
+                    lowlink[node] = min(lowlink[node], index[neighbor])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+    return components
+
+
 def backtrack(end, start, visited):
     """ Return a tuple of nodes from `start` to `end` by recursively looking up
     the current node in `visited`. `visited` is a dictionary of one-way edges
@@ -9,7 +9,8 @@ from textwrap import dedent
 from simplesat.test_utils import pool_and_repository_from_packages
 
 from ..graph import (
-    package_lit_dependency_graph, toposort, transitive_neighbors
+    package_lit_dependency_graph, strongly_connected_components, toposort,
+    transitive_neighbors
 )
 
 
@@ -64,6 +65,27 @@ class TestGraph(unittest.TestCase):
         # Then
         self.assertEqual(result, expected)
 
+    def test_strongly_connected_components(self):
+        # Given
+        graph = {
+            1: [2],
+            2: [3, 4],
+            3: [1],
+            4: [5],
+            5: [4, 6],
+            6: [],
+            7: [6],
+        }
+
+        # When
+        components = strongly_connected_components(
+            sorted(graph), graph.__getitem__)
+
+        # Then
+        self.assertEqual(
+            [sorted(component) for component in components],
+            [[6], [4, 5], [1, 2, 3], [7]])
+
     def test_toposort(self):
         # Given
         graph = {